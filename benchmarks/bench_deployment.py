@@ -0,0 +1,50 @@
+"""Runtime of the deployment engines as the SKU count grows.
+
+    python -m benchmarks.bench_deployment --skus 150 500 1000 --stores 5
+"""
+import argparse
+import time
+
+from benchmarks.synthetic import make_deployment_inputs
+from src.deployment_kernel import accurate_deployment_vectorized
+from src.deplyment import accurate_deployment, accurate_deployment_indexed
+
+ENGINES = {
+    "scan": accurate_deployment,
+    "indexed": accurate_deployment_indexed,
+    "vectorized": accurate_deployment_vectorized,
+}
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--skus", type=int, nargs="+", default=[150, 500, 1000, 2000])
+    parser.add_argument("--stores", type=int, default=5)
+    parser.add_argument("--days", type=int, default=45)
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    args = parser.parse_args()
+
+    print(f"{'skus':>7} {'plan rows':>10} {'demand rows':>12} " + " ".join(f"{e + ' s':>12}" for e in args.engines))
+    for n_skus in args.skus:
+        plan, demand = make_deployment_inputs(n_skus=n_skus, n_stores=args.stores, horizon=args.days)
+
+        reference, timings = None, []
+        for name in args.engines:
+            out, seconds = _timed(ENGINES[name], plan, demand, args.days)
+            if reference is None:
+                reference = out
+            elif not out.equals(reference):
+                raise AssertionError(f"{name} output differs from {args.engines[0]} at {n_skus} SKUs")
+            timings.append(seconds)
+
+        print(f"{n_skus:>7} {plan.height:>10} {demand.height:>12} " + " ".join(f"{t:>12.3f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
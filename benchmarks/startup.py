@@ -0,0 +1,83 @@
+"""Cold-start cost of the entry points, each timed in a fresh interpreter.
+
+    python -m benchmarks.startup --repeat 5
+    python -m benchmarks.startup --top 15        # slowest imports of the CLI stages
+
+The best wall time of `--repeat` runs is kept per command; `-X importtime`
+lists the modules that dominate the import of each stage's engines.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "interpreter": ["-c", "pass"],
+    "cli --help": ["-m", "src", "--help"],
+    "import polars": ["-c", "import polars"],
+    "import src.pipeline": ["-c", "import src.pipeline"],
+    "import src.prod_cut": ["-c", "import src.prod_cut"],
+    "import src.forecasting + statsmodels": ["-c", "import src.forecasting, statsmodels.tsa.holtwinters"],
+}
+
+# What each CLI stage imports when it runs
+STAGE_IMPORTS = {
+    "baseline": "import src.pipeline",
+    "cut": "import src.pipeline, src.prod_cut",
+    "prep": "import src.dataprep, src.forecasting, statsmodels.tsa.holtwinters",
+}
+
+
+def time_command(args, repeat=5):
+    """Best wall seconds of `python <args>` over `repeat` fresh processes."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, check=True, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def import_profile(statement, top=10):
+    """(cumulative ms, package) of the `top` slowest packages imported by `statement`."""
+    done = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT, check=True,
+                          capture_output=True, text=True)
+    packages = {}
+    for line in done.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        name = name.strip()
+        if "." not in name and not name.startswith("_"):  # a package root, e.g. 'pandas'
+            packages[name] = max(packages.get(name, 0), int(cumulative) / 1000)
+    return sorted(((ms, name) for name, ms in packages.items()), reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start timings of the CLI and engine imports")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="slowest imports listed per stage")
+    args = parser.parse_args(argv)
+
+    for name, command in COMMANDS.items():
+        try:
+            print(f"⏱️ {name:<40} {time_command(command, args.repeat) * 1000:8.0f} ms")
+        except subprocess.CalledProcessError:
+            print(f"⚠️ {name:<40} failed (missing dependency?)")
+    for name, statement in STAGE_IMPORTS.items():
+        try:
+            rows = import_profile(statement, args.top)
+        except subprocess.CalledProcessError:
+            continue
+        print(f"\n📦 {name}: {statement}")
+        for ms, module in rows:
+            print(f"   {ms:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""Time and memory of every pipeline stage on synthetic networks of growing size.
+
+    python -m benchmarks.suite --sizes xs s m --out bench_results.json
+    python -m benchmarks.suite --sizes xs s --baseline benchmarks/baseline.json
+
+Each stage runs `--repeat` times on the same inputs; the best wall time and
+the peak RSS growth over the RSS before the stage are kept. With
+`--shard-workers N` the plan, deployment and truck stages are also timed
+sharded on an N-process pool (src.sharding), to read off the scaling. The
+BOM stages flatten a synthetic multi-level BOM (`make_bom`) and explode the
+plans before / after the cut into daily material needs (src.bom). With
+`--baseline` every (size, stage) is compared against a stored run and
+slowdowns beyond `--tolerance` are flagged as regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import polars as pl
+
+from benchmarks.synthetic import make_bom, make_network
+from src.bom import flatten_bom, material_impact
+from src.deployment_kernel import accurate_deployment_vectorized
+from src.ids import encode_inputs
+from src.incremental import incremental_resimulate
+from src.instrument import stage
+from src.kpi import item_prices, scenario_kpis
+from src.pipeline import build_cut_input, pallet_summary, shipped_by_lane, splice_cut
+from src.prod_cut import apply_production_cut_vectorized
+from src.prod_plan import build_production_plan
+from src.projection import build_risk_projection
+from src.sharding import ShardExecutor, sharded_deployment, sharded_production_plan, sharded_trucks
+from src.transport_truck import simulate_truck_allocation
+
+# Network presets; `assortment` is the share of SKUs each store carries
+SIZES = {
+    "xs": {"n_skus": 150, "n_stores": 5, "horizon": 45},
+    "s": {"n_skus": 1_000, "n_stores": 20, "horizon": 45},
+    "m": {"n_skus": 5_000, "n_stores": 50, "horizon": 60, "assortment": 0.5},
+    "l": {"n_skus": 20_000, "n_stores": 200, "horizon": 90, "assortment": 0.1},
+    "xl": {"n_skus": 50_000, "n_stores": 500, "horizon": 90, "assortment": 0.05},
+}
+
+STAGES = ["encode_ids", "production_plan", "deployment", "pallets", "trucks", "shipped", "projection",
+          "cut_input", "cut", "cut_optimize", "incremental", "kpis", "bom_flatten", "bom_impact"]
+SHARDED_STAGES = ["production_plan_sharded", "deployment_sharded", "trucks_sharded"]
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _stage_calls(inputs, horizon, executor=None):
+    """(stage, thunk) in pipeline order; each thunk feeds the later ones."""
+    state = {}
+    plan, demand = inputs["prod_plan"], inputs["demand_outlook"]
+
+    def deployment():
+        state["deployments"] = accurate_deployment_vectorized(plan, demand, max_days=horizon)
+        return state["deployments"]
+
+    def pallets():
+        state["pallets"] = pallet_summary(state["deployments"], inputs["pal_size_df"])
+        return state["pallets"]
+
+    def trucks():
+        state["trucks"] = simulate_truck_allocation(state["pallets"])
+        return state["trucks"]
+
+    def shipped():
+        state["deployment_outlook"] = shipped_by_lane(state["trucks"])
+        return state["deployment_outlook"]
+
+    def projection():
+        state["projection"] = build_risk_projection(demand, state["deployment_outlook"], inputs["lane_rules"],
+                                                    max_day=horizon)
+        return state["projection"]
+
+    def cut_input():
+        state["cut_input"] = build_cut_input(plan, state["projection"], inputs)
+        return state["cut_input"]
+
+    def cut(method="heuristic"):
+        out = apply_production_cut_vectorized(state["cut_input"].to_pandas(), cut_type="%", cut_value=10.0,
+                                              method=method)
+        state["plan_after"] = splice_cut(plan, pl.from_pandas(out))
+        return out
+
+    def incremental():
+        baseline = {name: state[name] for name in ("deployments", "deployment_outlook", "projection")}
+        state["after"] = incremental_resimulate(baseline, plan, state["plan_after"], inputs, max_days=horizon)
+        return state["after"]["projection"]
+
+    def kpis():
+        return scenario_kpis(state["after"]["projection"], state["plan_after"], state["after"]["deployment_outlook"],
+                             item_prices(inputs["price_df"]), kpi_day=min(30, horizon))
+
+    def bom_flatten():
+        items = plan["item_id"].unique().sort()
+        n = items.len()
+        bom, components = make_bom(items, n_raw=max(200, n // 4), n_pack=max(50, n // 20), n_semi=max(100, n // 2))
+        state["components"] = components
+        state["flat_bom"] = flatten_bom(bom)
+        return bom
+
+    def bom_impact():
+        return material_impact(plan, state["plan_after"], state["flat_bom"], components=state["components"])["daily"]
+
+    sharded = [] if executor is None else [
+        ("production_plan_sharded", lambda: sharded_production_plan(plan, executor=executor)),
+        ("deployment_sharded", lambda: sharded_deployment(plan, demand, max_days=horizon, executor=executor)),
+        ("trucks_sharded", lambda: sharded_trucks(state["pallets"], executor=executor)),
+    ]
+    return [
+        ("encode_ids", lambda: encode_inputs(inputs)[0]["demand_outlook"]),
+        ("production_plan", lambda: build_production_plan(plan)),
+        ("deployment", deployment),
+        ("pallets", pallets),
+        ("trucks", trucks),
+        ("shipped", shipped),
+        ("projection", projection),
+        ("cut_input", cut_input),
+        ("cut", cut),
+        ("cut_optimize", lambda: cut("optimize")),
+        ("incremental", incremental),
+        ("kpis", kpis),
+        ("bom_flatten", bom_flatten),
+        ("bom_impact", bom_impact),
+    ] + sharded
+
+
+def run_size(name, params, stages=STAGES, repeat=3, seed=42, executor=None):
+    """Benchmark rows for one network size."""
+    start = time.perf_counter()
+    inputs = make_network(seed=seed, **params)
+    print(f"🏗️ {name}: {inputs['demand_outlook'].height:,} outlook rows, {inputs['prod_plan'].height:,} plan rows "
+          f"generated in {time.perf_counter() - start:.1f}s")
+
+    rows = []
+    for stage_name, call in _stage_calls(inputs, params["horizon"], executor=executor):
+        # later stages need the earlier ones, so skipped stages still run once
+        selected = stage_name in stages
+        best, peak = None, None
+        for _ in range(repeat if selected else 1):
+            rss_before = _rss_mb()
+            start = time.perf_counter()
+            with stage(f"bench:{stage_name}") as record:
+                out = call()
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+            if record.get("peak_rss_mb") is not None and rss_before is not None:
+                peak = max(peak or 0.0, record["peak_rss_mb"] - rss_before)
+        if not selected:
+            continue
+        rows_out = out.height if isinstance(out, pl.DataFrame) else len(out) if hasattr(out, "__len__") else None
+        rows.append({"size": name, **{key: params.get(key) for key in ("n_skus", "n_stores", "horizon")},
+                     "stage": stage_name, "rows_out": rows_out, "seconds": best, "peak_rss_mb": peak})
+        print(f"   {stage_name:<24} {best:>9.3f}s  {peak or 0:>8.1f} MB")
+    return rows
+
+
+def _meta():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=False).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"commit": commit, "python": sys.version.split()[0], "polars": pl.__version__,
+            "machine": platform.machine(), "processor": platform.processor(), "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def compare(results, baseline, tolerance=0.25, min_seconds=0.01):
+    """Join a run with a baseline run on (size, stage); ratio > 1 is a speed-up.
+
+    A stage is a regression when it is slower by more than `tolerance` and
+    by more than `min_seconds` (sub-10 ms stages are mostly timer noise).
+    """
+    keys = ["size", "stage"]
+    current = pl.DataFrame(results).select(keys + ["seconds", "peak_rss_mb"])
+    base = pl.DataFrame(baseline).select(keys + [pl.col("seconds").alias("base_seconds"),
+                                                 pl.col("peak_rss_mb").alias("base_peak_rss_mb")])
+    return (
+        current.join(base, on=keys, how="inner")
+        .with_columns((pl.col("base_seconds") / pl.col("seconds")).alias("speedup"))
+        .with_columns(((pl.col("seconds") > pl.col("base_seconds") * (1 + tolerance))
+                       & (pl.col("seconds") - pl.col("base_seconds") > min_seconds)).alias("regression"))
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline stage benchmarks on synthetic networks")
+    parser.add_argument("--sizes", nargs="+", default=["xs", "s"], choices=list(SIZES))
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", default=None, help="compare against this stored run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--shard-workers", type=int, default=None, help="also time the sharded stages")
+    args = parser.parse_args(argv)
+
+    results = []
+    executor = ShardExecutor(workers=args.shard_workers) if args.shard_workers else None
+    if executor is not None:
+        executor.warm_up()
+    stages = args.stages + (SHARDED_STAGES if executor is not None else [])
+    try:
+        for name in args.sizes:
+            results += run_size(name, SIZES[name], stages=stages, repeat=args.repeat, seed=args.seed,
+                                executor=executor)
+    finally:
+        if executor is not None:
+            executor.close()
+
+    with open(args.out, "w") as f:
+        json.dump({"meta": _meta(), "sizes": {name: SIZES[name] for name in args.sizes}, "results": results},
+                  f, indent=1)
+    print(f"✅ {len(results)} measurements -> {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report = compare(results, baseline["results"], tolerance=args.tolerance)
+        with pl.Config(tbl_rows=-1):
+            print(report)
+        regressions = report.filter(pl.col("regression"))
+        if regressions.height:
+            print(f"⚠️ {regressions.height} stage(s) slower than baseline by more than {args.tolerance:.0%}")
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
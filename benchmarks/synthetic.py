@@ -0,0 +1,348 @@
+import os
+from datetime import date
+
+import numpy as np
+import polars as pl
+
+from src.ids import PRIORITY_LABELS, decode_ids
+from src.prod_plan import build_production_plan
+
+
+def make_deployment_inputs(n_skus=150, n_stores=5, n_plants=3, horizon=45, seed=42):
+    """Seeded production plan + demand outlook shaped like the notebook outputs.
+
+    Items are assigned round-robin to plants; every plant serves every store
+    with a random 1-5 day transit time.
+    """
+    rng = np.random.default_rng(seed)
+
+    items = [f"ITEM_{i:05d}" for i in range(n_skus)]
+    stores = [f"STORE_{s:03d}" for s in range(n_stores)]
+    plants = [f"PLANT_{p:02d}" for p in range(n_plants)]
+    item_plant = {item: plants[i % n_plants] for i, item in enumerate(items)}
+    transit = rng.integers(1, 6, size=(n_plants, n_stores))
+
+    # --- Demand outlook: one row per (item, store, day) ---
+    n_series = n_skus * n_stores
+    avg = rng.gamma(1.5, 2.0, size=n_series)
+    forecast = np.clip(rng.normal(avg[:, None], avg[:, None] * 0.3, size=(n_series, horizon)), 0, None)
+    sog = np.round(avg * rng.integers(5, 13, size=n_series))
+    projection = sog[:, None] - forecast.cumsum(axis=1)
+    safety_stock = np.round(avg * rng.uniform(0.8, 1.2, size=n_series) * rng.integers(5, 10, size=n_series))
+
+    series_item = np.repeat(np.arange(n_skus), n_stores)
+    series_store = np.tile(np.arange(n_stores), n_skus)
+    series_plant = np.array([plants.index(item_plant[items[i]]) for i in series_item])
+
+    demand_outlook = pl.DataFrame({
+        "item_id": np.repeat(np.array(items)[series_item], horizon),
+        "store_id": np.repeat(np.array(stores)[series_store], horizon),
+        "plant_id": np.repeat(np.array(plants)[series_plant], horizon),
+        "day": np.tile(np.arange(1, horizon + 1), n_series),
+        "forecast_sales": forecast.ravel(),
+        "avg_daily_demand": np.repeat(avg, horizon),
+        "safety_stock_static": np.repeat(safety_stock, horizon),
+        "transit_time_days": np.repeat(transit[series_plant, series_store], horizon),
+        "projection": projection.ravel(),
+    })
+
+    # --- Production plan: one row per (plant, item, day), runs every few days ---
+    plant_demand = avg.reshape(n_skus, n_stores).sum(axis=1)
+    cycle = rng.choice([2, 4, 5, 6, 8], size=n_skus)
+    day = np.arange(1, horizon + 1)
+    runs = ((day[None, :] - 1) % cycle[:, None]) == 0
+    qty = np.where(runs, plant_demand[:, None] * cycle[:, None] * rng.uniform(0.8, 1.3, size=(n_skus, horizon)), 0.0)
+    start_inv = np.where(day[None, :] == 1, plant_demand[:, None] * rng.integers(0, 8, size=(n_skus, 1)), 0.0)
+
+    production_plan = pl.DataFrame({
+        "plant_id": np.repeat([item_plant[item] for item in items], horizon),
+        "item_id": np.repeat(items, horizon),
+        "day": np.tile(day, n_skus),
+        "production_quantity": qty.ravel(),
+        "starting_inventory_plant": start_inv.ravel(),
+        "cycle_days": np.repeat(cycle, horizon),
+    }).sort(["plant_id", "item_id", "day"])
+
+    return production_plan, demand_outlook
+
+
+# --- Full network in the notebook layout (notebooks 01/02 logic) ---
+
+CATEGORIES = ["FOODS", "HOBBIES", "HOUSEHOLD"]
+PALLET_SIZES = {"FOODS": 4, "HOBBIES": 1, "HOUSEHOLD": 2}
+
+# Notebook 01 prod master draws, cycled over the plants
+CYCLES = np.array([2, 4, 5, 6, 8])
+CYCLE_PROBS = [
+    np.array([0.25, 0.22, 0.27, 0.22, 0.04]),
+    np.array([0.32, 0.32, 0.16, 0.16, 0.04]),
+    np.array([0.32, 0.32, 0.22, 0.10, 0.04]),
+]
+MOQ_CHALLENGE = [0.15, 0.05, 0.10]
+BUFFER_DAYS, BUFFER_PROBS = np.array([5, 6, 7, 8, 9, 10, 11, 12]), [0.05, 0.10, 0.15, 0.15, 0.20, 0.20, 0.10, 0.05]
+PLANT_SOG_DAYS, PLANT_SOG_PROBS = np.array([0, 1, 2, 3, 4, 6, 7, 8]), [0.12, 0.08, 0.16, 0.16, 0.14, 0.15, 0.14, 0.05]
+GR_AND_GI, PERIOD_BETWEEN_REVIEWS = 1, 3
+START_DATE = date(2016, 5, 23)
+
+DEMAND_COLUMNS = ["item_id", "store_id", "safety_stock_static", "cat_id", "day", "forecast_sales", "date",
+                  "pallet_size", "plant_id", "transit_time_days", "avg_daily_demand", "safety_stock", "SOG_initial",
+                  "projection", "below_safety_stock_risk", "stock_out_risk", "ss_risk_change", "so_risk_change"]
+
+
+def _labels(prefix, n, width):
+    return [f"{prefix}_{i:0{max(width, len(str(n - 1)))}d}" for i in range(n)]
+
+
+def _date():
+    return (pl.lit(START_DATE) + pl.duration(days=pl.col("day") - 1)).alias("date")
+
+
+def network_registry(n_skus, n_stores, n_plants=3):
+    """Id vocabularies of `make_network` (sorted, code = position; see src.ids)."""
+    registry = {
+        "plant_id": pl.Series("plant_id", _labels("PLANT", n_plants, 2)),
+        "store_id": pl.Series("store_id", _labels("STORE", n_stores, 3)),
+        "item_id": pl.Series("item_id", _labels("ITEM", n_skus, 5)),
+        "cat_id": pl.Series("cat_id", CATEGORIES),
+    }
+    registry["priority"] = pl.Series("priority", PRIORITY_LABELS)
+    return registry
+
+
+def make_network(n_skus=150, n_stores=5, n_plants=3, horizon=45, assortment=1.0, seed=42, coded=False):
+    """Seeded simulation inputs shaped like the notebook artifacts.
+
+    Returns the frames `src.pipeline.load_inputs` returns ('demand_outlook',
+    'lane_rules', 'pal_size_df', 'prod_master', 'price_df', 'prod_plan').
+    Every plant makes one category; items go round-robin to plants. Each
+    store carries a random `assortment` share of the SKUs (at least one
+    store per SKU). Cycle days, MOQ multipliers (with "challenge" items),
+    safety stock, store and plant starting stock follow notebook 01, the
+    production plan is `build_production_plan` on the notebook 02 plant plan.
+
+    With `coded=True` ids are Int32 codes of `network_registry`.
+    """
+    rng = np.random.default_rng(seed)
+    registry = network_registry(n_skus, n_stores, n_plants)
+
+    item_plant = np.arange(n_skus) % n_plants
+    plant_cat = np.arange(n_plants) % len(CATEGORIES)
+    transit = rng.integers(1, 6, size=(n_plants, n_stores))
+    pallet = np.array([PALLET_SIZES[c] for c in CATEGORIES])[plant_cat]
+
+    # --- Assortment: the (item, store) series that exist ---
+    carried = rng.random((n_skus, n_stores)) < assortment
+    carried[np.arange(n_skus), np.arange(n_skus) % n_stores] = True
+    s_item, s_store = np.nonzero(carried)
+    s_item, s_store = s_item.astype(np.int32), s_store.astype(np.int32)
+    s_plant = item_plant[s_item].astype(np.int32)
+    s_transit = transit[s_plant, s_store]
+    n_series = s_item.size
+
+    # --- Store demand outlook (notebook 01 cell 14) ---
+    mu = rng.gamma(1.5, 2.0, size=n_series)
+    forecast = np.clip(rng.normal(mu[:, None], mu[:, None] * 0.3, size=(n_series, horizon)), 0, None)
+    avg = forecast.mean(axis=1)
+    safety_stock = np.round(avg[:, None] * rng.uniform(0.8, 1.2, size=(n_series, horizon))
+                            * (s_transit[:, None] + GR_AND_GI + PERIOD_BETWEEN_REVIEWS))
+    safety_static = safety_stock.mean(axis=1)
+    sog = np.round(avg * rng.choice(BUFFER_DAYS, size=n_series, p=BUFFER_PROBS))
+    projection = sog[:, None] - forecast.cumsum(axis=1)
+    below_ss = np.where(projection < safety_static[:, None], safety_static[:, None] - projection, 0.0)
+    stock_out = np.where(projection < 0, -projection, 0.0)
+    ss_change = np.diff(below_ss, axis=1, prepend=np.nan)
+    so_change = np.diff(stock_out, axis=1, prepend=np.nan)
+
+    day = np.arange(1, horizon + 1)
+
+    def rep(values):
+        # one value per series -> one per (series, day) row
+        return np.repeat(values, horizon)
+
+    demand_outlook = pl.DataFrame({
+        "item_id": rep(s_item),
+        "store_id": rep(s_store),
+        "safety_stock_static": rep(safety_static),
+        "cat_id": rep(plant_cat[s_plant].astype(np.int32)),
+        "day": np.tile(day, n_series),
+        "forecast_sales": forecast.ravel(),
+        "pallet_size": rep(pallet[s_plant]),
+        "plant_id": rep(s_plant),
+        "transit_time_days": rep(s_transit),
+        "avg_daily_demand": rep(avg),
+        "safety_stock": safety_stock.ravel(),
+        "SOG_initial": np.where(np.tile(day, n_series) == 1, rep(sog), 0.0),
+        "projection": projection.ravel(),
+        "below_safety_stock_risk": below_ss.ravel(),
+        "stock_out_risk": stock_out.ravel(),
+        "ss_risk_change": ss_change.ravel(),
+        "so_risk_change": so_change.ravel(),
+    }, nan_to_null=True).with_columns(_date()).select(DEMAND_COLUMNS)
+
+    # --- Plant requirements: shifted back by transit, summed over stores (cells 15-16, nb 02) ---
+    ship_day = np.maximum(day[None, :] - s_transit[:, None], 1)
+    requirement = np.where(so_change > 0, so_change, np.where(ss_change > 0, ss_change, 0.0))
+    plant_demand = (
+        pl.DataFrame({
+            "plant_id": rep(s_plant),
+            "item_id": rep(s_item),
+            "day": ship_day.ravel(),
+            "prod_requirements": requirement.ravel(),
+            "current_stockout_risk": stock_out.ravel(),
+            "current_ss_risk": below_ss.ravel(),
+        })
+        .group_by(["plant_id", "item_id", "day"])
+        .agg([
+            pl.sum("prod_requirements").alias("total_daily_requirement"),
+            pl.max("current_stockout_risk").alias("has_stockout_risk"),
+            pl.max("current_ss_risk").alias("has_ss_risk"),
+        ])
+    )
+
+    # --- Prod master (notebook 01 cell 17) ---
+    item_avg = np.bincount(s_item, weights=avg, minlength=n_skus) / np.bincount(s_item, minlength=n_skus)
+    item_ss = np.zeros(n_skus)
+    np.maximum.at(item_ss, s_item, safety_static)
+    avg_plant = item_avg + item_ss / 45
+    item_plant_idx = item_plant % len(CYCLE_PROBS)
+    cycle_days = np.empty(n_skus, dtype=np.int64)
+    challenge = np.empty(n_skus, dtype=bool)
+    for k, probs in enumerate(CYCLE_PROBS):
+        in_plant = item_plant_idx == k
+        cycle_days[in_plant] = rng.choice(CYCLES, size=in_plant.sum(), p=probs)
+        challenge[in_plant] = rng.random(in_plant.sum()) < MOQ_CHALLENGE[k]
+    base_moq = np.ceil(avg_plant * rng.choice([2, 3, 4], size=n_skus, p=[0.6, 0.3, 0.1]))
+    multiplier = np.where(challenge, rng.choice([6, 7, 8], size=n_skus, p=[0.6, 0.3, 0.1]),
+                          rng.choice([2, 3, 4, 5], size=n_skus, p=[0.4, 0.3, 0.2, 0.1]))
+    item_pallet = pallet[item_plant]
+    moq_units = (np.ceil(np.round(base_moq * multiplier) / item_pallet) * item_pallet).astype(np.int64)
+    prod_master = pl.DataFrame({
+        "item_id": np.arange(n_skus, dtype=np.int32),
+        "plant_id": item_plant.astype(np.int32),
+        "avg_daily_demand_plant": avg_plant,
+        "cycle_days": cycle_days,
+        "MOQ_units": moq_units,
+    })
+
+    # --- Plant plan and production plan (notebook 02 cells 3-4) ---
+    item_sum = np.bincount(s_item, weights=avg, minlength=n_skus)
+    plant_sog = item_sum * rng.choice(PLANT_SOG_DAYS, size=n_skus, p=PLANT_SOG_PROBS) * rng.uniform(0.9, 1.1, n_skus)
+    plant_plan = (
+        plant_demand
+        .join(prod_master, on=["plant_id", "item_id"])
+        .join(pl.DataFrame({"item_id": np.arange(n_skus, dtype=np.int32), "plant_sog": plant_sog}), on="item_id")
+        .with_columns([
+            _date(),
+            pl.when(pl.col("day") == 1)
+            .then(pl.col("plant_sog"))
+            .otherwise(0.0)
+            .alias("starting_inventory_plant"),
+            pl.when(pl.col("has_stockout_risk") > 0).then(1)
+            .when(pl.col("has_ss_risk") > 0).then(2)
+            .otherwise(3)
+            .alias("priority"),
+        ])
+        .drop("plant_sog")
+        .sort(["plant_id", "item_id", "day"])
+    )
+    prod_plan = build_production_plan(plant_plan)
+
+    # --- Static tables ---
+    plants = np.arange(n_plants, dtype=np.int32)
+    lane_plant, lane_store = np.repeat(plants, n_stores), np.tile(np.arange(n_stores, dtype=np.int32), n_plants)
+    inputs = {
+        "pal_size_df": pl.DataFrame({"cat_id": plant_cat.astype(np.int32), "plant_id": plants, "pallet_size": pallet}),
+        "demand_outlook": demand_outlook,
+        "lane_rules": pl.DataFrame({
+            "plant_id": lane_plant,
+            "cat_id": plant_cat[lane_plant].astype(np.int32),
+            "store_id": lane_store,
+            "transit_time_days": transit.ravel(),
+        }),
+        "prod_master": prod_master,
+        "price_df": pl.DataFrame({
+            "store_id": s_store,
+            "item_id": s_item,
+            "max_week": np.full(n_series, 11621),
+            "sell_price": np.round(rng.uniform(1, 20, n_series), 2),
+        }),
+        "prod_plan": prod_plan,
+    }
+    if coded:
+        return inputs
+    return {name: decode_ids(frame, registry) for name, frame in inputs.items()}
+
+
+def write_network(inputs, root):
+    """Write `make_network` frames as the notebook CSVs under `root`."""
+    from src.pipeline import INPUT_FILES
+
+    for name, rel_path in INPUT_FILES.items():
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        inputs[name].write_csv(path)
+
+
+def make_bom(items, n_raw=200, n_pack=50, n_semi=100, semi_levels=2, seed=42):
+    """Seeded multi-level BOM for `items` (see src.bom).
+
+    Every finished item uses 1-3 semi-finished goods and 1-2 pack materials;
+    the semis are spread over `semi_levels` levels, each using 1-2 semis of
+    the level below (none on the last) and 2-4 raw materials.
+
+    Returns
+    -------
+    (pl.DataFrame, pl.DataFrame)
+        BOM lines ('parent_id', 'component_id', 'qty_per') and the component
+        master ('component_id', 'component_type', 'unit_cost') of the raw,
+        pack and semi components.
+    """
+    if semi_levels < 1:
+        raise ValueError("make_bom needs at least one level of semi-finished goods")
+    rng = np.random.default_rng(seed)
+    items = list(items)
+    raws, packs, semis = _labels("RAW", n_raw, 5), _labels("PACK", n_pack, 4), _labels("SEMI", n_semi, 5)
+    semi_level = np.arange(n_semi) % semi_levels
+    by_level = [[semis[i] for i in np.flatnonzero(semi_level == k)] for k in range(semi_levels)]
+
+    parts = []
+
+    def use(parents, pool, low, high, qty_low, qty_high):
+        # 'low'-'high' components per parent, drawn with replacement (repeats add up in src.bom)
+        if not len(parents) or not len(pool):
+            return
+        n = rng.integers(low, high + 1, size=len(parents))
+        parts.append(pl.DataFrame({
+            "parent_id": np.repeat(np.asarray(parents, dtype=object), n),
+            "component_id": np.asarray(pool, dtype=object)[rng.integers(0, len(pool), size=n.sum())],
+            "qty_per": np.round(rng.uniform(qty_low, qty_high, size=n.sum()), 3),
+        }, schema={"parent_id": pl.String, "component_id": pl.String, "qty_per": pl.Float64}))
+
+    # --- Finished items: semis of the first level + pack ---
+    use(items, by_level[0], 1, 3, 0.2, 2.0)
+    use(items, packs, 1, 2, 1.0, 1.0)
+    # --- Semis: semis of the next level + raw ---
+    for k, level in enumerate(by_level):
+        if k + 1 < len(by_level):
+            use(level, by_level[k + 1], 1, 2, 0.1, 1.5)
+        use(level, raws, 2, 4, 0.05, 3.0)
+    # --- Every semi has a parent (otherwise it would be a finished item) ---
+    used = set(pl.concat(parts)["component_id"].to_list())
+    for k, level in enumerate(by_level):
+        parents = items if k == 0 else by_level[k - 1]
+        orphans = [semi for semi in level if semi not in used]
+        if orphans and parents:
+            parts.append(pl.DataFrame({
+                "parent_id": np.asarray(parents, dtype=object)[rng.integers(0, len(parents), size=len(orphans))],
+                "component_id": orphans,
+                "qty_per": np.round(rng.uniform(0.1, 1.5, size=len(orphans)), 3),
+            }, schema={"parent_id": pl.String, "component_id": pl.String, "qty_per": pl.Float64}))
+
+    bom = pl.concat(parts)
+    components = pl.DataFrame({
+        "component_id": raws + packs + semis,
+        "component_type": ["raw"] * n_raw + ["pack"] * n_pack + ["semi"] * n_semi,
+        "unit_cost": np.round(np.concatenate([rng.uniform(0.05, 2.0, n_raw), rng.uniform(0.02, 0.5, n_pack),
+                                              rng.uniform(0.5, 5.0, n_semi)]), 3),
+    })
+    return bom, components
@@ -0,0 +1,7 @@
+import time
+
+_STARTED = time.perf_counter()
+
+from src.cli import main  # noqa: E402  (stdlib only; stages import their engines)
+
+main(started=_STARTED)
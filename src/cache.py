@@ -0,0 +1,241 @@
+"""Content-addressed on-disk cache for the simulation stages.
+
+A stage call is keyed by the stage name, the source of every `src/` module
+(plus the module defining the stage function, if it lives elsewhere), the
+content of every input frame and the parameters (max_days,
+truck_capacity, ...). Any engine edit - a helper, a constant such as
+HEALTH_WEIGHTS, a kernel under a wrapper - therefore invalidates the
+stored results. Polars outputs are stored as Arrow IPC, anything else
+is pickled. The cache directory is bounded by `max_bytes`; the least
+recently used entries are evicted first.
+
+    deployments = cached_call("deployment", accurate_deployment_vectorized,
+                              plan, demand_outlook, max_days=30)
+    print(cache_report())
+"""
+import functools
+import glob
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import tempfile
+import time
+
+import polars as pl
+
+from src.instrument import count, is_pandas
+
+CACHE_DIR = os.environ.get("SIM_CACHE_DIR", ".stage_cache")
+MAX_BYTES = int(os.environ.get("SIM_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+# stage -> {"hits", "misses", "compute_seconds", "saved_seconds"} for this process
+_STATS = {}
+
+
+def _update(digest, value):
+    if isinstance(value, pl.LazyFrame):
+        value = value.collect()
+    if isinstance(value, pl.DataFrame):
+        # row hashes follow the values only, not chunking or validity buffers
+        digest.update(b"pl")
+        digest.update(repr(list(value.schema.items())).encode())
+        if value.width:
+            digest.update(value.hash_rows(seed=0).to_numpy().tobytes())
+    elif is_pandas(value):
+        import pandas as pd
+
+        digest.update(b"pd")
+        digest.update(repr(list(zip(value.columns, map(str, value.dtypes)))).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value, key=repr):
+            digest.update(repr(key).encode())
+            _update(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update(digest, item)
+    else:
+        digest.update(repr(value).encode())
+
+
+@functools.lru_cache(maxsize=None)
+def _source_digest(extra_path=None):
+    # every src/ module, read once per process; `extra_path` is a stage module outside src/
+    digest = hashlib.blake2b(digest_size=20)
+    paths = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py")))
+    for path in paths + ([extra_path] if extra_path and extra_path not in paths else []):
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.digest()
+
+
+def stage_key(stage, fn, args=(), kwargs=None):
+    """Hex digest of a stage call: stage name, engine sources, function, inputs and params."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(stage.encode())
+    try:
+        path = os.path.abspath(inspect.getsourcefile(fn))
+    except (OSError, TypeError):
+        path = None
+    if path and not os.path.isfile(path):
+        path = None  # defined in a REPL / `python -c`: no source file to hash
+    digest.update(_source_digest(path))
+    digest.update(f"{getattr(fn, '__module__', '')}.{getattr(fn, '__qualname__', repr(fn))}".encode())
+    _update(digest, list(args))
+    _update(digest, kwargs or {})
+    return digest.hexdigest()
+
+
+def _is_key(stem):
+    # 40 hex digits: a `stage_key` or `src.ingest.history_key` digest
+    return len(stem) == 40 and all(c in "0123456789abcdef" for c in stem)
+
+
+def _entries(cache_dir):
+    # (data path, meta path, bytes, last use) for every stored result: '<stage>/<key>.arrow|.pkl'
+    # next to its '<key>.json' meta, and the 'm5_history/<key>.arrow' files of `src.ingest`.
+    # Nothing else under `cache_dir` is counted or removed.
+    entries = []
+    if not os.path.isdir(cache_dir):
+        return entries
+    for stage in os.listdir(cache_dir):
+        folder = os.path.join(cache_dir, stage)
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            stem, ext = os.path.splitext(name)
+            if ext not in (".arrow", ".pkl") or not _is_key(stem):
+                continue
+            path = os.path.join(folder, name)
+            meta = os.path.join(folder, stem + ".json")
+            if os.path.exists(meta):
+                size = os.path.getsize(path) + os.path.getsize(meta)
+            elif stage == "m5_history" and ext == ".arrow":
+                meta, size = None, os.path.getsize(path)
+            else:
+                continue
+            entries.append((path, meta, size, os.path.getmtime(path)))
+    return entries
+
+
+def evict(cache_dir=None, max_bytes=None):
+    """Drop least recently used entries until the cache fits in `max_bytes`.
+
+    Only files the cache wrote are considered, so a `cache_dir` shared with
+    other files never loses them.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    entries = sorted(_entries(cache_dir), key=lambda entry: entry[3])
+    total = sum(entry[2] for entry in entries)
+    removed = 0
+    for path, meta, size, _ in entries:
+        if total <= max_bytes:
+            break
+        for file in (path, meta):
+            if file and os.path.exists(file):
+                os.remove(file)
+        total -= size
+        removed += 1
+    return removed
+
+
+def _atomic_write(path, write):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def cached_call(stage, fn, *args, cache_dir=None, max_bytes=None, **kwargs):
+    """Return `fn(*args, **kwargs)`, reusing a stored result for identical inputs.
+
+    Parameters
+    ----------
+    stage : str
+        Stage name used for the folder and the report ('deployment', 'trucks', ...).
+    cache_dir : str | None
+        Defaults to $SIM_CACHE_DIR or '.stage_cache'.
+    max_bytes : int | None
+        Size bound of the whole cache directory, defaults to
+        $SIM_CACHE_MAX_BYTES or 2 GiB.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    stats = _STATS.setdefault(stage, {"hits": 0, "misses": 0, "compute_seconds": 0.0, "saved_seconds": 0.0})
+    key = stage_key(stage, fn, args, kwargs)
+    folder = os.path.join(cache_dir, stage)
+    meta_path = os.path.join(folder, key + ".json")
+
+    # --- Hit: load and refresh the LRU timestamp ---
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        data_path = os.path.join(folder, key + meta["ext"])
+        if os.path.exists(data_path):
+            start = time.perf_counter()
+            if meta["ext"] == ".arrow":
+                result = pl.read_ipc(data_path, memory_map=False)
+            else:
+                with open(data_path, "rb") as f:
+                    result = pickle.load(f)
+            os.utime(data_path)
+            count(cache_hits=1)
+            stats["hits"] += 1
+            stats["saved_seconds"] += max(meta["seconds"] - (time.perf_counter() - start), 0.0)
+            return result
+
+    # --- Miss: compute, store, evict ---
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    stats["misses"] += 1
+    count(cache_misses=1)
+    stats["compute_seconds"] += seconds
+
+    os.makedirs(folder, exist_ok=True)
+    if isinstance(result, pl.DataFrame):
+        ext = ".arrow"
+        _atomic_write(os.path.join(folder, key + ext),
+                      lambda tmp: result.write_ipc(tmp, compression="uncompressed"))
+    else:
+        ext = ".pkl"
+
+        def write_pickle(tmp):
+            with open(tmp, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        _atomic_write(os.path.join(folder, key + ext), write_pickle)
+
+    def write_meta(tmp):
+        with open(tmp, "w") as f:
+            json.dump({"stage": stage, "ext": ext, "seconds": seconds}, f)
+    _atomic_write(meta_path, write_meta)
+
+    evict(cache_dir, max_bytes)
+    return result
+
+
+def cache_report(reset=False):
+    """Hits, misses and time saved per stage for this process."""
+    rows = [
+        {"stage": stage, **stats,
+         "hit_rate": stats["hits"] / (stats["hits"] + stats["misses"]) if stats["hits"] + stats["misses"] else 0.0}
+        for stage, stats in _STATS.items()
+    ]
+    if reset:
+        _STATS.clear()
+    return pl.DataFrame(rows, schema={"stage": pl.String, "hits": pl.Int64, "misses": pl.Int64,
+                                      "compute_seconds": pl.Float64, "saved_seconds": pl.Float64,
+                                      "hit_rate": pl.Float64})
+
+
+def clear_cache(cache_dir=None):
+    """Remove every stored stage result (and nothing else in `cache_dir`)."""
+    return evict(cache_dir, max_bytes=-1)
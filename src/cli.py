@@ -0,0 +1,372 @@
+"""Headless end-to-end run: prep -> plan -> baseline -> cut -> materials -> report.
+
+    python -m src --config pipeline.toml
+    python -m src --stages baseline cut report --set cut.cut_value=15 --set cut.plants=PLANT_CA
+
+Stages exchange the notebook artifacts on disk ('Symulation data/*.csv',
+'Data/*.csv' under `root`), so any suffix of the chain can run on its own,
+e.g. a nightly re-plan from yesterday's prepared inputs:
+
+    prep      M5 history -> forecast -> demand outlook, requirements, prod master (01)
+    plan      requirements + prod master -> Prod_Plan_Before (02)
+    baseline  deployment -> trucks -> projection of the uncut plan up to `kpi_day` (02 / 03)
+    cut       production cut -> re-simulation up to `kpi_day` (03)
+    materials plans before / after -> raw and pack material impact (src.bom; needs `materials.bom`)
+    report    before / after dashboard, optional plot (03)
+
+This module only imports the standard library at load time; every stage
+imports its engines when it runs (statsmodels only in prep, pandas only in
+cut, matplotlib / seaborn only for the plot). The time from process start
+to the first stage is printed and logged as the 'startup' run-log record.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+STAGES = ["prep", "plan", "baseline", "cut", "materials", "report"]
+
+DEFAULT_CONFIG = {
+    "root": ".",                     # project root holding 'Symulation data/' and 'Data/'
+    "m5_dir": "Input M5",            # relative to root
+    "stages": STAGES,
+    "cache_dir": None,               # memoize the simulation stages (see src.cache)
+    "run_log": None,                 # .json or .csv
+    "prep": {"stores": ["CA_1", "CA_2", "CA_3", "TX_1", "TX_2"], "sample_items": 150, "history_days": 365,
+             "horizon": 45, "seasonal_periods": 7, "seed": 42, "workers": None},
+    "plan": {"buildup": 1.15},
+    "cut": {"cut_type": "%", "cut_value": 10.0, "plants": "ALL", "days": 30, "method": "heuristic"},
+    "simulate": {"kpi_day": 30, "truck_capacity": 34.0, "workers": None},  # workers > 1: src.sharding
+    "materials": {"bom": None, "components": None, "out": "Data/Material_Impact.csv", "daily": None},
+    "report": {"kpis": "Data/Cut_KPIs.csv", "plot": None},
+}
+
+OUTPUT_FILES = {
+    "plan_before": "Data/Prod_Plan_Before.csv",
+    "deployment_before": "Data/Deployment_Before.csv",
+    "projection_before": "Data/Risk_Projection_Before.csv",
+    "plan_after": "Data/Prod_Plan_After.csv",
+    "deployment_after": "Data/Deployment_After.csv",
+    "projection_after": "Data/Risk_Projection_After.csv",
+}
+
+
+def process_age():
+    """Seconds since this process started (Linux), else None."""
+    try:
+        with open("/proc/self/stat") as f:
+            started = int(f.read().rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime") as f:
+            return float(f.read().split()[0]) - started
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def load_config(path=None, overrides=()):
+    """DEFAULT_CONFIG updated with a TOML / JSON file and 'section.key=value' overrides."""
+    config = {key: dict(value) if isinstance(value, dict) else value for key, value in DEFAULT_CONFIG.items()}
+    loaded = {}
+    if path:
+        if path.endswith(".toml"):
+            import tomllib
+
+            with open(path, "rb") as f:
+                loaded = tomllib.load(f)
+        else:
+            with open(path) as f:
+                loaded = json.load(f)
+    for item in overrides:
+        key, sep, raw = item.partition("=")
+        if not sep:
+            raise ValueError(f"Override {item!r} must look like section.key=value")
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = raw
+        section, _, name = key.partition(".")
+        if name:
+            loaded.setdefault(section, {})[name] = value
+        else:
+            loaded[section] = value
+
+    for key, value in loaded.items():
+        if key not in config:
+            raise ValueError(f"Unknown config key {key!r}, expected {list(DEFAULT_CONFIG)}")
+        if isinstance(config[key], dict):
+            unknown = set(value) - set(config[key])
+            if unknown:
+                raise ValueError(f"Unknown [{key}] keys {sorted(unknown)}, expected {list(config[key])}")
+            config[key].update(value)
+        else:
+            config[key] = value
+    unknown = set(config["stages"]) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages {sorted(unknown)}, expected {STAGES}")
+    return config
+
+
+def _path(config, name):
+    return os.path.join(config["root"], OUTPUT_FILES.get(name, name))
+
+
+def _inputs(config, state):
+    if "inputs" not in state:
+        from src.pipeline import load_inputs
+
+        state["inputs"] = load_inputs(config["root"])
+    return state["inputs"]
+
+
+def _executor(config, state):
+    # one shard pool for the whole run, when configured
+    workers = config["simulate"]["workers"]
+    if not workers or workers < 2:
+        return None
+    if "executor" not in state:
+        from src.sharding import ShardExecutor
+
+        state["executor"] = ShardExecutor(workers=workers)
+    return state["executor"]
+
+
+# --- Stages ---
+
+def run_prep(config, state):
+    from src.dataprep import prepare_inputs, write_inputs
+
+    prep = config["prep"]
+    frames = prepare_inputs(os.path.join(config["root"], config["m5_dir"]), stores=prep["stores"],
+                            sample_items=prep["sample_items"], history_days=prep["history_days"],
+                            horizon=prep["horizon"], seasonal_periods=prep["seasonal_periods"], seed=prep["seed"],
+                            max_workers=prep["workers"], cache_dir=config["cache_dir"])
+    folder = write_inputs(frames, config["root"])
+    state["prep"] = frames
+    return f"{frames['demand_outlook'].height} outlook rows -> {folder}"
+
+
+def run_plan(config, state):
+    import polars as pl
+
+    from src.dataprep import build_plant_plan
+    from src.instrument import instrumented
+    from src.prod_plan import build_production_plan
+
+    if "prep" in state:
+        prod_req, prod_master = state["prep"]["prod_req"], state["prep"]["prod_master"]
+    else:
+        folder = os.path.join(config["root"], "Symulation data")
+        prod_req = pl.read_csv(os.path.join(folder, "Prod_req_df.csv"))
+        prod_master = pl.read_csv(os.path.join(folder, "prod_master.csv"))
+    executor = _executor(config, state)
+    if executor is not None:
+        from src.sharding import sharded_production_plan
+
+        plan_fn, shards = sharded_production_plan, {"executor": executor}
+    else:
+        plan_fn, shards = build_production_plan, {}
+    plan = (
+        instrumented("production_plan", plan_fn, build_plant_plan(prod_req, prod_master),
+                     buildup=config["plan"]["buildup"], **shards)
+        .sort(["plant_id", "item_id", "day"])
+    )
+    os.makedirs(os.path.dirname(_path(config, "plan_before")), exist_ok=True)
+    plan.write_csv(_path(config, "plan_before"))
+    state.pop("inputs", None)  # the baseline must read the new plan
+    return f"{plan.height} plan rows -> {_path(config, 'plan_before')}"
+
+
+def run_baseline(config, state):
+    from src.pipeline import prepare_baseline, simulate_plan
+
+    inputs = _inputs(config, state)
+    simulate = config["simulate"]
+    # full outlook for the cut input; the 'before' frames use the same window as the cut (see sweep.prepare_shared)
+    state["baseline"] = prepare_baseline(inputs, truck_capacity=simulate["truck_capacity"],
+                                         cache_dir=config["cache_dir"], executor=_executor(config, state))
+    before = simulate_plan(inputs["prod_plan"], inputs, max_days=simulate["kpi_day"],
+                           truck_capacity=simulate["truck_capacity"], cache_dir=config["cache_dir"],
+                           executor=_executor(config, state))
+    before["deployment_outlook"].write_csv(_path(config, "deployment_before"))
+    before["projection"].write_csv(_path(config, "projection_before"))
+    return f"{before['deployment_outlook'].height} lane-days shipped, {before['projection'].height} projection rows"
+
+
+def run_cut(config, state):
+    from src.pipeline import prepare_baseline, run_cut_scenario
+
+    inputs = _inputs(config, state)
+    simulate, cut = config["simulate"], config["cut"]
+    if "baseline" not in state:
+        state["baseline"] = prepare_baseline(inputs, truck_capacity=simulate["truck_capacity"],
+                                             cache_dir=config["cache_dir"], executor=_executor(config, state))
+    plants = cut["plants"]
+    plan_after, sim = run_cut_scenario(
+        state["baseline"]["cut_input"], inputs["prod_plan"], inputs,
+        cut_type=cut["cut_type"],
+        cut_value=float(cut["cut_value"]),
+        plant_filter=None if plants in (None, "ALL", []) else plants,
+        horizon_days=list(range(1, int(cut["days"]) + 1)),
+        max_days=simulate["kpi_day"],
+        truck_capacity=simulate["truck_capacity"],
+        method=cut["method"],
+        executor=_executor(config, state),
+    )
+    plan_after.write_csv(_path(config, "plan_after"))
+    sim["deployment_outlook"].write_csv(_path(config, "deployment_after"))
+    sim["projection"].write_csv(_path(config, "projection_after"))
+    saved = inputs["prod_plan"]["production_quantity"].sum() - plan_after["production_quantity"].sum()
+    return f"{saved:,.0f} units cut ({cut['cut_type']} {cut['cut_value']}, plants {plants or 'ALL'})"
+
+
+def run_materials(config, state):
+    materials = config["materials"]
+    if not materials["bom"]:
+        return "skipped (no materials.bom)"
+
+    import polars as pl
+
+    from src.bom import flatten_bom, load_bom, material_impact
+
+    flat = flatten_bom(load_bom(_path(config, materials["bom"])))
+    components = pl.read_csv(_path(config, materials["components"])) if materials["components"] else None
+    impact = material_impact(pl.read_csv(_path(config, "plan_before")), pl.read_csv(_path(config, "plan_after")), flat,
+                             components=components)
+    impact["summary"].write_csv(_path(config, materials["out"]))
+    if materials["daily"]:
+        impact["daily"].write_csv(_path(config, materials["daily"]))
+    summary = impact["summary"]
+    value = f", {summary['delta_value'].sum():,.0f} $" if "delta_value" in summary.columns else ""
+    return (f"{summary.height} components over {flat['depth']} BOM levels, "
+            f"{summary['delta'].sum():,.0f} units{value} -> {materials['out']}")
+
+
+def run_report(config, state):
+    import polars as pl
+
+    from src.kpi import item_prices, scenario_kpis
+    from src.sweep import baseline_deltas
+
+    simulate = config["simulate"]
+    read = {name: pl.read_csv(_path(config, name)) for name in OUTPUT_FILES}
+    prices = item_prices(_inputs(config, state)["price_df"])
+    kpis = {
+        version: scenario_kpis(read[f"projection_{version}"], read[f"plan_{version}"],
+                               read[f"deployment_{version}"], prices, kpi_day=simulate["kpi_day"],
+                               truck_capacity=simulate["truck_capacity"])
+        for version in ("before", "after")
+    }
+    dashboard = (
+        pl.DataFrame([{"version": "after", **kpis["after"]}])
+        .with_columns(baseline_deltas(kpis["before"]))
+    )
+    dashboard = pl.concat([pl.DataFrame([{"version": "before", **kpis["before"]}]), dashboard], how="diagonal")
+    if config["report"]["kpis"]:
+        dashboard.write_csv(_path(config, config["report"]["kpis"]))
+    with pl.Config(tbl_rows=-1, tbl_cols=-1, tbl_width_chars=160):
+        print(dashboard.transpose(include_header=True, header_name="kpi", column_names="version"))
+    if config["report"]["plot"]:
+        plot_risk_evolution(read["projection_before"], read["projection_after"],
+                            _path(config, config["report"]["plot"]), kpi_day=simulate["kpi_day"])
+    return f"day-{simulate['kpi_day']} KPIs -> {config['report']['kpis'] or 'stdout'}"
+
+
+def plot_risk_evolution(before, after, path, kpi_day=30):
+    """Notebook 03 chart: mean SS / OOS risk projection per day, before vs after the cut."""
+    import polars as pl
+
+    import matplotlib
+    matplotlib.use("Agg")  # headless
+    import matplotlib.pyplot as plt
+
+    try:
+        import seaborn as sns
+        sns.set_theme(style="whitegrid", context="talk")
+    except ImportError:
+        pass
+
+    colors = {"Before Cut": "#9E9E9E", "After Cut": "#00796B"}
+    fig, axes = plt.subplots(2, 1, figsize=(12, 12))
+    for version, frame in (("Before Cut", before), ("After Cut", after)):
+        daily = (
+            frame.filter(pl.col("day") <= kpi_day)
+            .group_by("day").agg(pl.col("SS_risk_projection").mean(), pl.col("OOS_risk_projection").mean())
+            .sort("day")
+        )
+        for ax, column in zip(axes, ("SS_risk_projection", "OOS_risk_projection")):
+            ax.plot(daily["day"], daily[column], label=version, color=colors[version], linewidth=3.5, marker="o",
+                    markersize=8)
+    for ax, title, label in zip(axes, ("Safety Stock Risk Projection", "Out-of-Stock Risk Projection"),
+                                ("SS Risk", "OOS Risk")):
+        ax.set_title(title, weight="bold", fontsize=14)
+        ax.set_ylabel(label)
+        ax.set_xlabel("Day")
+        ax.legend(title="Version")
+    fig.suptitle("Risk Projection Evolution: Before vs After Production Cut", fontsize=14, weight="bold", y=1.02)
+    fig.tight_layout()
+    fig.savefig(path, dpi=300, bbox_inches="tight")
+    plt.close(fig)
+    print(f"📊 Plot -> {path}")
+    return path
+
+
+STAGE_FUNCTIONS = {"prep": run_prep, "plan": run_plan, "baseline": run_baseline, "cut": run_cut,
+                   "materials": run_materials, "report": run_report}
+
+
+def run_pipeline(config, started=None):
+    """Run the configured stages in chain order; returns {stage: seconds}."""
+    from src.instrument import extend_run_log, stage, write_run_log
+
+    age = process_age()
+    startup = age if age is not None else (time.perf_counter() - started if started is not None else None)
+    if startup is not None:
+        print(f"⏱️ Startup {startup * 1000:.0f} ms ({len(sys.modules)} modules loaded)")
+        extend_run_log([{"stage": "startup", "start": time.time() - startup, "seconds": startup,
+                         "counters": json.dumps({"modules": len(sys.modules)})}])
+
+    state, seconds = {}, {}
+    try:
+        for name in (name for name in STAGES if name in config["stages"]):
+            start = time.perf_counter()
+            with stage(f"cli:{name}"):
+                summary = STAGE_FUNCTIONS[name](config, state)
+            seconds[name] = time.perf_counter() - start
+            print(f"✅ {name}: {summary} ({seconds[name]:.1f}s)")
+    finally:
+        if "executor" in state:
+            state["executor"].close()
+
+    if config["run_log"]:
+        write_run_log(config["run_log"])
+        print(f"🧾 Run log -> {config['run_log']}")
+    return seconds
+
+
+def main(argv=None, started=None):
+    parser = argparse.ArgumentParser(prog="python -m src", description="Run the planning chain end to end")
+    parser.add_argument("--config", default=None, help="TOML or JSON file (see DEFAULT_CONFIG in src/cli.py)")
+    parser.add_argument("--root", default=None, help="project root, overrides the config")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=None, help="run only these stages")
+    parser.add_argument("--set", action="append", default=[], metavar="SECTION.KEY=VALUE",
+                        help="override one config value (JSON literal or plain string)")
+    parser.add_argument("--cache-dir", default=None, help="memoize the simulation stages in this directory")
+    parser.add_argument("--run-log", default=None, help="write per-stage timings and counters (.json or .csv)")
+    parser.add_argument("--show-config", action="store_true", help="print the resolved config and exit")
+    args = parser.parse_args(argv)
+
+    overrides = list(args.set)
+    for key, value in (("root", args.root), ("cache_dir", args.cache_dir), ("run_log", args.run_log)):
+        if value is not None:
+            overrides.append(f"{key}={json.dumps(value)}")
+    if args.stages:
+        overrides.append(f"stages={json.dumps(args.stages)}")
+    config = load_config(args.config, overrides)
+    if args.show_config:
+        print(json.dumps(config, indent=1))
+        return config
+
+    start = time.perf_counter()
+    seconds = run_pipeline(config, started=started)
+    print(f"🏁 {len(seconds)} stages in {time.perf_counter() - start:.1f}s")
+    return seconds
@@ -0,0 +1,424 @@
+"""Per-SKU cut-response curves for instant target-cut answers.
+
+    curves = build_cut_curves(inputs["prod_plan"], inputs, horizon_days=30, kpi_day=30)
+    write_curves(curves, "cut_curves.arrow")
+
+    answer = query_cut(curves, cut_type="%", cut_value=10, plant_filter="PLANT_CA")
+    answer["summary"]          # predicted cut, SS / OOS units and $ loss
+    plan_after, kpis = confirm_cut(answer["selection"], inputs["prod_plan"], inputs)   # full simulation
+
+Each (plant, item) is cut along a ladder of levels (share of its production
+in days 1..`horizon_days`). A level shrinks the SKU's latest runs down to
+MOQ first, then drops whole runs from the latest backwards; no run is added
+or moved, so the cycle_days spacing of the plan holds. Every level is
+simulated once for all SKUs at the same time (deployment -> trucks ->
+projection), and the day-`kpi_day` SS / OOS risk of each SKU against the
+uncut plan becomes its curve. Truck sharing between SKUs is therefore
+taken at "all SKUs on the same level", which is what makes the answers
+approximate; `confirm_cut` re-simulates the chosen mix.
+
+A query picks one level per SKU so that the cut units reach the target at
+the lowest $ loss: "greedy" walks the segments of every SKU's lower convex
+hull by increasing $ per unit, "knapsack" solves the multiple-choice
+knapsack over all levels on a unit grid and keeps the greedy mix instead
+when the grid rounding makes it dearer.
+
+MOQ is a floor, not a multiple: a shrunk run keeps at least its MOQ but
+can end anywhere above it. The plan's runs are MOQ multiples times the
+build-up factor, so they sit on no common k x MOQ grid, and the MILP
+allocator (`src.cut_optimizer`) makes the same adaptation.
+"""
+import argparse
+import time
+
+import numpy as np
+import polars as pl
+
+from src.instrument import stage
+
+LEVELS = (0.0, 0.05, 0.10, 0.15, 0.20, 0.30, 0.40, 0.50, 0.75, 1.0)
+
+SKU_KEYS = ["plant_id", "item_id"]
+
+CURVE_COLUMNS = SKU_KEYS + ["level", "cut_pct", "scope_units", "cut_units", "ss_loss_units", "oos_loss_units",
+                            "ss_loss_dollar", "oos_loss_dollar", "loss_dollar", "on_hull"]
+
+_UNIT = 0.1  # production quantities are kept on a 0.1-unit grid
+
+
+def cut_sku_plan(plan, cut_pct, horizon_days=30):
+    """Cut every (plant, item) by `cut_pct` of its production in days 1..horizon_days.
+
+    `cut_pct` is one share (0..1) for all SKUs or a frame of
+    ['plant_id','item_id','cut_pct']; missing SKUs are not cut. Runs are
+    shrunk to MOQ from the latest day backwards, then dropped whole from
+    the latest day backwards until the cut is reached (the last drop can
+    overshoot by less than one MOQ). MOQ is treated as the minimum run
+    size: a shrunk run is not rounded to a multiple of it.
+    """
+    columns = plan.columns
+    if isinstance(cut_pct, pl.DataFrame):
+        plan = plan.join(cut_pct.select(SKU_KEYS + ["cut_pct"]), on=SKU_KEYS, how="left", maintain_order="left")
+        share = pl.col("cut_pct").fill_null(0.0)
+    else:
+        share = pl.lit(float(cut_pct))
+
+    in_scope = (pl.col("day") >= 1) & (pl.col("day") <= horizon_days) & (pl.col("production_quantity") > 0)
+    q = pl.when(in_scope).then(pl.col("production_quantity")).otherwise(0.0)
+    out = (
+        plan.with_row_index("_row")
+        .with_columns([q.alias("_q"), share.alias("_share")])
+        .sort(SKU_KEYS + [pl.col("day")], descending=[False, False, True], maintain_order=True)
+        .with_columns((pl.col("_q").sum().over(SKU_KEYS) * pl.col("_share")).alias("_target"))
+        # --- Step 1: shrink runs to MOQ, latest first ---
+        .with_columns((pl.col("_q") - pl.col("MOQ_units")).clip(lower_bound=0).alias("_room"))
+        .with_columns((pl.col("_room").cum_sum().over(SKU_KEYS) - pl.col("_room")).alias("_before"))
+        .with_columns(
+            pl.min_horizontal(pl.col("_room"), (pl.col("_target") - pl.col("_before")).clip(lower_bound=0))
+            .alias("_shrink")
+        )
+        .with_columns([
+            (pl.col("_q") - pl.col("_shrink")).alias("_q"),
+            (pl.col("_target") - pl.col("_room").sum().over(SKU_KEYS)).clip(lower_bound=0).alias("_left"),
+        ])
+        # --- Step 2: drop whole runs, latest first, while cut is missing ---
+        .with_columns((pl.col("_q").cum_sum().over(SKU_KEYS) - pl.col("_q")).alias("_before"))
+        .with_columns(
+            pl.when((pl.col("_q") > 0) & (pl.col("_before") < pl.col("_left"))).then(0.0).otherwise(pl.col("_q"))
+            .alias("_q")
+        )
+        .with_columns(
+            pl.when(in_scope)
+            .then(((pl.col("_q") / _UNIT).round() * _UNIT).round(3))
+            .otherwise(pl.col("production_quantity"))
+            .alias("production_quantity")
+        )
+        .sort("_row")
+    )
+    return out.select(columns)
+
+
+def _sku_risk(projection, kpi_day):
+    return (
+        projection.filter(pl.col("day") == kpi_day)
+        .group_by(SKU_KEYS)
+        .agg([pl.col("SS_risk_peak").sum().alias("ss_risk"), pl.col("OOS_risk_peak").sum().alias("oos_risk")])
+    )
+
+
+def _scope_units(plan, horizon_days):
+    return (
+        plan.filter((pl.col("day") >= 1) & (pl.col("day") <= horizon_days))
+        .group_by(SKU_KEYS).agg(pl.col("production_quantity").sum().alias("_units"))
+    )
+
+
+def _lower_hull(x, y):
+    """Indices of the lower convex hull of points sorted by x, from the first point."""
+    hull = []
+    for i in range(len(x)):
+        if hull and x[i] <= x[hull[-1]]:
+            if y[i] < y[hull[-1]] and len(hull) > 1:
+                hull.pop()
+            else:
+                continue
+        while len(hull) >= 2:
+            a, b = hull[-2], hull[-1]
+            # b lies on or above the chord a -> i
+            if (y[b] - y[a]) * (x[i] - x[a]) >= (y[i] - y[a]) * (x[b] - x[a]):
+                hull.pop()
+            else:
+                break
+        hull.append(i)
+    return hull
+
+
+def _hull_flags(curves):
+    flags = np.zeros(curves.height, dtype=bool)
+    x = curves["cut_units"].to_numpy()
+    y = curves["loss_dollar"].to_numpy()
+    keys = curves.select(SKU_KEYS).to_numpy()
+    starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)])
+    for a, b in zip(starts, np.r_[starts[1:], curves.height]):
+        flags[a + np.array(_lower_hull(x[a:b], y[a:b]), dtype=np.int64)] = True
+    return flags
+
+
+def build_cut_curves(plan, inputs, levels=LEVELS, horizon_days=30, kpi_day=30, truck_capacity=34.0,
+                     prices=None, executor=None, cache_dir=None):
+    """Simulate every cut level once and tabulate the per-SKU loss curves.
+
+    Returns one row per (plant, item, level) with the units cut and the
+    day-`kpi_day` SS / OOS risk added against the uncut plan (units and $ at
+    the item's average sell price); 'on_hull' marks the lower convex hull of
+    $ loss over cut units used by the greedy query.
+    """
+    from src.kpi import item_prices
+    from src.pipeline import simulate_plan
+
+    levels = sorted(set(float(level) for level in levels) | {0.0})
+    if levels[-1] > 1:
+        raise ValueError("Cut levels are shares of production between 0 and 1")
+    prices = item_prices(inputs["price_df"]) if prices is None else prices
+
+    rows = []
+    for level in levels:
+        with stage("curves:level") as record:
+            plan_level = plan if level == 0 else cut_sku_plan(plan, level, horizon_days)
+            sim = simulate_plan(plan_level, inputs, max_days=kpi_day, truck_capacity=truck_capacity,
+                                cache_dir=cache_dir, executor=executor)
+            rows.append(
+                _scope_units(plan_level, horizon_days)
+                .join(_sku_risk(sim["projection"], kpi_day), on=SKU_KEYS, how="left")
+                .with_columns(pl.lit(level).alias("cut_pct"))
+            )
+            record["rows_out"] = rows[-1].height
+
+    base = rows[0].select(SKU_KEYS + [pl.col("_units").alias("scope_units"), pl.col("ss_risk").alias("_ss0"),
+                                      pl.col("oos_risk").alias("_oos0")])
+    curves = (
+        pl.concat(rows)
+        .join(base, on=SKU_KEYS, how="inner")
+        .filter(pl.col("scope_units") > 0)
+        .join(prices, on="item_id", how="left")
+        .with_columns([
+            pl.col("cut_pct").rank("dense").cast(pl.UInt8).sub(1).alias("level"),
+            (pl.col("scope_units") - pl.col("_units")).round(3).alias("cut_units"),
+            # risk peaks are <= 0: a more negative peak is a loss
+            (pl.col("_ss0") - pl.col("ss_risk")).fill_null(0.0).alias("ss_loss_units"),
+            (pl.col("_oos0") - pl.col("oos_risk")).fill_null(0.0).alias("oos_loss_units"),
+            pl.col("avg_sell_price").fill_null(pl.col("avg_sell_price").mean()).fill_null(1.0).alias("_price"),
+        ])
+        .sort(SKU_KEYS + ["level"])
+        # cutting a SKU never lowers its own risk; gains at a level come from
+        # other SKUs' trucks, so losses are floored at 0 and kept non-decreasing
+        .with_columns([
+            pl.col(name).clip(lower_bound=0).cum_max().over(SKU_KEYS).alias(name)
+            for name in ("ss_loss_units", "oos_loss_units")
+        ])
+        .with_columns([
+            (pl.col("ss_loss_units") * pl.col("_price")).alias("ss_loss_dollar"),
+            (pl.col("oos_loss_units") * pl.col("_price")).alias("oos_loss_dollar"),
+        ])
+        .with_columns((pl.col("ss_loss_dollar") + pl.col("oos_loss_dollar")).alias("loss_dollar"),
+                      pl.lit(False).alias("on_hull"))
+        .sort(SKU_KEYS + ["level"])
+        .select(CURVE_COLUMNS)
+    )
+    return curves.with_columns(pl.Series("on_hull", _hull_flags(curves)))
+
+
+def write_curves(curves, path):
+    """Store the curve table as Arrow IPC (sorted by plant, item, level)."""
+    curves.write_ipc(path, compression="zstd")
+    return path
+
+
+def read_curves(path):
+    return pl.read_ipc(path, memory_map=False)
+
+
+def _scope(curves, plant_filter):
+    if plant_filter is None:
+        return curves
+    plants = [plant_filter] if isinstance(plant_filter, (str, int, np.integer)) else list(plant_filter)
+    scoped = curves.filter(pl.col("plant_id").is_in(plants))
+    if scoped.height == 0:
+        raise ValueError(f"No curves found for plant(s): {plants}")
+    return scoped
+
+
+def _greedy(curves, target):
+    # hull segments of all SKUs by $ per unit cut; per SKU the slopes increase,
+    # so taking a prefix of the global order keeps every SKU on its ladder
+    segments = (
+        curves.filter(pl.col("on_hull"))
+        .with_columns([
+            pl.col("cut_units").diff().over(SKU_KEYS).alias("_units"),
+            pl.col("loss_dollar").diff().over(SKU_KEYS).alias("_loss"),
+        ])
+        .filter(pl.col("_units") > 0)
+        .with_columns((pl.col("_loss") / pl.col("_units")).alias("_slope"))
+        .sort(["_slope"] + SKU_KEYS + ["level"])
+        .with_columns(pl.col("_units").cum_sum().alias("_cum"))
+    )
+    taken = segments.filter((pl.col("_cum") - pl.col("_units")) < target)
+    return taken.group_by(SKU_KEYS).agg(pl.col("level").max())
+
+
+def _knapsack(curves, target, resolution):
+    # multiple-choice knapsack: one level per SKU, min $ loss with cut >= target
+    # on a grid of target / resolution units (state cap = "cap or more")
+    step = max(target / resolution, _UNIT)
+    cap = int(np.ceil(target / step))
+    keys = curves.select(SKU_KEYS).to_numpy()
+    starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)])
+    ends = np.r_[starts[1:], curves.height]
+    weight = np.minimum(np.rint(curves["cut_units"].to_numpy() / step).astype(np.int64), cap)
+    value = curves["loss_dollar"].to_numpy()
+
+    best = np.full(cap + 1, np.inf)
+    best[0] = 0.0
+    # level position within each SKU's ladder: one byte per state (~100 MB at 50k SKUs)
+    choice = np.zeros((len(starts), cap + 1), dtype=np.min_scalar_type(int((ends - starts).max())))
+    cap_prev = np.zeros(len(starts), dtype=np.int64)
+    for s, (a, b) in enumerate(zip(starts, ends)):
+        new = np.full(cap + 1, np.inf)
+        for j in range(a, b):
+            w = weight[j]
+            shifted = np.full(cap + 1, np.inf)
+            shifted[w:cap] = best[:cap - w] + value[j]
+            prev = cap - w + int(np.argmin(best[cap - w:]))  # every state reaching past the target
+            shifted[cap] = best[prev] + value[j]
+            better = shifted < new
+            new[better] = shifted[better]
+            choice[s, better] = j - a
+            if better[cap]:
+                cap_prev[s] = prev
+        best = new
+
+    # target out of reach: cut as much as the ladders allow
+    state = cap if np.isfinite(best[cap]) else int(np.flatnonzero(np.isfinite(best)).max())
+    chosen = np.zeros(len(starts), dtype=np.int64)
+    for s in range(len(starts) - 1, -1, -1):
+        chosen[s] = starts[s] + choice[s, state]
+        state = cap_prev[s] if state == cap else state - weight[chosen[s]]
+    levels = _top_up(curves, curves[chosen].select(SKU_KEYS + ["level"]), target)
+
+    # grid rounding and the top-up can leave the exact mix dearer than the
+    # hull walk: keep whichever of the two is cheaper
+    greedy = _greedy(curves, target)
+    return min((greedy, levels), key=lambda mix: _mix_totals(curves, mix, target))
+
+
+def _mix_totals(curves, levels, target):
+    # (target missed, $ loss) of a mix; SKUs without a level stay uncut
+    mix = curves.join(levels, on=SKU_KEYS + ["level"], how="semi")
+    return max(target - mix["cut_units"].sum(), 0.0) > 1e-6, mix["loss_dollar"].sum()
+
+
+def _top_up(curves, levels, target):
+    # grid rounding can leave the cut a little short: move SKUs one level up,
+    # cheapest $ per unit first, until the target is reached
+    while True:
+        current = curves.join(levels, on=SKU_KEYS + ["level"], how="semi")
+        missing = target - current["cut_units"].sum()
+        if missing <= 1e-6:
+            return levels
+        steps = (
+            current.select(SKU_KEYS + ["level", pl.col("cut_units").alias("_units0"),
+                                       pl.col("loss_dollar").alias("_loss0")])
+            .with_columns((pl.col("level") + 1).alias("level"))
+            .join(curves, on=SKU_KEYS + ["level"], how="inner")
+            .with_columns((pl.col("cut_units") - pl.col("_units0")).alias("_units"))
+            .filter(pl.col("_units") > 0)
+            .with_columns(((pl.col("loss_dollar") - pl.col("_loss0")) / pl.col("_units")).alias("_slope"))
+            .sort(["_slope"] + SKU_KEYS)
+            .filter((pl.col("_units").cum_sum() - pl.col("_units")) < missing)
+        )
+        if steps.height == 0:
+            return levels  # every SKU is at its last level
+        levels = pl.concat([levels.join(steps, on=SKU_KEYS, how="anti"), steps.select(SKU_KEYS + ["level"])])
+
+
+def query_cut(curves, cut_type="%", cut_value=10.0, plant_filter=None, method="greedy", resolution=2000):
+    """Cheapest level per SKU reaching the target cut, from the curves alone.
+
+    `cut_type` / `cut_value` / `plant_filter` mean what they mean for
+    `apply_production_cut` (the % is of the scope's production in the
+    curves' horizon). Returns {"selection": one row per SKU with its level
+    and curve figures, "summary": totals and timing}.
+    """
+    if method not in ("greedy", "knapsack"):
+        raise ValueError("method must be 'greedy' or 'knapsack'")
+    start = time.perf_counter()
+    scoped = _scope(curves, plant_filter)
+    base = scoped.filter(pl.col("level") == 0)
+    total = base["scope_units"].sum()
+    if cut_type == "%":
+        target = total * cut_value / 100
+    elif cut_type == "units":
+        target = cut_value
+    else:
+        raise ValueError("cut_type must be '%' or 'units'")
+
+    if target <= 0:
+        levels = base.select(SKU_KEYS + ["level"])
+    elif method == "greedy":
+        levels = _greedy(scoped, target)
+    else:
+        levels = _knapsack(scoped, target, resolution)
+
+    selection = (
+        base.select(SKU_KEYS)
+        .join(levels, on=SKU_KEYS, how="left")
+        .with_columns(pl.col("level").fill_null(0).cast(pl.UInt8))
+        .join(scoped, on=SKU_KEYS + ["level"], how="left")
+        .drop("on_hull")
+    )
+    totals = selection.select(["cut_units", "ss_loss_units", "oos_loss_units", "ss_loss_dollar",
+                               "oos_loss_dollar", "loss_dollar"]).sum().row(0, named=True)
+    summary = {"method": method, "scope_units": total, "target_cut": target, **totals,
+               "skus_cut": int((selection["level"] > 0).sum()),
+               "query_ms": (time.perf_counter() - start) * 1000}
+    return {"selection": selection, "summary": summary}
+
+
+def confirm_cut(selection, plan, inputs, horizon_days=30, kpi_day=30, truck_capacity=34.0, executor=None):
+    """Apply a query's selection to the plan and re-simulate it in full.
+
+    Returns the cut plan and its day-`kpi_day` dashboard (`scenario_kpis`).
+    """
+    from src.kpi import item_prices, scenario_kpis
+    from src.pipeline import simulate_plan
+
+    plan_after = cut_sku_plan(plan, selection.select(SKU_KEYS + ["cut_pct"]), horizon_days)
+    sim = simulate_plan(plan_after, inputs, max_days=kpi_day, truck_capacity=truck_capacity, executor=executor)
+    kpis = scenario_kpis(sim["projection"], plan_after, sim["deployment_outlook"], item_prices(inputs["price_df"]),
+                         kpi_day=kpi_day, truck_capacity=truck_capacity)
+    return plan_after, kpis
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-SKU cut-response curves and target-cut queries")
+    parser.add_argument("--root", default=".", help="project root holding 'Symulation data/' and 'Data/'")
+    parser.add_argument("--store", default=None, help="read the inputs from this scenario store instead of the CSVs")
+    parser.add_argument("--curves", default="cut_curves.arrow", help="curve table to write / read")
+    parser.add_argument("--build", action="store_true", help="(re)build the curves before querying")
+    parser.add_argument("--levels", nargs="+", type=float, default=list(LEVELS))
+    parser.add_argument("--horizon", type=int, default=30, help="cut days 1..N")
+    parser.add_argument("--kpi-day", type=int, default=30)
+    parser.add_argument("--truck-capacity", type=float, default=34.0)
+    parser.add_argument("--cut-type", default="%", choices=["%", "units"])
+    parser.add_argument("--cut-value", type=float, default=None, help="query this target cut")
+    parser.add_argument("--plants", nargs="+", default=None, help="plant ids (default: all)")
+    parser.add_argument("--method", default="greedy", choices=["greedy", "knapsack"])
+    parser.add_argument("--confirm", action="store_true", help="re-simulate the answer in full")
+    args = parser.parse_args(argv)
+
+    inputs = None
+    if args.build or args.confirm:
+        from src.pipeline import load_inputs
+
+        inputs = load_inputs(args.root, store_root=args.store)
+    if args.build:
+        start = time.perf_counter()
+        curves = build_cut_curves(inputs["prod_plan"], inputs, levels=args.levels, horizon_days=args.horizon,
+                                  kpi_day=args.kpi_day, truck_capacity=args.truck_capacity)
+        write_curves(curves, args.curves)
+        print(f"📈 {curves.height} curve points for {curves.filter(pl.col('level') == 0).height} SKUs "
+              f"in {time.perf_counter() - start:.1f}s -> {args.curves}")
+    if args.cut_value is None:
+        return
+    curves = read_curves(args.curves)
+    answer = query_cut(curves, cut_type=args.cut_type, cut_value=args.cut_value, plant_filter=args.plants,
+                       method=args.method)
+    print(f"⚡ {answer['summary']}")
+    if args.confirm:
+        _, kpis = confirm_cut(answer["selection"], inputs["prod_plan"], inputs, horizon_days=args.horizon,
+                              kpi_day=args.kpi_day, truck_capacity=args.truck_capacity)
+        print(f"✅ Simulated: {kpis}")
+
+
+if __name__ == "__main__":
+    main()
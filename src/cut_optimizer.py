@@ -0,0 +1,138 @@
+import time
+
+import numpy as np
+
+_UNIT = 0.1  # production quantities are kept on a 0.1-unit grid
+
+
+def cut_unit_cost(df, ss_weight=1.0, oos_weight=2.0):
+    """Proxy cost per unit cut from each plan row (not a projected $ loss).
+
+    cost = sell_price x (health_score + ss_weight x SS flag + oos_weight x
+    OOS flag) x share of the horizon left after the row's day. health_score
+    is min-max normalized over the rated items and the flags only mark rows
+    that already carry SS / OOS risk, so the weights are unitless. The
+    projected SS / OOS $ loss of a cut is not linear in the units cut (it
+    depends on deployment and truck sharing), so it cannot be a per-row
+    MILP cost; this proxy ranks runs by the same signals instead.
+    """
+    n = len(df)
+    price = df["sell_price"].fillna(df["sell_price"].mean()).fillna(1.0) if "sell_price" in df.columns else 1.0
+    health = df["health_score"].fillna(0.5) if "health_score" in df.columns else 0.5
+    ss_flag = (df["SS_risk_peak"].fillna(0) < 0).astype(float) if "SS_risk_peak" in df.columns else 0.0
+    oos_flag = (df["OOS_risk_peak"].fillna(0) < 0).astype(float) if "OOS_risk_peak" in df.columns else 0.0
+
+    day = df["day"].to_numpy(dtype=float)
+    remaining = (day.max() - day + 1) / (day.max() - day.min() + 1) if n else day
+
+    cost = np.asarray(price * (health + ss_weight * ss_flag + oos_weight * oos_flag), dtype=float)
+    return cost * remaining
+
+
+def optimize_cut(df, goal, ss_weight=1.0, oos_weight=2.0, time_limit=30.0, mip_rel_gap=1e-4):
+    """Choose new run quantities that total `goal` at the lowest proxy loss.
+
+    The objective is `cut_unit_cost` summed over the units cut.
+
+    Each existing run (production_quantity > 0) can be kept, shrunk down to
+    its MOQ or dropped; no new run days are created, so the cycle_days
+    spacing of the plan is kept. The LP relaxation is a fractional knapsack
+    solved by sorting on unit cost; if its single partial run still meets
+    MOQ it is optimal and returned as is, otherwise HiGHS
+    (`scipy.optimize.milp`) solves the model with semi-continuous run
+    quantities, starting from the same data.
+
+    MOQ is a minimum run size, not a multiple: a kept run can take any
+    quantity in [MOQ, current qty] on the 0.1 grid. The planner's runs are
+    MOQ multiples times the build-up factor (`build_production_plan`),
+    so they sit on no common grid, and restricting the cut to k x MOQ would
+    make the exact target unreachable in most scopes. The heuristic cut
+    treats MOQ the same way.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Cut scope from `_cut_scope` (item/day sorted).
+    goal : float
+        Production total to keep (total production - target cut).
+
+    Returns
+    -------
+    new_qty : np.ndarray
+        Quantities on the 0.1-unit grid, summing to `goal` rounded to that
+        grid whenever MOQ allows it.
+    report : dict
+        ['solver','status','solve_time','mip_gap','objective','residual']
+    """
+    start = time.perf_counter()
+    q = np.nan_to_num(df["production_quantity"].to_numpy(dtype=float))
+    moq = np.nan_to_num(df["MOQ_units"].to_numpy(dtype=float))
+    cost = cut_unit_cost(df, ss_weight=ss_weight, oos_weight=oos_weight)
+
+    runs = np.flatnonzero(q > 0)
+    q_run, cost_run = q[runs], cost[runs]
+    lo_run = np.minimum(moq[runs], q_run)
+
+    # --- LP relaxation: keep the most expensive units first ---
+    order = np.argsort(-cost_run, kind="stable")
+    kept = np.cumsum(q_run[order])
+    x_run = np.zeros(len(runs))
+    k = np.searchsorted(kept, goal) if goal > 0 else 0
+    if k >= len(runs):
+        x_run[:] = q_run
+        partial_ok = True
+    else:
+        x_run[order[:k]] = q_run[order[:k]]
+        x_run[order[k]] = max(goal - (kept[k - 1] if k else 0.0), 0.0)
+        partial_ok = x_run[order[k]] == 0 or x_run[order[k]] >= lo_run[order[k]]
+
+    solver, status, mip_gap = "lp-relaxation", "optimal", 0.0
+    if not partial_ok:
+        from scipy.optimize import Bounds, LinearConstraint, milp
+
+        # semi-continuous runs: 0 or [MOQ, current qty]; slack pair keeps the
+        # target soft only when MOQ makes it unreachable
+        n = len(runs)
+        penalty = 10.0 * (cost_run.max() + 1.0)
+        res = milp(
+            c=np.r_[-cost_run, penalty, penalty],
+            integrality=np.r_[np.where(lo_run > 0, 2, 0), 0, 0],
+            bounds=Bounds(np.r_[lo_run, 0.0, 0.0], np.r_[q_run, np.inf, np.inf]),
+            constraints=LinearConstraint(np.r_[np.ones(n), 1.0, -1.0][None, :], goal, goal),
+            options={"time_limit": time_limit, "mip_rel_gap": mip_rel_gap, "disp": False},
+        )
+        solver, status = "highs", res.message
+        if res.x is not None:
+            x_run = res.x[:n]
+            mip_gap = float(getattr(res, "mip_gap", np.nan))
+        else:
+            # no incumbent: drop the sub-MOQ partial run from the relaxation
+            x_run[order[k]] = 0.0
+            mip_gap = np.nan
+
+    # --- Snap to the 0.1 grid; spread the rounding residual over live runs ---
+    tenths = np.rint(x_run / _UNIT)
+    diff = np.rint(goal / _UNIT) - tenths.sum()
+    if diff:
+        alive = tenths > 0
+        if diff > 0:
+            room = np.where(alive, np.floor(q_run / _UNIT + 1e-9) - tenths, 0)
+            pick = np.argsort(-cost_run, kind="stable")
+        else:
+            room = np.where(alive, tenths - np.ceil(lo_run / _UNIT - 1e-9), 0)
+            pick = np.argsort(cost_run, kind="stable")
+        room = np.clip(room, 0, None)[pick]
+        step = np.minimum(room, np.clip(abs(diff) - (np.cumsum(room) - room), 0, None))
+        tenths[pick] += np.sign(diff) * step
+
+    new_qty = np.zeros(len(df))
+    new_qty[runs] = tenths * _UNIT
+    report = {
+        "solver": solver,
+        "status": status,
+        "solve_time": time.perf_counter() - start,
+        "mip_gap": mip_gap,
+        "objective": float(cost_run @ (q_run - new_qty[runs])),
+        "residual": float(goal - new_qty.sum()),
+    }
+    return new_qty, report
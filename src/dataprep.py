@@ -0,0 +1,283 @@
+"""Notebook 01 (and the plant plan of notebook 02) as functions.
+
+    frames = prepare_inputs("Input M5", stores=DEFAULT_STORES, sample_items=150)
+    write_inputs(frames, root=".")
+
+M5 sales history -> sampled items -> Holt-Winters forecast per (item, store)
+-> demand outlook with safety stock, store SOG and risk columns -> plant
+requirements, starting plant stock and prod master. Rows are sorted before
+every random draw, so a seed reproduces the same artifacts run after run.
+"""
+import os
+
+import numpy as np
+import polars as pl
+
+from src.ingest import load_history, load_prices
+
+DEFAULT_STORES = ["CA_1", "CA_2", "CA_3", "TX_1", "TX_2"]
+
+PALLET_SIZES = {"cat_id": ["FOODS", "HOBBIES", "HOUSEHOLD"],
+                "plant_id": ["PLANT_CA", "PLANT_TX", "PLANT_MX"],
+                "pallet_size": [4, 1, 2]}
+
+# Plant -> store transit days per category
+LANE_TRANSIT = {
+    ("PLANT_CA", "FOODS"): {"CA_1": 1, "CA_2": 2, "CA_3": 2, "TX_1": 4, "TX_2": 4},
+    ("PLANT_TX", "HOBBIES"): {"CA_1": 5, "CA_2": 4, "CA_3": 5, "TX_1": 1, "TX_2": 2},
+    ("PLANT_MX", "HOUSEHOLD"): {"CA_1": 3, "CA_2": 3, "CA_3": 3, "TX_1": 2, "TX_2": 2},
+}
+
+# Safety stock = avg demand x deviation x (transit + GR/GI + review period)
+GR_AND_GI = 1
+PERIOD_BETWEEN_REVIEWS = 3
+
+BUFFER_DAYS = np.array([5, 6, 7, 8, 9, 10, 11, 12])
+BUFFER_PROBS = np.array([0.05, 0.10, 0.15, 0.15, 0.20, 0.20, 0.10, 0.05])
+PLANT_SOG_DAYS = np.array([0, 1, 2, 3, 4, 6, 7, 8])
+PLANT_SOG_PROBS = np.array([0.12, 0.08, 0.16, 0.16, 0.14, 0.15, 0.14, 0.05])
+
+CYCLES = np.array([2, 4, 5, 6, 8])
+CYCLE_PROBS = {
+    "PLANT_CA": np.array([0.25, 0.22, 0.27, 0.22, 0.04]),
+    "PLANT_MX": np.array([0.32, 0.32, 0.22, 0.10, 0.04]),
+    "PLANT_TX": np.array([0.32, 0.32, 0.16, 0.16, 0.04]),
+}
+MOQ_CHALLENGE = {"PLANT_CA": 0.15, "PLANT_MX": 0.10, "PLANT_TX": 0.05}
+
+# Notebook file names under '<root>/Symulation data/'
+OUTPUT_FILES = {
+    "pal_size_df": "pal_size_df.csv",
+    "price_df": "price.csv",
+    "lane_rules": "lane_rules.csv",
+    "demand_outlook": "demand_outlook.csv",
+    "prod_req": "Prod_req_df.csv",
+    "prod_master": "prod_master.csv",
+}
+
+
+def forecast_sales(long_sales, horizon=45, seasonal_periods=7, max_workers=None):
+    """Holt-Winters forecast per series, dated from the day after the history."""
+    from src.forecasting import forecast_all  # statsmodels, only for this stage
+
+    last_date = long_sales["date"].max()
+    return (
+        forecast_all(long_sales, horizon, seasonal_periods, max_workers=max_workers)
+        .with_columns((pl.lit(last_date) + pl.duration(days=pl.col("day"))).alias("date"))
+    )
+
+
+def pallet_sizes():
+    return pl.DataFrame(PALLET_SIZES)
+
+
+def lane_rules():
+    return pl.DataFrame([
+        {"plant_id": plant, "cat_id": cat, "store_id": store, "transit_time_days": days}
+        for (plant, cat), stores in LANE_TRANSIT.items()
+        for store, days in stores.items()
+    ])
+
+
+def latest_prices(prices):
+    """Each (store, item) at the price of its latest week (DataFrame or LazyFrame).
+
+    Max week per group, joined back: on a scan the streaming engine keeps
+    only the small max-week table in memory.
+    """
+    latest = prices.group_by(["store_id", "item_id"]).agg(pl.col("wm_yr_wk").max().alias("max_week"))
+    return (
+        latest.join(prices, left_on=["store_id", "item_id", "max_week"],
+                    right_on=["store_id", "item_id", "wm_yr_wk"], how="left")
+        .sort(["store_id", "item_id"])
+    )
+
+
+def build_demand_outlook(forecast, pal_size_df, lanes, rng):
+    """Store outlook: safety stock, starting stock (SOG) and pre-deployment risk per day."""
+    outlook = (
+        forecast
+        .join(pal_size_df.select(["cat_id", "pallet_size"]), on="cat_id", how="left")
+        .join(lanes, on=["cat_id", "store_id"], how="left")
+        .sort(["item_id", "store_id", "day"])
+        .with_columns(pl.col("forecast_sales").mean().over(["item_id", "store_id"]).alias("avg_daily_demand"))
+    )
+
+    # --- Safety stock: deviated demand over transit + GR/GI + review period ---
+    deviation = rng.uniform(0.8, 1.2, size=outlook.height)
+    outlook = outlook.with_columns(
+        (pl.col("avg_daily_demand") * pl.Series(deviation)
+         * (pl.col("transit_time_days") + GR_AND_GI + PERIOD_BETWEEN_REVIEWS)).round(0).alias("safety_stock")
+    ).with_columns(pl.col("safety_stock").mean().over(["item_id", "store_id"]).alias("safety_stock_static"))
+
+    # --- Store SOG on day 1 and the projection without deployments ---
+    buffer = rng.choice(BUFFER_DAYS, size=outlook.height, p=BUFFER_PROBS)
+    outlook = (
+        outlook
+        .with_columns((pl.col("avg_daily_demand") * pl.Series(buffer)).round(0).alias("SOG_initial"))
+        .with_columns(pl.when(pl.col("day") == 1).then(pl.col("SOG_initial")).otherwise(0).alias("SOG_initial"))
+        .with_columns(
+            (pl.col("SOG_initial").first() - pl.col("forecast_sales").cum_sum())
+            .over(["item_id", "store_id"]).alias("projection")
+        )
+        .with_columns([
+            pl.when(pl.col("projection") < pl.col("safety_stock_static"))
+            .then(pl.col("safety_stock_static") - pl.col("projection"))
+            .otherwise(0)
+            .alias("below_safety_stock_risk"),
+            pl.when(pl.col("projection") < 0).then(-pl.col("projection")).otherwise(0).alias("stock_out_risk"),
+        ])
+        .with_columns([
+            pl.col("below_safety_stock_risk").diff().over(["item_id", "store_id"]).alias("ss_risk_change"),
+            pl.col("stock_out_risk").diff().over(["item_id", "store_id"]).alias("so_risk_change"),
+        ])
+    )
+    first = ["item_id", "store_id", "safety_stock_static"]
+    return outlook.select(first + [c for c in outlook.columns if c not in first])
+
+
+def build_prod_requirements(demand_outlook, rng):
+    """Plant requirements per store lane, shifted back by transit, plus starting plant stock."""
+    min_date = demand_outlook["date"].min()
+    shifted = demand_outlook.with_columns([
+        (pl.col("date") - pl.duration(days=pl.col("transit_time_days"))).alias("date"),
+        (pl.col("day") - pl.col("transit_time_days")).alias("day"),
+    ]).with_columns([
+        pl.when(pl.col("day") <= 0).then(pl.lit(min_date)).otherwise(pl.col("date")).alias("date"),
+        pl.when(pl.col("day") <= 0).then(1).otherwise(pl.col("day")).alias("day"),
+    ])
+
+    req = (
+        shifted
+        .group_by(["item_id", "plant_id", "store_id", "cat_id", "pallet_size", "transit_time_days", "date", "day"],
+                  maintain_order=True)
+        .agg([
+            pl.col("forecast_sales").sum().alias("daily_fcst"),
+            pl.col("safety_stock_static").max().alias("safety_stock_static"),
+            pl.col("below_safety_stock_risk").max().alias("current_ss_risk"),
+            pl.col("stock_out_risk").max().alias("current_stockout_risk"),
+            pl.col("ss_risk_change").max().alias("ss_risk_increase"),
+            pl.col("so_risk_change").max().alias("so_risk_increase"),
+            pl.col("projection").last().alias("current_projection"),
+            pl.col("avg_daily_demand").sum().alias("avg_daily_demand"),
+        ])
+        .with_columns([
+            pl.when(pl.col("so_risk_increase") > 0).then(pl.col("so_risk_increase"))
+            .when(pl.col("ss_risk_increase") > 0).then(pl.col("ss_risk_increase"))
+            .otherwise(0)
+            .alias("incremental_risk_requirement"),
+            pl.when(pl.col("current_stockout_risk") > 0).then(pl.lit("STOCKOUT"))
+            .when(pl.col("current_ss_risk") > 0).then(pl.lit("SS_RISK"))
+            .otherwise(pl.lit(""))
+            .alias("Urgency level"),
+        ])
+        .with_columns(pl.col("incremental_risk_requirement").alias("prod_requirements"))
+        .sort(["plant_id", "item_id", "date", "store_id"])
+        .with_columns(pl.col("prod_requirements").cum_sum().over(["item_id", "plant_id"])
+                      .alias("cum_prod_requirements"))
+    )
+
+    # --- Starting plant stock: a few days of demand on day 1 ---
+    sog_days = rng.choice(PLANT_SOG_DAYS, p=PLANT_SOG_PROBS, size=req.height)
+    effect = rng.uniform(0.90, 1.10, size=req.height)
+    return req.with_columns(
+        pl.when(pl.col("day") == 1)
+        .then(pl.col("avg_daily_demand") * pl.Series(sog_days) * pl.Series(effect))
+        .otherwise(0)
+        .alias("starting_inventory_plant")
+    )
+
+
+def build_prod_master(demand_outlook, seed=42):
+    """Production cycle and MOQ per (item, plant)."""
+    rng = np.random.default_rng(seed=seed)
+    plant_demand = (
+        demand_outlook
+        .group_by(["item_id", "plant_id", "pallet_size"])
+        .agg([
+            pl.col("avg_daily_demand").mean().alias("avg_daily_demand_plant"),
+            pl.col("safety_stock_static").max().alias("safety_stock_static"),
+        ])
+        .with_columns((pl.col("avg_daily_demand_plant") + pl.col("safety_stock_static") / 45)
+                      .alias("avg_daily_demand_plant"))
+        .sort(["plant_id", "item_id"])
+    )
+
+    rows = []
+    for row in plant_demand.iter_rows(named=True):
+        plant = row["plant_id"]
+        cycle_days = rng.choice(CYCLES, p=CYCLE_PROBS[plant])
+        base_moq = np.ceil(row["avg_daily_demand_plant"] * rng.choice([2, 3, 4], p=[0.6, 0.3, 0.1]))
+        if rng.random() < MOQ_CHALLENGE[plant]:
+            multiplier = rng.choice([6, 7, 8], p=[0.6, 0.3, 0.1])
+        else:
+            multiplier = rng.choice([2, 3, 4, 5], p=[0.4, 0.3, 0.2, 0.1])
+        moq_units = int(np.ceil(int(np.round(base_moq * multiplier)) / row["pallet_size"]) * row["pallet_size"])
+        rows.append({
+            "item_id": row["item_id"],
+            "plant_id": plant,
+            "avg_daily_demand_plant": row["avg_daily_demand_plant"],
+            "cycle_days": int(cycle_days),
+            "MOQ_units": moq_units,
+        })
+    return pl.DataFrame(rows)
+
+
+def build_plant_plan(prod_req, prod_master):
+    """Plant-level requirements with MOQ / cycle and priority (notebook 02), ready for
+    `build_production_plan`."""
+    return (
+        prod_req
+        .group_by(["plant_id", "item_id", "day", "date"])
+        .agg([
+            pl.sum("prod_requirements").alias("total_daily_requirement"),
+            pl.max("current_stockout_risk").alias("has_stockout_risk"),
+            pl.max("current_ss_risk").alias("has_ss_risk"),
+            pl.first("starting_inventory_plant").alias("starting_inventory_plant"),
+        ])
+        .sort(["plant_id", "item_id", "day", "date"])
+        .join(prod_master, on=["plant_id", "item_id"])
+        .with_columns(
+            pl.when(pl.col("has_stockout_risk") > 0).then(1)      # Prio 1: Stockout
+            .when(pl.col("has_ss_risk") > 0).then(2)              # Prio 2: Safety stock risk
+            .otherwise(3)                                         # Prio 3: Normal
+            .alias("priority")
+        )
+    )
+
+
+def prepare_inputs(m5_dir="Input M5", stores=DEFAULT_STORES, sample_items=150, history_days=365,
+                   horizon=45, seasonal_periods=7, seed=42, max_workers=None, cache_dir=None):
+    """Run the whole preparation; returns the frames named as in OUTPUT_FILES.
+
+    The M5 files are scanned lazily (src.ingest); with `cache_dir` the long
+    sales history is kept there as Arrow IPC for the next run. 'price_df'
+    holds the sampled items only (at every store); the notebook wrote the
+    whole catalog, which no later stage reads.
+    """
+    history = load_history(m5_dir, stores=stores, sample_items=sample_items, history_days=history_days, seed=seed,
+                           cache_dir=cache_dir)
+    forecast = forecast_sales(history, horizon=horizon, seasonal_periods=seasonal_periods, max_workers=max_workers)
+
+    rng = np.random.default_rng(seed=seed)
+    pal_size_df, lanes = pallet_sizes(), lane_rules()
+    demand_outlook = build_demand_outlook(forecast, pal_size_df, lanes, rng)
+    prod_req = build_prod_requirements(demand_outlook, rng)
+    return {
+        "pal_size_df": pal_size_df,
+        # every store, as in notebook 01: item_prices averages the price over all of them
+        "price_df": load_prices(m5_dir, items=history["item_id"].unique()),
+        "lane_rules": lanes,
+        "demand_outlook": demand_outlook,
+        "prod_req": prod_req,
+        "prod_master": build_prod_master(demand_outlook, seed=seed),
+    }
+
+
+def write_inputs(frames, root="."):
+    """Write the prepared frames as the notebook CSVs under '<root>/Symulation data/'."""
+    folder = os.path.join(root, "Symulation data")
+    os.makedirs(folder, exist_ok=True)
+    for name, file_name in OUTPUT_FILES.items():
+        frames[name].write_csv(os.path.join(folder, file_name))
+    return folder
@@ -0,0 +1,233 @@
+import numpy as np
+import polars as pl
+
+from src.ids import PRIORITY_CODES
+from src.instrument import count
+
+PRIORITIES = ["critical_risk", "safety_stock", "buffer_stock", "leftover"]
+
+# Polars sums float columns sequentially below 128 values and blockwise above
+# (checked on polars 1.30.0 and 1.44.2); the leftover pass reproduces that so
+# shares match the serial engine exactly. Outside the checked versions every
+# group total goes through Polars itself (slower, still exact).
+_POLARS_SUM_CHECKED = ((1, 30), (1, 44))
+_POLARS_SEQUENTIAL_SUM = (
+    128 if _POLARS_SUM_CHECKED[0] <= tuple(int(v) for v in pl.__version__.split(".")[:2]) <= _POLARS_SUM_CHECKED[1]
+    else 0
+)
+
+
+def accurate_deployment_vectorized(production_plan, demand_data, max_days=45):
+    """Array version of `accurate_deployment` with the same output rows.
+
+    Every (plant, item, day) production row is a group of store slots. A day
+    is processed in waves (one production row per item per wave, so no two
+    groups in a wave share state) and each allocation pass runs as NumPy
+    operations across all groups of the wave at once. `sent_to_store` is a
+    dense (store x item) array.
+    """
+    slots = store_slots(production_plan, demand_data, max_days).with_columns([
+        (pl.col("store_id").rank("dense") - 1).cast(pl.Int64).alias("store_code"),
+        (pl.col("item_id").rank("dense") - 1).cast(pl.Int64).alias("item_code"),
+    ])
+    if slots.height == 0:
+        return pl.DataFrame([])
+
+    sent = np.zeros((int(slots["store_code"].max()) + 1, int(slots["item_code"].max()) + 1))
+    deployments = deploy_slots(slots, sent)
+    count(
+        total_production=production_plan.filter(pl.col("day") <= max_days)["production_quantity"].sum(),
+        total_deployed=deployments["quantity"].sum() if deployments.height else 0.0,
+    )
+    return deployments
+
+
+def store_slots(production_plan, demand_data, max_days=45):
+    """Steps 1-2: (production row x store) slots in serial allocation order."""
+    # --- Step 1: production rows in horizon with something to ship ---
+    plan = (
+        production_plan
+        .with_row_index("plan_pos")
+        .filter((pl.col("day") >= 1) & (pl.col("day") <= max_days))
+        .with_columns((pl.col("production_quantity") + pl.col("starting_inventory_plant")).alias("qty"))
+        .filter(pl.col("qty") > 0)
+        .select(["plan_pos", "plant_id", "item_id", "day", "qty"])
+    )
+
+    # --- Step 2: attach the stores each row serves (demand order kept) ---
+    return (
+        plan.join(
+            demand_data
+            .with_row_index("demand_pos")
+            .select(["demand_pos", "plant_id", "item_id", "day", "store_id", "projection",
+                     "avg_daily_demand", "safety_stock_static", "transit_time_days"]),
+            on=["plant_id", "item_id", "day"],
+            how="inner",
+        )
+        .sort(["day", "plan_pos", "demand_pos"])
+    )
+
+
+def deploy_slots(slots, sent):
+    """Steps 3-4: run the allocation passes over prepared slots.
+
+    `slots` come from `store_slots` plus 'store_code' / 'item_code' columns
+    indexing `sent`, the (store x item) units shipped so far. `sent` is
+    updated in place, so slots can be fed one day at a time with the same
+    array carried forward (see src.streaming).
+    """
+    if slots.height == 0:
+        return pl.DataFrame([])
+
+    plan_pos = slots["plan_pos"].to_numpy().astype(np.int64)
+    new_group = np.r_[True, plan_pos[1:] != plan_pos[:-1]]
+    gid = np.cumsum(new_group) - 1
+    g_start = np.flatnonzero(new_group)
+    g_size = np.diff(np.r_[g_start, slots.height])
+    rank = np.arange(slots.height) - g_start[gid]
+
+    groups = (
+        slots.filter(pl.Series(new_group))
+        .select(["day", "plan_pos", "plant_id", "item_id", "item_code", "qty"])
+        .with_columns(pl.int_range(pl.len()).over(["day", "item_code"]).alias("wave"))
+    )
+    g_day = groups["day"].to_numpy()
+    g_wave = groups["wave"].to_numpy()
+    g_qty = groups["qty"].to_numpy().astype(np.float64)
+
+    arrays = {
+        "store": slots["store_code"].to_numpy(),
+        "item": slots["item_code"].to_numpy(),
+        "projection": slots["projection"].to_numpy().astype(np.float64),
+        "demand": slots["avg_daily_demand"].to_numpy().astype(np.float64),
+        "safety": slots["safety_stock_static"].to_numpy().astype(np.float64),
+        "transit": slots["transit_time_days"].to_numpy(),
+    }
+
+    # --- Step 3: walk (day, wave) batches; each is a contiguous slot range ---
+    batch_order = np.lexsort((gid, g_wave[gid], g_day[gid]))
+    batch_key = g_day[gid][batch_order] * (int(g_wave.max()) + 1) + g_wave[gid][batch_order]
+    bounds = np.flatnonzero(np.r_[True, batch_key[1:] != batch_key[:-1], True])
+
+    emitted = []
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        batch = batch_order[a:b]
+        _allocate_batch(batch, gid, rank, g_size, g_qty, arrays, sent, emitted)
+
+    if not emitted:
+        return pl.DataFrame([])
+
+    # --- Step 4: restore the serial row order and decode ---
+    slot_idx = np.concatenate([e[0] for e in emitted])
+    quantity = np.concatenate([e[1] for e in emitted])
+    pass_id = np.concatenate([e[2] for e in emitted])
+    pass_rank = np.concatenate([e[3] for e in emitted])
+    order = np.lexsort((pass_rank, pass_id, gid[slot_idx], g_day[gid[slot_idx]]))
+    slot_idx, quantity, pass_id = slot_idx[order], quantity[order], pass_id[order]
+
+    count(
+        units_by_priority=dict(zip(PRIORITIES, np.bincount(pass_id, weights=quantity, minlength=len(PRIORITIES)))),
+        allocations_by_priority=dict(zip(PRIORITIES, np.bincount(pass_id, minlength=len(PRIORITIES)))),
+    )
+
+    picked = slots[slot_idx]
+    # coded inputs (see src.ids) get coded priorities back
+    if picked.schema["item_id"].is_integer():
+        priority = pl.Series(np.array([PRIORITY_CODES[p] for p in PRIORITIES], dtype=np.int32)[pass_id])
+    else:
+        priority = np.array(PRIORITIES)[pass_id]
+    return pl.DataFrame({
+        "day": picked["day"].cast(pl.Int64),
+        "plant_id": picked["plant_id"],
+        "item_id": picked["item_id"],
+        "store_id": picked["store_id"],
+        "quantity": quantity,
+        "arrival_day": (picked["day"] + picked["transit_time_days"]).cast(pl.Int64),
+        "priority": priority,
+    })
+
+
+def _allocate_batch(batch, gid, rank, g_size, g_qty, arrays, sent, emitted):
+    """Run the four passes for one wave of groups (slot indices in `batch`)."""
+    store = arrays["store"][batch]
+    item = arrays["item"][batch]
+    demand = arrays["demand"][batch]
+    safety = arrays["safety"][batch]
+    local = np.cumsum(np.r_[True, gid[batch][1:] != gid[batch][:-1]]) - 1
+    remaining = g_qty[gid[batch][np.r_[True, local[1:] != local[:-1]]]].copy()
+    rank = rank[batch]
+
+    def greedy(candidates, need, pass_id, sort_key=None):
+        # Sequential "send min(need, remaining) until nothing is left", run one
+        # rank position at a time across all groups of the batch.
+        if candidates.size == 0:
+            return
+        if sort_key is not None:
+            candidates = candidates[np.argsort(sort_key[candidates], kind="stable")]
+            candidates = candidates[np.argsort(local[candidates], kind="stable")]
+        grp = local[candidates]
+        starts = np.flatnonzero(np.r_[True, grp[1:] != grp[:-1]])
+        pos = np.arange(candidates.size) - np.repeat(starts, np.diff(np.r_[starts, candidates.size]))
+        by_pos = np.argsort(pos, kind="stable")
+        cuts = np.searchsorted(pos[by_pos], np.arange(pos.max() + 2))
+        for r in range(len(cuts) - 1):
+            idx = candidates[by_pos[cuts[r]:cuts[r + 1]]]
+            idx = idx[remaining[local[idx]] > 0]
+            if idx.size == 0:
+                continue
+            send = np.minimum(need[idx], remaining[local[idx]])
+            remaining[local[idx]] -= send
+            sent[store[idx], item[idx]] += send
+            emitted.append((batch[idx], send, np.full(idx.size, pass_id), np.full(idx.size, r)))
+
+    every = np.arange(batch.size)
+
+    # PASS 1: critical risk - stockout within transit time + 2 days
+    current = arrays["projection"][batch] + sent[store, item]
+    days_until_oos = np.full(batch.size, 999.0)
+    np.divide(current, demand, out=days_until_oos, where=demand > 0)
+    risk_period = arrays["transit"][batch] + 2
+    need = np.maximum(0, risk_period * demand - current)
+    greedy(every[days_until_oos < risk_period], need, 0, sort_key=days_until_oos)
+
+    # PASS 2: fill safety stock gaps in store order
+    effective = arrays["projection"][batch] + sent[store, item]
+    greedy(every[effective < safety], safety - effective, 1)
+
+    # PASS 3: stores below 2x safety stock, lowest buffer first
+    effective = arrays["projection"][batch] + sent[store, item]
+    buffer_ratio = np.ones(batch.size)
+    np.divide(effective, safety, out=buffer_ratio, where=safety > 0)
+    need = np.maximum(0, 2.0 * safety - effective)
+    greedy(every[buffer_ratio < 2.0], need, 2, sort_key=buffer_ratio)
+
+    # PASS 4: spread whatever is left by demand share, last store takes the rest
+    open_groups = remaining > 0
+    if not open_groups.any():
+        return
+    size = g_size[gid[batch][np.r_[True, local[1:] != local[:-1]]]]
+    total = np.zeros(remaining.size)
+    distributed = np.zeros(remaining.size)
+    leftover = every[open_groups[local]]
+    leftover = leftover[np.argsort(rank[leftover], kind="stable")]
+    cuts = np.searchsorted(rank[leftover], np.arange(rank[leftover].max() + 2))
+    for r in range(len(cuts) - 1):
+        idx = leftover[cuts[r]:cuts[r + 1]]
+        total[local[idx]] += demand[idx]
+    for g in np.flatnonzero(open_groups & (size >= _POLARS_SEQUENTIAL_SUM)):
+        total[g] = pl.Series(demand[local == g]).sum()
+
+    for r in range(len(cuts) - 1):
+        idx = leftover[cuts[r]:cuts[r + 1]]
+        grp = local[idx]
+        allocated = np.where(
+            total[grp] > 0,
+            remaining[grp] * (demand[idx] / np.where(total[grp] > 0, total[grp], 1)),
+            remaining[grp] / size[grp],
+        )
+        last = rank[idx] == size[grp] - 1
+        allocated[last] = remaining[grp[last]] - distributed[grp[last]]
+        distributed[grp[~last]] += allocated[~last]
+        idx, allocated = idx[allocated > 0], allocated[allocated > 0]
+        sent[store[idx], item[idx]] += allocated
+        emitted.append((batch[idx], allocated, np.full(idx.size, 3), rank[idx]))
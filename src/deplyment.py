@@ -1,6 +1,8 @@
 import polars as pl
 from collections import defaultdict
 
+from src.instrument import count
+
 def accurate_deployment(production_plan, demand_data, max_days=45):
     """TRACK SENT STOCK VERSION - Avoids over-sending and covers all risks"""
     
@@ -36,169 +38,8 @@ def accurate_deployment(production_plan, demand_data, max_days=45):
             if stores.height == 0:
                 continue
             
+            _allocate_to_stores(deployments, sent_to_store, day, plant, item, qty, stores.rows(named=True))
 
-            remaining = qty
-            
-            # PASS 1: CRITICAL RISK - Stores that will be OUT OF STOCK soon
-            critical_stores = []
-            for store in stores.iter_rows(named=True):
-                store_id = store["store_id"]
-                
-                # Calculate what's already coming to this store
-                key = (store_id, item)
-                already_sent = sent_to_store[key]
-                
-                # Calculate days until stockout considering what we've sent
-                current_stock = store["projection"] + already_sent
-                days_until_oos = current_stock / store["avg_daily_demand"] if store["avg_daily_demand"] > 0 else 999
-                
-                # Critical if will stockout within transit time + 2 days
-                risk_period = store["transit_time_days"] + 2
-                
-                if days_until_oos < risk_period:
-                    need = (risk_period * store["avg_daily_demand"]) - current_stock
-                    critical_stores.append({
-                        "store": store,
-                        "need": max(0, need),
-                        "days_until_oos": days_until_oos
-                    })
-            
- 
-            critical_stores.sort(key=lambda x: x["days_until_oos"])
-            
-            for critical in critical_stores:
-                if remaining <= 0:
-                    break
-                    
-                store = critical["store"]
-                need = critical["need"]
-                send = min(need, remaining)
-                
-                deployments.append({
-                    "day": day, "plant_id": plant, "item_id": item, 
-                    "store_id": store["store_id"], "quantity": send,
-                    "arrival_day": day + store["transit_time_days"], "priority": "critical_risk"
-                })
-                
-                # Update tracking
-                key = (store["store_id"], item)
-                sent_to_store[key] += send
-                remaining -= send
-
-            
-            # PASS 2: Fill safety stock gaps (only if not already addressed)
-            if remaining > 0:
-                for store in stores.iter_rows(named=True):
-                    if remaining <= 0:
-                        break
-                    
-                    store_id = store["store_id"]
-                    key = (store_id, item)
-                    already_sent = sent_to_store[key]
-                    
-                    # Current stock + what we've sent
-                    effective_stock = store["projection"] + already_sent
-                    
-                    # Only fill if still below safety stock after what we've sent
-                    if effective_stock < store["safety_stock_static"]:
-                        need = store["safety_stock_static"] - effective_stock
-                        send = min(need, remaining)
-                        
-                        deployments.append({
-                            "day": day, "plant_id": plant, "item_id": item, 
-                            "store_id": store["store_id"], "quantity": send,
-                            "arrival_day": day + store["transit_time_days"], "priority": "safety_stock"
-                        })
-                        
-                        sent_to_store[key] += send
-                        remaining -= send
-            
-
-            if remaining > 0:
-                high_risk_stores = []
-                for store in stores.iter_rows(named=True):
-                    store_id = store["store_id"]
-                    key = (store_id, item)
-                    already_sent = sent_to_store[key]
-                    effective_stock = store["projection"] + already_sent
-                    
-                    # Calculate risk level (lower buffer = higher risk)
-                    buffer_ratio = effective_stock / store["safety_stock_static"] if store["safety_stock_static"] > 0 else 1
-                    
-                    if buffer_ratio < 2.0:  # Less than 2x safety stock is considered risky
-                        need = (2.0 * store["safety_stock_static"]) - effective_stock
-                        high_risk_stores.append({
-                            "store": store,
-                            "need": max(0, need),
-                            "buffer_ratio": buffer_ratio
-                        })
-                
-                # Send to stores with lowest buffers first
-                high_risk_stores.sort(key=lambda x: x["buffer_ratio"])
-                
-                for risk_store in high_risk_stores:
-                    if remaining <= 0:
-                        break
-                    
-                    store = risk_store["store"]
-                    need = risk_store["need"]
-                    send = min(need, remaining)
-                    
-                    deployments.append({
-                        "day": day, "plant_id": plant, "item_id": item, 
-                        "store_id": store["store_id"], "quantity": send,
-                        "arrival_day": day + store["transit_time_days"], "priority": "buffer_stock"
-                    })
-                    
-                    key = (store["store_id"], item)
-                    sent_to_store[key] += send
-                    remaining -= send
-
-            
-            # PASS 4: Distribute whatever's left (FIXED - no leftovers)
-            if remaining > 0:
-                total_demand = stores["avg_daily_demand"].sum()
-                
-                distributed = 0
-                store_allocation = []
-                
-                for i, store in enumerate(stores.iter_rows(named=True)):
-                    if total_demand > 0:
-                        share = store["avg_daily_demand"] / total_demand
-                        allocated = remaining * share
-                    else:
-                        allocated = remaining / len(stores)
-                    
-                    # Last store gets whatever's left to avoid rounding errors
-                    if i == len(stores) - 1:
-                        allocated = remaining - distributed
-                    else:
-                        distributed += allocated
-                    
-                    store_allocation.append({
-                        "store": store,
-                        "allocated": allocated
-                    })
-                
-                for allocation in store_allocation:
-                    store = allocation["store"]
-                    send = allocation["allocated"]
-                    
-                    if send > 0:
-                        deployments.append({
-                            "day": day, "plant_id": plant, "item_id": item, 
-                            "store_id": store["store_id"], "quantity": send,
-                            "arrival_day": day + store["transit_time_days"], "priority": "leftover"
-                        })
-                        
-                        key = (store["store_id"], item)
-                        sent_to_store[key] += send
-
-                
-                remaining = 0
-            
-
-    
     # FINAL REPORT
     total_production = production_plan.filter(pl.col("day") <= max_days)["production_quantity"].sum()
     deployment_df = pl.DataFrame(deployments)
@@ -209,5 +50,207 @@ def accurate_deployment(production_plan, demand_data, max_days=45):
     else:
         total_deployed = 0
     
-    
-    return deployment_df
\ No newline at end of file
+    count(total_production=total_production, total_deployed=total_deployed)
+    return deployment_df
+
+
+def accurate_deployment_indexed(production_plan, demand_data, max_days=45):
+    """Partition-once version of `accurate_deployment` with identical output.
+
+    The production plan is split by day and the demand outlook by
+    (plant_id, item_id, day) in a single pass each, so every production row
+    looks up its stores in a dict instead of filtering the whole outlook.
+    """
+
+    deployments = []
+    sent_to_store = defaultdict(float)
+
+    # --- Partition the plan by day (plan order kept within a day) ---
+    prod_by_day = defaultdict(list)
+    in_horizon = production_plan.filter((pl.col("day") >= 1) & (pl.col("day") <= max_days))
+    for prod in in_horizon.iter_rows(named=True):
+        prod_by_day[prod["day"]].append(prod)
+
+    # --- Index the demand outlook: (plant, item, day) -> store rows ---
+    stores_by_key = defaultdict(list)
+    in_horizon = demand_data.filter((pl.col("day") >= 1) & (pl.col("day") <= max_days))
+    for store in in_horizon.iter_rows(named=True):
+        stores_by_key[(store["plant_id"], store["item_id"], store["day"])].append(store)
+
+    for day in range(1, max_days + 1):
+        for prod in prod_by_day.get(day, ()):
+            plant = prod["plant_id"]
+            item = prod["item_id"]
+            qty = prod["production_quantity"] + prod["starting_inventory_plant"]
+
+            if qty <= 0:
+                continue
+
+            stores = stores_by_key.get((plant, item, day))
+            if not stores:
+                continue
+
+            _allocate_to_stores(deployments, sent_to_store, day, plant, item, qty, stores)
+
+    return pl.DataFrame(deployments)
+
+
+def _allocate_to_stores(deployments, sent_to_store, day, plant, item, qty, stores):
+    """Run the four allocation passes for one (plant, item, day) production row.
+
+    `stores` is the list of demand rows (dicts) served by the plant for that
+    item and day. Appends to `deployments` and updates `sent_to_store` in place.
+    """
+    remaining = qty
+
+    # PASS 1: CRITICAL RISK - Stores that will be OUT OF STOCK soon
+    critical_stores = []
+    for store in stores:
+        store_id = store["store_id"]
+
+        # Calculate what's already coming to this store
+        key = (store_id, item)
+        already_sent = sent_to_store[key]
+
+        # Calculate days until stockout considering what we've sent
+        current_stock = store["projection"] + already_sent
+        days_until_oos = current_stock / store["avg_daily_demand"] if store["avg_daily_demand"] > 0 else 999
+
+        # Critical if will stockout within transit time + 2 days
+        risk_period = store["transit_time_days"] + 2
+
+        if days_until_oos < risk_period:
+            need = (risk_period * store["avg_daily_demand"]) - current_stock
+            critical_stores.append({
+                "store": store,
+                "need": max(0, need),
+                "days_until_oos": days_until_oos
+            })
+
+    critical_stores.sort(key=lambda x: x["days_until_oos"])
+
+    for critical in critical_stores:
+        if remaining <= 0:
+            break
+
+        store = critical["store"]
+        need = critical["need"]
+        send = min(need, remaining)
+
+        deployments.append({
+            "day": day, "plant_id": plant, "item_id": item,
+            "store_id": store["store_id"], "quantity": send,
+            "arrival_day": day + store["transit_time_days"], "priority": "critical_risk"
+        })
+
+        # Update tracking
+        key = (store["store_id"], item)
+        sent_to_store[key] += send
+        remaining -= send
+
+    # PASS 2: Fill safety stock gaps (only if not already addressed)
+    if remaining > 0:
+        for store in stores:
+            if remaining <= 0:
+                break
+
+            store_id = store["store_id"]
+            key = (store_id, item)
+            already_sent = sent_to_store[key]
+
+            # Current stock + what we've sent
+            effective_stock = store["projection"] + already_sent
+
+            # Only fill if still below safety stock after what we've sent
+            if effective_stock < store["safety_stock_static"]:
+                need = store["safety_stock_static"] - effective_stock
+                send = min(need, remaining)
+
+                deployments.append({
+                    "day": day, "plant_id": plant, "item_id": item,
+                    "store_id": store["store_id"], "quantity": send,
+                    "arrival_day": day + store["transit_time_days"], "priority": "safety_stock"
+                })
+
+                sent_to_store[key] += send
+                remaining -= send
+
+    # PASS 3: Stores below 2x safety stock, lowest buffer first
+    if remaining > 0:
+        high_risk_stores = []
+        for store in stores:
+            store_id = store["store_id"]
+            key = (store_id, item)
+            already_sent = sent_to_store[key]
+            effective_stock = store["projection"] + already_sent
+
+            # Calculate risk level (lower buffer = higher risk)
+            buffer_ratio = effective_stock / store["safety_stock_static"] if store["safety_stock_static"] > 0 else 1
+
+            if buffer_ratio < 2.0:  # Less than 2x safety stock is considered risky
+                need = (2.0 * store["safety_stock_static"]) - effective_stock
+                high_risk_stores.append({
+                    "store": store,
+                    "need": max(0, need),
+                    "buffer_ratio": buffer_ratio
+                })
+
+        # Send to stores with lowest buffers first
+        high_risk_stores.sort(key=lambda x: x["buffer_ratio"])
+
+        for risk_store in high_risk_stores:
+            if remaining <= 0:
+                break
+
+            store = risk_store["store"]
+            need = risk_store["need"]
+            send = min(need, remaining)
+
+            deployments.append({
+                "day": day, "plant_id": plant, "item_id": item,
+                "store_id": store["store_id"], "quantity": send,
+                "arrival_day": day + store["transit_time_days"], "priority": "buffer_stock"
+            })
+
+            key = (store["store_id"], item)
+            sent_to_store[key] += send
+            remaining -= send
+
+    # PASS 4: Distribute whatever's left (FIXED - no leftovers)
+    if remaining > 0:
+        total_demand = pl.Series([s["avg_daily_demand"] for s in stores]).sum()
+
+        distributed = 0
+        store_allocation = []
+
+        for i, store in enumerate(stores):
+            if total_demand > 0:
+                share = store["avg_daily_demand"] / total_demand
+                allocated = remaining * share
+            else:
+                allocated = remaining / len(stores)
+
+            # Last store gets whatever's left to avoid rounding errors
+            if i == len(stores) - 1:
+                allocated = remaining - distributed
+            else:
+                distributed += allocated
+
+            store_allocation.append({
+                "store": store,
+                "allocated": allocated
+            })
+
+        for allocation in store_allocation:
+            store = allocation["store"]
+            send = allocation["allocated"]
+
+            if send > 0:
+                deployments.append({
+                    "day": day, "plant_id": plant, "item_id": item,
+                    "store_id": store["store_id"], "quantity": send,
+                    "arrival_day": day + store["transit_time_days"], "priority": "leftover"
+                })
+
+                key = (store["store_id"], item)
+                sent_to_store[key] += send
@@ -0,0 +1,83 @@
+import multiprocessing
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import polars as pl
+
+SERIES_KEYS = ["item_id", "store_id", "cat_id", "dept_id"]
+
+
+def forecast_sku_store(ts, forecast_horizon=45, seasonal_periods=7):
+    """Additive Holt-Winters forecast for one (item, store) sales series."""
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    model = ExponentialSmoothing(
+        np.asarray(ts, dtype=float),
+        trend="add",
+        seasonal="add",
+        seasonal_periods=seasonal_periods
+    )
+    fit = model.fit()
+    return fit.forecast(forecast_horizon)
+
+
+def _forecast_chunk(series, forecast_horizon, seasonal_periods, quiet):
+    with warnings.catch_warnings():
+        if quiet:
+            warnings.simplefilter("ignore")
+        return np.vstack([forecast_sku_store(ts, forecast_horizon, seasonal_periods) for ts in series])
+
+
+def forecast_all(sales_long, forecast_horizon=45, seasonal_periods=7, max_workers=None,
+                 chunk_size=250, quiet=True):
+    """Fit one Exponential Smoothing model per (item, store) series in parallel.
+
+    Series are sent to a process pool in chunks of `chunk_size`; with
+    `max_workers=1` everything runs in this process. Every series is fitted
+    exactly as in `forecast_sku_store`, so the result equals the notebook's
+    serial groupby loop (deterministic fits; tolerance 0).
+
+    Parameters
+    ----------
+    sales_long : pl.DataFrame
+        Long sales history with ['item_id','store_id','cat_id','dept_id','date','sales']
+    quiet : bool
+        Silence statsmodels convergence warnings inside the fits.
+
+    Returns
+    -------
+    pl.DataFrame
+        ['item_id','store_id','cat_id','dept_id','day','forecast_sales'] with
+        negative forecasts clipped to 0, sorted by series keys and day.
+    """
+    series = (
+        sales_long
+        .sort("date")
+        .group_by(SERIES_KEYS, maintain_order=True)
+        .agg(pl.col("sales").cast(pl.Float64))
+        .sort(SERIES_KEYS)
+    )
+    history = [np.asarray(ts) for ts in series["sales"].to_list()]
+    chunks = [history[i:i + chunk_size] for i in range(0, len(history), chunk_size)]
+
+    if max_workers == 1 or len(chunks) <= 1:
+        results = [_forecast_chunk(chunk, forecast_horizon, seasonal_periods, quiet) for chunk in chunks]
+    else:
+        # spawn: forking a process that already runs Polars threads can deadlock
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(_forecast_chunk, chunks,
+                                    [forecast_horizon] * len(chunks),
+                                    [seasonal_periods] * len(chunks),
+                                    [quiet] * len(chunks)))
+
+    values = np.vstack(results) if results else np.empty((0, forecast_horizon))
+
+    return (
+        series.select(SERIES_KEYS)
+        .select([pl.col(key).repeat_by(forecast_horizon).explode() for key in SERIES_KEYS])
+        .with_columns([
+            pl.Series("day", np.tile(np.arange(1, forecast_horizon + 1), series.height)),
+            pl.Series("forecast_sales", np.clip(values.ravel(), 0, None)),
+        ])
+    )
@@ -0,0 +1,98 @@
+"""Dense int32 codes for the id columns, assigned once at load time.
+
+Codes follow the sorted order of the string ids, so sorting or grouping
+on codes gives the same row order as on the strings and engine outputs
+decode to exactly the string-keyed results.
+
+    coded, registry = encode_inputs(load_inputs(root))
+    sim = simulate_plan(coded["prod_plan"], coded)
+    report = decode_ids(sim["deployment_outlook"], registry)
+"""
+import polars as pl
+
+ID_COLUMNS = ["plant_id", "store_id", "item_id", "cat_id"]
+
+# Fixed vocabulary for the deployment priorities (sorted, code = position)
+PRIORITY_LABELS = ["buffer_stock", "critical_risk", "leftover", "safety_stock"]
+PRIORITY_CODES = {label: code for code, label in enumerate(PRIORITY_LABELS)}
+
+
+def is_coded(frame, column="item_id"):
+    """True if `column` of `frame` holds integer codes."""
+    return column in frame.columns and frame.schema[column].is_integer()
+
+
+def build_registry(frames, columns=ID_COLUMNS):
+    """Sorted vocabulary per id column over all `frames` (code = position).
+
+    Returns
+    -------
+    dict[str, pl.Series]
+        Column name -> labels; 'priority' always maps to PRIORITY_LABELS.
+    """
+    registry = {}
+    for column in columns:
+        values = [frame.lazy().select(pl.col(column).cast(pl.String).unique()).collect().to_series()
+                  for frame in frames if column in frame.collect_schema()]
+        if values:
+            registry[column] = pl.concat(values).drop_nulls().unique().sort().rename(column)
+    registry["priority"] = pl.Series("priority", PRIORITY_LABELS)
+    return registry
+
+
+def encode_ids(frame, registry):
+    """Replace the registered id columns of `frame` (eager or lazy) by their Int32 codes."""
+    schema = frame.collect_schema()
+    exprs = []
+    for column, labels in registry.items():
+        if column in schema and not schema[column].is_integer():
+            exprs.append(
+                pl.col(column).cast(pl.String)
+                .replace_strict(labels, pl.int_range(labels.len(), dtype=pl.Int32, eager=True),
+                                return_dtype=pl.Int32)
+            )
+    return frame.with_columns(exprs) if exprs else frame
+
+
+def decode_ids(frame, registry):
+    """Turn the coded id columns of `frame` back into strings (reporting step).
+
+    Only Int32 columns are decoded, so e.g. the Int64 'priority' rank of the
+    rating frame is left alone.
+    """
+    schema = frame.collect_schema()
+    exprs = []
+    for column, labels in registry.items():
+        if column in schema and schema[column] == pl.Int32:
+            exprs.append(
+                pl.col(column)
+                .replace_strict(pl.int_range(labels.len(), dtype=pl.Int32, eager=True), labels,
+                                return_dtype=pl.String)
+            )
+    return frame.with_columns(exprs) if exprs else frame
+
+
+def encode_inputs(inputs, columns=ID_COLUMNS):
+    """Build one registry over all input frames (eager or lazy) and encode every frame with it.
+
+    Returns
+    -------
+    (dict[str, pl.DataFrame], dict[str, pl.Series])
+        Coded inputs and the registry for `decode_ids`.
+    """
+    registry = build_registry(list(inputs.values()), columns)
+    return {name: encode_ids(frame, registry) for name, frame in inputs.items()}, registry
+
+
+def encode_labels(values, registry, column):
+    """Codes for a list of string ids (e.g. a plant filter); None stays None."""
+    if values is None:
+        return None
+    single = isinstance(values, str)
+    codes = (
+        pl.Series(column, [values] if single else list(values), dtype=pl.String)
+        .replace_strict(registry[column], pl.int_range(registry[column].len(), dtype=pl.Int32, eager=True),
+                        return_dtype=pl.Int32)
+        .to_list()
+    )
+    return codes[0] if single else codes
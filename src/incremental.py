@@ -0,0 +1,96 @@
+import polars as pl
+
+from src.deployment_kernel import accurate_deployment_vectorized
+from src.instrument import instrumented
+from src.pipeline import pallet_summary, shipped_by_lane
+from src.projection import build_risk_projection
+from src.transport_truck import simulate_truck_allocation
+
+
+def changed_items(plan_before, plan_after, tolerance=0.0):
+    """(plant_id, item_id) pairs whose production differs on any day."""
+    keys = ["plant_id", "item_id", "day"]
+    diff = (
+        plan_before.select(keys + [pl.col("production_quantity").alias("qty_before")])
+        .join(plan_after.select(keys + [pl.col("production_quantity").alias("qty_after")]),
+              on=keys, how="full", coalesce=True)
+        .with_columns([pl.col("qty_before").fill_null(0), pl.col("qty_after").fill_null(0)])
+        .filter((pl.col("qty_before") - pl.col("qty_after")).abs() > tolerance)
+    )
+    return diff.select(["plant_id", "item_id"]).unique().sort(["plant_id", "item_id"])
+
+
+def incremental_resimulate(baseline, plan_before, plan_after, inputs, max_days=45, truck_capacity=34.0):
+    """Re-simulate only what a plan change can reach and splice it into `baseline`.
+
+    `baseline` is the `simulate_plan` output for `plan_before` with the same
+    `max_days`. Deployment state is tracked per (store, item), so a changed
+    item is re-deployed from every plant that makes it. Truck loading is
+    re-run for the lanes those items ship on, and the projection for every
+    (store, item) on those lanes. The result has the same rows as a full
+    `simulate_plan(plan_after, ...)`; the deployment rows are ordered by day.
+    Run-log records (src.instrument) cover only the re-simulated part.
+    """
+    changed = changed_items(plan_before, plan_after)
+    if changed.height == 0:
+        return dict(baseline, changed_items=changed)
+    items = changed.select("item_id").unique()
+
+    # --- Deployment for the changed item chains ---
+    new_deployments = instrumented(
+        "deployment", accurate_deployment_vectorized,
+        plan_after.join(items, on="item_id", how="semi"),
+        inputs["demand_outlook"].join(items, on="item_id", how="semi"),
+        max_days=max_days,
+    )
+    kept = baseline["deployments"].join(items, on="item_id", how="anti")
+    deployments = pl.concat([kept, new_deployments], how="diagonal_relaxed").sort("day", maintain_order=True)
+
+    # --- Truck loading for every lane those chains touch (before or after) ---
+    lanes = baseline["deployments"].join(items, on="item_id", how="semi").select(["plant_id", "store_id"])
+    if new_deployments.height:
+        lanes = pl.concat([lanes, new_deployments.select(["plant_id", "store_id"])])
+    lanes = lanes.unique()
+    lane_deployments = deployments.join(lanes, on=["plant_id", "store_id"], how="semi")
+    if lane_deployments.height:
+        pallets = instrumented("pallets", pallet_summary, lane_deployments, inputs["pal_size_df"])
+        truck_out = instrumented("trucks", simulate_truck_allocation, pallets, truck_capacity=truck_capacity)
+        lane_outlook = instrumented("shipped", shipped_by_lane, truck_out)
+    else:
+        lane_outlook = baseline["deployment_outlook"].clear()
+    deployment_outlook = pl.concat([
+        baseline["deployment_outlook"].join(lanes, on=["plant_id", "store_id"], how="anti"),
+        lane_outlook.select(baseline["deployment_outlook"].columns),
+    ], how="vertical_relaxed")
+
+    # --- Projection for every (store, item) served by those lanes ---
+    series = (
+        pl.concat([
+            baseline["deployment_outlook"].join(lanes, on=["plant_id", "store_id"], how="semi")
+            .select(["store_id", "item_id"]),
+            lane_outlook.select(["store_id", "item_id"]),
+            inputs["demand_outlook"].join(items, on="item_id", how="semi").select(["store_id", "item_id"]),
+        ])
+        .unique()
+    )
+    projection = instrumented(
+        "projection", build_risk_projection,
+        inputs["demand_outlook"].join(series, on=["store_id", "item_id"], how="semi"),
+        deployment_outlook.join(series, on=["store_id", "item_id"], how="semi"),
+        inputs["lane_rules"],
+        max_day=max_days,
+    )
+    projection = (
+        pl.concat([
+            baseline["projection"].join(series, on=["store_id", "item_id"], how="anti"),
+            projection,
+        ])
+        .sort(["item_id", "store_id", "day"])
+    )
+
+    return {
+        "deployments": deployments,
+        "deployment_outlook": deployment_outlook,
+        "projection": projection,
+        "changed_items": changed,
+    }
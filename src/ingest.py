@@ -0,0 +1,180 @@
+"""Lazy M5 ingestion: only the needed window, stores and items reach memory.
+
+    history = load_history("Input M5", stores=DEFAULT_STORES, sample_items=150, history_days=365,
+                           cache_dir=".stage_cache")
+    prices = load_prices("Input M5", items=history["item_id"].unique())   # every store, sampled items
+
+`sales_train_evaluation.csv` is scanned, not read: the item sample is drawn
+from the four id columns, then the scan keeps only the last `history_days`
+'d_' columns and the store / item filters before the wide -> long unpivot.
+'d_N' maps to a date by arithmetic on the calendar start (d_1), not by a
+join on string day keys. The long table is streamed once into an Arrow IPC
+file under `cache_dir` (keyed by the parameters and the size / mtime of the
+M5 files), so later runs read it back instead of parsing the CSV again.
+With `sample_items=None` the whole catalog of the stores is kept.
+
+    python -m src.ingest --m5-dir "Input M5" --cache-dir .stage_cache --sample-items 0   # full catalog
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import polars as pl
+
+from src.cache import CACHE_DIR, _atomic_write, evict
+from src.instrument import count
+
+ID_COLUMNS = ["item_id", "dept_id", "cat_id", "store_id"]
+
+M5_FILES = {
+    "sales": "sales_train_evaluation.csv",
+    "calendar": "calendar.csv",
+    "prices": "sell_prices.csv",
+}
+
+
+def scan_m5(m5_dir="Input M5"):
+    """Lazy scans of the three M5 files (nothing is read until collected)."""
+    return {name: pl.scan_csv(os.path.join(m5_dir, file_name)) for name, file_name in M5_FILES.items()}
+
+
+def day_columns(sales, history_days=None):
+    """The 'd_N' columns of a sales scan in day order (header only), the last `history_days` of them."""
+    days = sorted((c for c in sales.collect_schema().names() if c.startswith("d_")), key=lambda c: int(c[2:]))
+    return days[-history_days:] if history_days else days
+
+
+def calendar_start(calendar):
+    """Date of d_1: the first calendar row."""
+    return calendar.lazy().select(pl.col("date").first().str.to_date()).collect().item()
+
+
+def day_to_date(start, column="day"):
+    """'d_N' -> start + N - 1 days, as an expression."""
+    return (pl.lit(start) + pl.duration(days=pl.col(column).str.slice(2).cast(pl.Int32) - 1)).alias("date")
+
+
+def sample_item_ids(ids, sample_items=150, seed=42):
+    """Items per (dept, category) in proportion to the assortment (notebook 01 sample).
+
+    `ids` holds at least 'dept_id', 'cat_id' and 'item_id'; items are sorted
+    before every draw, so a seed gives the same sample. `sample_items=None`
+    keeps every item.
+    """
+    ids = ids.select(["dept_id", "cat_id", "item_id"]).unique()
+    if sample_items is None:
+        return ids.select("item_id").sort("item_id")
+    sku_count = (
+        ids.group_by(["dept_id", "cat_id"])
+        .agg(pl.col("item_id").n_unique().alias("n_items"))
+        .sort(["dept_id", "cat_id"])
+    )
+    total = sku_count["n_items"].sum()
+    sampled = []
+    for row in sku_count.iter_rows(named=True):
+        items = (
+            ids.filter((pl.col("dept_id") == row["dept_id"]) & (pl.col("cat_id") == row["cat_id"]))
+            .select("item_id").unique().sort("item_id")
+        )
+        k = min(int(round(row["n_items"] / total * sample_items)), items.height)
+        sampled.append(items.sample(n=k, seed=seed))
+    return pl.concat(sampled).unique()
+
+
+def scan_history(m5_dir="Input M5", stores=None, sample_items=150, history_days=365, seed=42):
+    """Lazy long sales history: one row per (item, store, day) with its date.
+
+    Columns: 'item_id', 'dept_id', 'cat_id', 'store_id', 'day' ('d_N'),
+    'sales', 'date'.
+    """
+    m5 = scan_m5(m5_dir)
+    sales = m5["sales"]
+    if stores is not None:
+        sales = sales.filter(pl.col("store_id").is_in(list(stores)))
+
+    # --- Step 1: item sample from the id columns only ---
+    items = sample_item_ids(sales.select(ID_COLUMNS).unique().collect(), sample_items=sample_items, seed=seed)
+
+    # --- Step 2: window + filters pushed into the scan, then unpivot ---
+    days = day_columns(m5["sales"], history_days)
+    return (
+        sales.select(ID_COLUMNS + days)
+        .join(items.lazy(), on="item_id", how="semi")
+        .unpivot(index=ID_COLUMNS, on=days, variable_name="day", value_name="sales")
+        .with_columns(day_to_date(calendar_start(m5["calendar"])))
+    )
+
+
+def history_key(m5_dir, **params):
+    """Cache key of an ingestion: the parameters and the size / mtime of the M5 files."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    for file_name in M5_FILES.values():
+        stat = os.stat(os.path.join(m5_dir, file_name))
+        digest.update(f"{file_name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def load_history(m5_dir="Input M5", stores=None, sample_items=150, history_days=365, seed=42, cache_dir=None,
+                 max_bytes=None):
+    """`scan_history` collected, through an Arrow IPC file in `cache_dir` when given.
+
+    The first run streams the long table to '<cache_dir>/m5_history/<key>.arrow'
+    (bounded memory, the table is never fully built before writing); later
+    runs with the same parameters and M5 files read that file.
+    """
+    params = {"stores": None if stores is None else list(stores), "sample_items": sample_items,
+              "history_days": history_days, "seed": seed}
+    if cache_dir is None:
+        return scan_history(m5_dir, **params).collect(engine="streaming")
+
+    folder = os.path.join(cache_dir, "m5_history")
+    path = os.path.join(folder, history_key(m5_dir, **params) + ".arrow")
+    if os.path.exists(path):
+        os.utime(path)
+        count(cache_hits=1)
+        return pl.scan_ipc(path).collect()
+
+    start = time.perf_counter()
+    os.makedirs(folder, exist_ok=True)
+    _atomic_write(path, lambda tmp: scan_history(m5_dir, **params).sink_ipc(tmp, compression="zstd"))
+    count(cache_misses=1)
+    print(f"🗄️ M5 history cached in {time.perf_counter() - start:.1f}s -> {path}")
+    evict(cache_dir, max_bytes)
+    return pl.scan_ipc(path).collect()
+
+
+def load_prices(m5_dir="Input M5", stores=None, items=None):
+    """Latest weekly price per (store, item), filtered in the scan (see `src.dataprep.latest_prices`)."""
+    from src.dataprep import latest_prices
+
+    prices = scan_m5(m5_dir)["prices"]
+    if stores is not None:
+        prices = prices.filter(pl.col("store_id").is_in(list(stores)))
+    if items is not None:
+        prices = prices.join(pl.LazyFrame({"item_id": list(items)}, schema={"item_id": pl.String}), on="item_id",
+                             how="semi")
+    return latest_prices(prices).collect(engine="streaming")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan the M5 files into the long sales history cache")
+    parser.add_argument("--m5-dir", default="Input M5")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--stores", nargs="+", default=None, help="store ids (default: all)")
+    parser.add_argument("--sample-items", type=int, default=150, help="0 keeps every item")
+    parser.add_argument("--history-days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    history = load_history(args.m5_dir, stores=args.stores, sample_items=args.sample_items or None,
+                           history_days=args.history_days, seed=args.seed, cache_dir=args.cache_dir)
+    print(f"✅ {history.height:,} rows, {history['item_id'].n_unique()} items x {history['store_id'].n_unique()} stores "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Per-stage run log: wall time, peak RSS, rows in/out and engine counters.
+
+    with stage("deployment", rows_in=plan.height):
+        deployments = accurate_deployment_vectorized(plan, demand_outlook)
+    write_run_log("run_log.json")
+
+`instrumented(stage, fn, *args, **kwargs)` does the same for one call and
+counts the rows of the frame arguments and of the result. Engines add
+their counters with `count(...)` (units per priority, trucks per lane,
+cut totals); outside a stage `count` does nothing.
+
+Environment:
+    SIM_INSTRUMENT=0          switch the log off
+    SIM_PROFILE=deployment,trucks | all
+                              profile these stages without code edits
+    SIM_PROFILER=cprofile | pyinstrument
+    SIM_PROFILE_DIR=profiles  where .prof / .html files go
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+
+import polars as pl
+
+ENABLED = os.environ.get("SIM_INSTRUMENT", "1") != "0"
+PROFILE_DIR = os.environ.get("SIM_PROFILE_DIR", "profiles")
+
+LOG_COLUMNS = {"stage": pl.String, "scenario": pl.String, "start": pl.Float64, "seconds": pl.Float64, "peak_rss_mb": pl.Float64,
+               "rows_in": pl.Int64, "rows_out": pl.Int64, "rows_per_second": pl.Float64,
+               "counters": pl.String}
+
+_RECORDS = []
+_ACTIVE = []
+
+
+def is_pandas(value):
+    """True for a pandas DataFrame; pandas is only consulted if something already imported it."""
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(value, pd.DataFrame)
+
+
+def _rss_peak_mb():
+    # VmHWM can be reset per stage (see _reset_peak); ru_maxrss is the process peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def _reset_peak():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _profiled_stages():
+    value = os.environ.get("SIM_PROFILE", "")
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+@contextlib.contextmanager
+def _profile(name):
+    stages = _profiled_stages()
+    if name not in stages and "all" not in stages:
+        yield
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{len(_RECORDS)}")
+    if os.environ.get("SIM_PROFILER", "cprofile") == "pyinstrument":
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(path + ".html", "w") as f:
+                f.write(profiler.output_html())
+    else:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path + ".prof")
+
+
+@contextlib.contextmanager
+def stage(name, rows_in=None):
+    """Time one stage and collect its counters; yields the log record."""
+    if not ENABLED:
+        yield {}
+        return
+    record = {"stage": name, "start": time.time(), "rows_in": rows_in, "rows_out": None, "counters": {}}
+    _ACTIVE.append(record)
+    _reset_peak()
+    start = time.perf_counter()
+    try:
+        with _profile(name):
+            yield record
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        record["peak_rss_mb"] = max(filter(None, [_rss_peak_mb(), record.pop("_inner_peak", None)]), default=None)
+        rows = record["rows_out"] if record["rows_out"] is not None else record["rows_in"]
+        record["rows_per_second"] = rows / record["seconds"] if rows and record["seconds"] > 0 else None
+        _ACTIVE.pop()
+        if _ACTIVE:
+            # a nested stage reset the peak; keep the outer stage's maximum
+            outer = _ACTIVE[-1]
+            outer["_inner_peak"] = max(filter(None, [outer.get("_inner_peak"), record["peak_rss_mb"]]), default=None)
+        _RECORDS.append(record)
+
+
+def count(**values):
+    """Add counters to the innermost running stage (numbers add up, dicts merge)."""
+    if not _ACTIVE:
+        return
+    counters = _ACTIVE[-1]["counters"]
+    for key, value in values.items():
+        if isinstance(value, dict):
+            target = counters.setdefault(key, {})
+            for sub, amount in value.items():
+                target[str(sub)] = target.get(str(sub), 0) + _plain(amount)
+        else:
+            counters[key] = counters.get(key, 0) + _plain(value)
+
+
+def _plain(value):
+    # numpy scalars -> Python numbers, so the log stays JSON serializable
+    return value.item() if hasattr(value, "item") else value
+
+
+def _rows(value):
+    if isinstance(value, pl.DataFrame):
+        return value.height
+    if is_pandas(value):
+        return len(value)
+    return None
+
+
+def instrumented(name, fn, *args, **kwargs):
+    """Return `fn(*args, **kwargs)`, logged as stage `name`."""
+    if not ENABLED:
+        return fn(*args, **kwargs)
+    rows_in = [_rows(value) for value in list(args) + list(kwargs.values())]
+    rows_in = [rows for rows in rows_in if rows is not None]
+    with stage(name, rows_in=sum(rows_in) if rows_in else None) as record:
+        result = fn(*args, **kwargs)
+        record["rows_out"] = _rows(result)
+    return result
+
+
+def run_log(reset=False):
+    """The stage records of this process as a frame (counters as JSON)."""
+    rows = [{**{key: record.get(key) for key in LOG_COLUMNS}, "counters": json.dumps(record["counters"])}
+            for record in _RECORDS]
+    if reset:
+        _RECORDS.clear()
+    return pl.DataFrame(rows, schema=LOG_COLUMNS)
+
+
+def extend_run_log(rows, scenario=None):
+    """Append records collected elsewhere (the `run_log()` rows of a worker process)."""
+    for row in rows:
+        _RECORDS.append({**row, "scenario": scenario, "counters": json.loads(row["counters"] or "{}")})
+
+
+def write_run_log(path, reset=False):
+    """Write the run log as JSON (one object per stage) or CSV, by extension."""
+    if path.endswith(".csv"):
+        run_log(reset=reset).write_csv(path)
+        return path
+    records = [{key: record.get(key) for key in LOG_COLUMNS} for record in _RECORDS]
+    with open(path, "w") as f:
+        json.dump(records, f, indent=1)
+    if reset:
+        _RECORDS.clear()
+    return path
@@ -0,0 +1,61 @@
+import polars as pl
+
+
+def item_prices(price_df):
+    """Average sell price per item, as used for the dollar KPIs."""
+    return price_df.group_by("item_id").agg([
+        pl.mean("sell_price").round(2).alias("avg_sell_price")
+    ])
+
+
+def scenario_kpis(projection_df, production_plan, deployment_outlook, prices,
+                  kpi_day=30, truck_capacity=34.0):
+    """Day-`kpi_day` dashboard figures from notebook 03 as a flat dict.
+
+    `prices` is the output of `item_prices`. Risk figures are read on day
+    `kpi_day`; production and deployment are summed over days 1..kpi_day.
+    """
+    # --- Risk dashboard (SS / OOS / CFR) ---
+    risk = (
+        projection_df
+        .join(prices, on="item_id", how="left")
+        .with_columns(pl.col("forecast_sales").cum_sum().over(["item_id", "store_id"]).alias("cum_forecast"))
+        .filter(pl.col("day") == kpi_day)
+        .select([
+            pl.sum("SS_risk_peak").alias("ss_risk_units"),
+            pl.sum("OOS_risk_peak").alias("oos_risk_units"),
+            (pl.sum("SS_risk_peak") * pl.mean("avg_sell_price")).alias("ss_risk_dollar"),
+            (pl.sum("OOS_risk_peak") * pl.mean("avg_sell_price")).alias("oos_risk_dollar"),
+            pl.sum("safety_stock_static").alias("total_ss_units"),
+            pl.sum("cum_forecast").alias("total_demand"),
+            (100 * (1 - (pl.sum("OOS_risk_peak").abs() / pl.sum("cum_forecast")))).alias("cfr_pct"),
+        ])
+    )
+
+    # --- Production overview ---
+    production = (
+        production_plan
+        .filter(pl.col("day") <= kpi_day)
+        .join(prices, on="item_id", how="left")
+        .select([
+            pl.sum("production_quantity").alias("production_units"),
+            (pl.col("production_quantity") * pl.col("avg_sell_price")).sum().alias("production_value"),
+        ])
+    )
+
+    # --- Deployment summary ---
+    deployment = (
+        deployment_outlook
+        .filter(pl.col("day") <= kpi_day)
+        .join(prices, on="item_id", how="left")
+        .select([
+            pl.sum("qty_sent").alias("units_shipped"),
+            (pl.col("qty_sent") * pl.col("avg_sell_price")).sum().alias("value_shipped"),
+            (pl.sum("pallets_sent") / truck_capacity).alias("trucks_sent"),
+        ])
+    )
+
+    kpis = {}
+    for frame in (risk, production, deployment):
+        kpis.update(frame.row(0, named=True))
+    return kpis
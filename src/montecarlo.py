@@ -0,0 +1,278 @@
+"""Monte Carlo demand uncertainty: SS / OOS risk and CFR as distributions.
+
+    mc = monte_carlo_risk(inputs["demand_outlook"], n_paths=1000, cv=0.3,
+                          deployment_outlook=sim["deployment_outlook"], lane_rules=inputs["lane_rules"],
+                          prices=item_prices(inputs["price_df"]))
+    mc["summary"]     # mean / std / percentiles of the dashboard figures
+    mc["paths"]       # one row per demand path
+    mc["series"]      # SS / OOS peak percentiles and stockout probability per (store, item)
+
+Demand paths are drawn around `forecast_sales` per (store, item, day) and
+the inventory projection runs for all paths at once on a
+[path x series x day] array, `chunk_paths` paths at a time. Shipments
+either stay fixed (`deployment_outlook`, e.g. from `simulate_plan`) or are
+re-deployed per path from `production_plan`: every path gets its own item
+codes, so one `deploy_slots` call allocates all paths of a chunk in the
+same (day, wave) batches. Re-deployed shipments land at deployment day +
+transit time: trucks (full-pallet loads, carryover to the next day) are not
+simulated per path.
+
+With `cv=0` the fixed mode reproduces `scenario_kpis` of the same
+shipments. The re-deployed mode is an approximation: without truck limits
+goods arrive earlier and in full, so risk reads low (on the 150 x 5 x 45
+synthetic network ~4% less SS risk units than `simulate_plan` +
+`scenario_kpis`). Compare its paths with a `cv=0` re-deployed run, not with
+the deterministic dashboard.
+"""
+import numpy as np
+import polars as pl
+
+from src.deployment_kernel import deploy_slots, store_slots
+from src.instrument import count, stage
+
+ERROR_MODELS = ["normal", "lognormal", "poisson"]
+PATH_METRICS = ["ss_risk_units", "oos_risk_units", "total_demand", "cfr_pct"]
+
+
+def draw_demand(forecast, path, error_model="normal", cv=0.3, rho=0.0, seed=42):
+    """One demand path around `forecast` (series x day).
+
+    Each path has its own generator seeded with (seed, path), so a path is
+    the same whatever chunk it is drawn in.
+
+    Parameters
+    ----------
+    error_model : str
+        'normal'    forecast * max(0, 1 + cv * e)
+        'lognormal' forecast * exp(s * e - s^2 / 2), s^2 = log(1 + cv^2) (mean kept)
+        'poisson'   Poisson(forecast); `cv` and `rho` are not used
+    rho : float
+        Day-to-day correlation of the errors e (AR(1) per series).
+    """
+    rng = np.random.default_rng([seed, path])
+    if error_model == "poisson":
+        return rng.poisson(forecast).astype(np.float64)
+    errors = rng.standard_normal(forecast.shape)
+    if rho:
+        scale = np.sqrt(1 - rho ** 2)
+        for day in range(1, errors.shape[1]):
+            errors[:, day] = rho * errors[:, day - 1] + scale * errors[:, day]
+    if error_model == "normal":
+        return forecast * np.maximum(0.0, 1.0 + cv * errors)
+    if error_model == "lognormal":
+        sigma = np.sqrt(np.log1p(cv ** 2))
+        return forecast * np.exp(sigma * errors - sigma ** 2 / 2)
+    raise ValueError(f"Unknown error_model '{error_model}', expected one of {ERROR_MODELS}")
+
+
+def _series_grid(demand_outlook, horizon):
+    """Dense (series x day) arrays of the outlook; series in projection order (item, store)."""
+    demand = (
+        demand_outlook.lazy()
+        .filter(pl.col("day").is_between(1, horizon))
+        .select(["store_id", "item_id", "plant_id", "day", "forecast_sales", "SOG_initial",
+                 "safety_stock_static", "projection"])
+        .collect()
+    )
+    series = (
+        demand.select(["store_id", "item_id"]).unique()
+        .sort(["item_id", "store_id"])
+        .with_columns([
+            pl.int_range(pl.len(), dtype=pl.Int64).alias("series"),
+            (pl.col("store_id").rank("dense") - 1).cast(pl.Int64).alias("store_code"),
+            (pl.col("item_id").rank("dense") - 1).cast(pl.Int64).alias("item_code"),
+        ])
+    )
+    rows = demand.join(series, on=["store_id", "item_id"], how="left")
+    n = series.height
+    flat = rows["series"].to_numpy() * horizon + rows["day"].to_numpy() - 1
+
+    def dense(column):
+        values = np.zeros(n * horizon)
+        values[flat] = rows[column].to_numpy().astype(np.float64)
+        return values.reshape(n, horizon)
+
+    present = np.zeros(n * horizon, dtype=bool)
+    present[flat] = True
+    return series, {
+        "forecast": dense("forecast_sales"),
+        "sog": dense("SOG_initial"),
+        "safety": dense("safety_stock_static"),
+        "projection": dense("projection"),
+        "present": present.reshape(n, horizon),
+    }
+
+
+def _fixed_arrivals(series, deployment_outlook, lane_rules, horizon):
+    """Shipments of one plan as (series x day) arrivals (ship day + transit time)."""
+    arrivals = np.zeros((series.height, horizon))
+    shipped = (
+        deployment_outlook.lazy()
+        .select(["day", "plant_id", "store_id", "item_id", "qty_sent"])
+        .join(lane_rules.lazy().select(["plant_id", "store_id", "transit_time_days"]).unique(),
+              on=["plant_id", "store_id"], how="left")
+        .with_columns((pl.col("day") + pl.col("transit_time_days")).alias("arrival_day"))
+        .filter(pl.col("arrival_day").is_between(1, horizon))
+        .join(series.lazy().select(["store_id", "item_id", "series"]), on=["store_id", "item_id"], how="inner")
+        .collect()
+    )
+    np.add.at(arrivals, (shipped["series"].to_numpy(), shipped["arrival_day"].to_numpy() - 1),
+              shipped["qty_sent"].to_numpy())
+    return arrivals
+
+
+def _redeploy_arrivals(slots, series, grid, demand):
+    """Re-run the deployment for every path of a chunk in one `deploy_slots` call.
+
+    Path p gets item codes p * n_items + item, so its groups never share
+    state with another path's and the (day, wave) batches hold all paths.
+    """
+    n_paths, n_series, horizon = demand.shape
+    n_stores = int(series["store_code"].max()) + 1
+    n_items = int(series["item_code"].max()) + 1
+    slot_series = slots["series"].to_numpy()
+    slot_day = slots["day"].to_numpy() - 1
+
+    # projection as the outlook has it, shifted by the path's cumulative forecast error
+    drift = np.cumsum(demand - grid["forecast"], axis=2)
+    expanded = pl.concat([
+        slots.with_columns([
+            pl.Series("projection", grid["projection"][slot_series, slot_day] - drift[p, slot_series, slot_day]),
+            (pl.col("plan_pos") * n_paths + p).alias("plan_pos"),
+            (pl.col("item_code") + p * n_items).alias("item_code"),
+        ])
+        for p in range(n_paths)
+    ]).sort(["day", "plan_pos", "demand_pos"])
+    # deploy_slots reports ids as given; hand it the codes so paths can be read back
+    expanded = expanded.with_columns([pl.col("item_code").alias("item_id"), pl.col("store_code").alias("store_id")])
+
+    sent = np.zeros((n_stores, n_paths * n_items))
+    deployments = deploy_slots(expanded, sent)
+    arrivals = np.zeros(demand.shape)
+    if deployments.height == 0:
+        return arrivals
+    lookup = np.full((n_stores, n_items), -1, dtype=np.int64)
+    lookup[series["store_code"].to_numpy(), series["item_code"].to_numpy()] = series["series"].to_numpy()
+    code = deployments["item_id"].to_numpy()
+    arrival = deployments["arrival_day"].to_numpy() - 1
+    keep = arrival < horizon
+    path, item = code[keep] // n_items, code[keep] % n_items
+    np.add.at(arrivals, (path, lookup[deployments["store_id"].to_numpy()[keep], item], arrival[keep]),
+              deployments["quantity"].to_numpy()[keep])
+    count(units_deployed=deployments["quantity"].sum())
+    return arrivals
+
+
+def _project(demand, arrivals, grid, kpi_day):
+    """Inventory, risk peaks and day-`kpi_day` demand for a chunk of paths."""
+    inventory = np.cumsum(grid["sog"] - demand + arrivals, axis=2)
+    ss_risk = np.where(grid["present"] & (inventory < grid["safety"]), inventory - grid["safety"], 0.0)
+    oos_risk = np.where(grid["present"] & (inventory < 0), inventory, 0.0)
+    return ss_risk.min(axis=2), oos_risk.min(axis=2), demand[:, :, :kpi_day].sum(axis=2)
+
+
+def monte_carlo_risk(demand_outlook, n_paths=1000, error_model="normal", cv=0.3, rho=0.0, seed=42,
+                     deployment_outlook=None, lane_rules=None, production_plan=None, prices=None,
+                     max_day=None, kpi_day=30, percentiles=(5, 50, 95), chunk_paths=None, max_mb=512):
+    """Distributions of the day-`kpi_day` risk figures over `n_paths` demand paths.
+
+    Parameters
+    ----------
+    demand_outlook : pl.DataFrame | pl.LazyFrame
+        Store outlook as for `build_risk_projection` (plus 'projection' when re-deploying).
+    deployment_outlook, lane_rules : pl.DataFrame | None
+        Fixed shipments per lane and their transit times.
+    production_plan : pl.DataFrame | None
+        Re-deploy this plan on every path instead (needs the outlook's
+        'plant_id', 'avg_daily_demand' and 'transit_time_days'); no trucks,
+        so risk is biased low against the dashboard (see module docstring).
+    prices : pl.DataFrame | None
+        `item_prices` output; adds the dollar figures as in `scenario_kpis`.
+    chunk_paths : int | None
+        Paths per array batch; by default sized to about `max_mb` MB.
+
+    Returns
+    -------
+    dict
+        'paths' (one row per path), 'summary' (mean, std, percentiles per
+        metric) and 'series' (peak percentiles and P(OOS) per store/item).
+    """
+    if error_model not in ERROR_MODELS:
+        raise ValueError(f"Unknown error_model '{error_model}', expected one of {ERROR_MODELS}")
+    if (production_plan is None) == (deployment_outlook is None):
+        raise ValueError("Pass either deployment_outlook (fixed shipments) or production_plan (re-deployed)")
+    if deployment_outlook is not None and lane_rules is None:
+        raise ValueError("Fixed shipments need lane_rules for the transit times")
+
+    horizon = max_day or demand_outlook.lazy().select(pl.col("day").max()).collect().item()
+    kpi_day = min(kpi_day, horizon)
+    series, grid = _series_grid(demand_outlook, horizon)
+    n_series = series.height
+
+    # --- Shipments: one array for all paths, or deployment slots to re-run per path ---
+    fixed, slots = None, None
+    if deployment_outlook is not None:
+        fixed = _fixed_arrivals(series, deployment_outlook, lane_rules, horizon)
+    else:
+        slots = (
+            store_slots(production_plan, demand_outlook.lazy().collect(), max_days=horizon)
+            .join(series.select(["store_id", "item_id", "series", "store_code", "item_code"]),
+                  on=["store_id", "item_id"], how="left")
+        )
+
+    if chunk_paths is None:
+        # demand, drift, inventory and two risk arrays of float64 per path
+        chunk_paths = max(1, int(max_mb * 2 ** 20 // (n_series * horizon * 8 * 6)))
+
+    ss_peak = np.empty((n_paths, n_series))
+    oos_peak = np.empty((n_paths, n_series))
+    kpi_demand = np.empty((n_paths, n_series))
+    with stage("montecarlo", rows_in=n_series * horizon) as record:
+        for first in range(0, n_paths, chunk_paths):
+            paths = range(first, min(first + chunk_paths, n_paths))
+            demand = np.stack([draw_demand(grid["forecast"], p, error_model, cv=cv, rho=rho, seed=seed)
+                               for p in paths])
+            arrivals = fixed if fixed is not None else _redeploy_arrivals(slots, series, grid, demand)
+            chunk = slice(paths.start, paths.stop)
+            ss_peak[chunk], oos_peak[chunk], kpi_demand[chunk] = _project(demand, arrivals, grid, kpi_day)
+        count(paths=n_paths, chunks=-(-n_paths // chunk_paths))
+        record["rows_out"] = n_paths
+
+    # --- Dashboard figures per path (series on the outlook at kpi_day, as scenario_kpis) ---
+    on_kpi_day = grid["present"][:, kpi_day - 1]
+    paths = pl.DataFrame({
+        "path": np.arange(n_paths),
+        "ss_risk_units": ss_peak[:, on_kpi_day].sum(axis=1),
+        "oos_risk_units": oos_peak[:, on_kpi_day].sum(axis=1),
+        "total_demand": kpi_demand[:, on_kpi_day].sum(axis=1),
+    }).with_columns(
+        (100 * (1 - pl.col("oos_risk_units").abs() / pl.col("total_demand"))).alias("cfr_pct")
+    )
+    metrics = list(PATH_METRICS)
+    if prices is not None:
+        price = (
+            series.filter(pl.Series(on_kpi_day))
+            .join(prices, on="item_id", how="left")["avg_sell_price"].mean()
+        )
+        paths = paths.with_columns([
+            (pl.col("ss_risk_units") * price).alias("ss_risk_dollar"),
+            (pl.col("oos_risk_units") * price).alias("oos_risk_dollar"),
+        ])
+        metrics += ["ss_risk_dollar", "oos_risk_dollar"]
+
+    summary = pl.DataFrame([
+        {"metric": metric, "mean": paths[metric].mean(), "std": paths[metric].std(),
+         **{f"p{q:g}": paths[metric].quantile(q / 100, interpolation="linear") for q in percentiles}}
+        for metric in metrics
+    ])
+
+    # --- Per (store, item): peak percentiles over paths and stockout probability ---
+    series_stats = series.select(["store_id", "item_id"]).with_columns(
+        [pl.Series(f"SS_risk_peak_p{q:g}", np.percentile(ss_peak, q, axis=0)) for q in percentiles]
+        + [pl.Series(f"OOS_risk_peak_p{q:g}", np.percentile(oos_peak, q, axis=0)) for q in percentiles]
+        + [pl.Series("oos_probability", (oos_peak < 0).mean(axis=0))]
+    )
+
+    print(f"🎲 {n_paths:,} demand paths ({error_model}, cv={cv:g}) over {n_series:,} series x {horizon} days; "
+          f"median CFR {paths['cfr_pct'].median():.2f}%")
+    return {"paths": paths, "summary": summary, "series": series_stats}
@@ -0,0 +1,198 @@
+import os
+
+import polars as pl
+
+from src.cache import cached_call
+from src.deployment_kernel import accurate_deployment_vectorized
+from src.instrument import instrumented
+from src.kpi import item_prices
+from src.projection import build_risk_projection
+from src.rating import build_rating
+from src.store import read_stage
+from src.transport_truck import simulate_truck_allocation
+
+# Notebook artifacts the simulation stages read (relative to the project root)
+INPUT_FILES = {
+    "pal_size_df": "Symulation data/pal_size_df.csv",
+    "demand_outlook": "Symulation data/demand_outlook.csv",
+    "lane_rules": "Symulation data/lane_rules.csv",
+    "prod_master": "Symulation data/prod_master.csv",
+    "price_df": "Symulation data/price.csv",
+    "prod_plan": "Data/Prod_Plan_Before.csv",
+}
+
+
+def load_inputs(root=".", store_root=None):
+    """Read the notebook CSV artifacts into a dict of Polars frames.
+
+    With `store_root` the frames come from the 'base' scenario of the
+    columnar store (see `src.store`) instead, already typed.
+    """
+    if store_root is not None:
+        return {name: read_stage(store_root, "base", name) for name in INPUT_FILES}
+    inputs = {name: pl.read_csv(os.path.join(root, path)) for name, path in INPUT_FILES.items()}
+    inputs["demand_outlook"] = inputs["demand_outlook"].with_columns(pl.col("date").str.to_date())
+    return inputs
+
+
+def _stage(cache_dir, stage, fn, *args, **kwargs):
+    # run a stage directly, or through the on-disk stage cache when a directory is given;
+    # either way it lands in the run log (see src.instrument)
+    if cache_dir is None:
+        return instrumented(stage, fn, *args, **kwargs)
+    return instrumented(stage, cached_call, stage, fn, *args, cache_dir=cache_dir, **kwargs)
+
+
+def pallet_summary(deployments, pal_size_df):
+    """Deployment rows -> pallets per (day, plant, item, store, priority)."""
+    return (
+        deployments
+        .join(pal_size_df.select(["plant_id", "pallet_size"]), on="plant_id", how="left")
+        .with_columns((pl.col("quantity") / pl.col("pallet_size")).alias("pallet_exact"))
+        .group_by(["day", "plant_id", "item_id", "store_id", "priority", "pallet_size"])
+        .agg([
+            pl.col("pallet_exact").sum().alias("store_pallet_total"),
+            pl.col("quantity").sum().alias("deployment_qty"),
+        ])
+        .sort(["day", "plant_id", "store_id", "item_id", "priority"])
+    )
+
+
+def shipped_by_lane(truck_out):
+    """Truck allocation rows -> shipped qty / pallets per (day, lane, item)."""
+    return (
+        truck_out
+        .group_by(["day", "plant_id", "store_id", "item_id", "pallet_size"], maintain_order=True)
+        .agg([
+            pl.col("qty_sent").sum().alias("qty_sent"),
+            pl.col("pallets_sent").sum().alias("pallets_sent"),
+        ])
+    )
+
+
+def simulate_plan(plan, inputs, max_days=45, truck_capacity=34.0, cache_dir=None, executor=None):
+    """Deployment -> truck loading -> risk projection for one production plan.
+
+    With `cache_dir` every stage is memoized on disk (see `src.cache`). With
+    a `src.sharding.ShardExecutor` the deployment and truck stages run as
+    item / lane shards on its process pool (same output).
+    """
+    if executor is not None:
+        from src.sharding import sharded_deployment, sharded_trucks
+
+        deploy, trucks, shards = sharded_deployment, sharded_trucks, {"executor": executor}
+    else:
+        deploy, trucks, shards = accurate_deployment_vectorized, simulate_truck_allocation, {}
+    deployments = _stage(cache_dir, "deployment", deploy,
+                         plan, inputs["demand_outlook"], max_days=max_days, **shards)
+    if deployments.height == 0:
+        ids = deployments.schema
+        truck_out = pl.DataFrame(schema={"day": pl.Int64, "plant_id": ids["plant_id"], "store_id": ids["store_id"],
+                                         "item_id": ids["item_id"], "pallet_size": pl.Float64,
+                                         "qty_sent": pl.Float64, "pallets_sent": pl.Float64})
+    else:
+        pallets = _stage(None, "pallets", pallet_summary, deployments, inputs["pal_size_df"])
+        truck_out = _stage(cache_dir, "trucks", trucks, pallets, truck_capacity=truck_capacity, **shards)
+    deployment_outlook = _stage(None, "shipped", shipped_by_lane, truck_out)
+    projection = _stage(cache_dir, "projection", build_risk_projection,
+                        inputs["demand_outlook"], deployment_outlook, inputs["lane_rules"], max_day=max_days)
+    return {
+        "deployments": deployments,
+        "deployment_outlook": deployment_outlook,
+        "projection": projection,
+    }
+
+
+def build_cut_input(plan, projection_df, inputs, cache_dir=None, rating_weights=None):
+    """Production plan joined with plant-level risk, price and health score
+    (the frame notebook 03 hands to `apply_production_cut`).
+
+    `rating_weights` override the health-score weights (see `src.rating.HEALTH_WEIGHTS`).
+    """
+    price_df = inputs["price_df"]
+
+    rate_df = (
+        projection_df
+        .join(plan.select(["plant_id", "item_id", "day", "production_quantity"]),
+              how="left", on=["plant_id", "item_id", "day"])
+        .join(price_df.select(["store_id", "item_id", "sell_price"]), how="left", on=["store_id", "item_id"])
+        .select(["store_id", "item_id", "plant_id", "day", "forecast_sales",
+                 "safety_stock_static", "inv_projection", "SS_risk_projection", "OOS_risk_projection",
+                 "OOS_risk_peak", "SS_risk_peak", "production_quantity", "sell_price"])
+    )
+    rating_df = _stage(cache_dir, "rating", build_rating, rate_df, weights=rating_weights)
+
+    plant_risk_df = (
+        rate_df.group_by(["plant_id", "item_id", "day"])
+        .agg([
+            pl.sum("forecast_sales").alias("total_daily_requirement"),
+            pl.sum("SS_risk_peak").alias("SS_risk_peak"),
+            pl.sum("OOS_risk_peak").alias("OOS_risk_peak"),
+        ])
+    )
+    plant_price_df = (
+        price_df.join(rate_df.select(["store_id", "plant_id"]).unique(), on="store_id", how="left")
+        .group_by(["plant_id", "item_id"])
+        .agg(pl.col("sell_price").mean().alias("sell_price"))
+    )
+
+    return (
+        plan.join(plant_risk_df, on=["plant_id", "item_id", "day"], how="left")
+        .join(plant_price_df, on=["plant_id", "item_id"], how="left")
+        .join(rating_df, on=["plant_id", "item_id"], how="left")
+    )
+
+
+def splice_cut(plan, cut_plan):
+    """Write cut quantities back into the full plan; rows outside the cut
+    scope (other plants, days past the horizon) keep their quantity."""
+    cut_qty = cut_plan.select(["plant_id", "item_id", "day",
+                               pl.col("production_quantity").alias("cut_quantity")])
+    return (
+        plan.join(cut_qty, on=["plant_id", "item_id", "day"], how="left")
+        .with_columns(pl.coalesce(["cut_quantity", "production_quantity"]).alias("production_quantity"))
+        .drop("cut_quantity")
+        .sort(["plant_id", "item_id", "day"])
+    )
+
+
+def run_cut_scenario(cut_input, plan, inputs, cut_type="%", cut_value=10.0, plant_filter=None,
+                     horizon_days=None, max_days=30, truck_capacity=34.0, baseline=None, method="heuristic",
+                     executor=None):
+    """Production cut -> deployment -> trucks -> projection for one scenario.
+
+    If `baseline` (the `simulate_plan` output for `plan` with the same
+    `max_days`) is given, only the items the cut changed are re-simulated.
+    `method` is passed to the cut ("heuristic" or "optimize"); `executor`
+    shards a full re-simulation (see `simulate_plan`). Returns the spliced
+    post-cut plan and the simulation frames.
+    """
+    from src.prod_cut import apply_production_cut_vectorized  # pandas engine, loaded on first cut
+
+    cut_plan = _stage(
+        None, "cut", apply_production_cut_vectorized,
+        production_plan_df=cut_input.to_pandas(),
+        cut_type=cut_type,
+        cut_value=cut_value,
+        horizon_days=horizon_days,
+        plant_filter=plant_filter,
+        method=method,
+    )
+    plan_after = splice_cut(plan, pl.from_pandas(cut_plan))
+    if baseline is not None:
+        from src.incremental import incremental_resimulate
+        return plan_after, incremental_resimulate(baseline, plan, plan_after, inputs,
+                                                  max_days=max_days, truck_capacity=truck_capacity)
+    return plan_after, simulate_plan(plan_after, inputs, max_days=max_days, truck_capacity=truck_capacity,
+                                     executor=executor)
+
+
+def prepare_baseline(inputs, truck_capacity=34.0, cache_dir=None, executor=None):
+    """Simulate the uncut plan over the full outlook and build the cut input."""
+    plan = inputs["prod_plan"]
+    horizon = inputs["demand_outlook"]["day"].max()
+    baseline = simulate_plan(plan, inputs, max_days=horizon, truck_capacity=truck_capacity, cache_dir=cache_dir,
+                             executor=executor)
+    baseline["cut_input"] = build_cut_input(plan, baseline["projection"], inputs, cache_dir=cache_dir)
+    baseline["prices"] = item_prices(inputs["price_df"])
+    return baseline
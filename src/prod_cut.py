@@ -1,32 +1,20 @@
+import numpy as np
 import pandas as pd
 
-def apply_production_cut(
-    production_plan_df: pd.DataFrame,
-    cut_type: str = "%",
-    cut_value: float = 5.0,
-    horizon_days: list = None,
-    min_cut_unit: float = 0.01,
-    max_iter: int = 10,
-    plant_filter: str | list[str] | None = None,  # ✅ new argument
-) -> pd.DataFrame:
-    """
-    Apply a production cut (by % or units), respecting MOQ and cycle_days.
-    Redistribute sub-MOQ runs and guarantee total cut precision.
+from src.cut_optimizer import optimize_cut
+from src.instrument import count
 
-    Parameters
-    ----------
-    production_plan_df : pd.DataFrame
-        Must include ['plant_id','item_id','day','production_quantity','MOQ_units','cycle_days']
-    plant_filter : str | list[str] | None
-        If set, apply cut only to that plant or list of plants.
-        If None → applies to ALL plants (full scope).
-    """
 
+def _cut_scope(production_plan_df, cut_type, cut_value, horizon_days, plant_filter):
+    """Plant/horizon scope, item-day order and target cut shared by the cut engines.
+
+    `target_cut` is None when the scope has nothing to cut.
+    """
     df = production_plan_df.copy()
 
     # --- Optional filter by plant ---
     if plant_filter is not None:
-        if isinstance(plant_filter, str):
+        if isinstance(plant_filter, (str, int, np.integer)):  # one plant id or code
             plant_filter = [plant_filter]
         df = df[df["plant_id"].isin(plant_filter)].copy()
         if df.empty:
@@ -46,8 +34,7 @@ def apply_production_cut(
 
     total_prod = df["production_quantity"].sum()
     if total_prod <= 0:
-        print("⚠️ No production quantity to cut in selected scope.")
-        return df
+        return df, plant_filter, total_prod, None
 
     # --- Determine total target cut ---
     if cut_type == "%":
@@ -57,6 +44,79 @@ def apply_production_cut(
     else:
         raise ValueError("cut_type must be '%' or 'units'")
 
+    return df, plant_filter, total_prod, target_cut
+
+
+def _finish_cut(df, total_prod, target_cut, plant_filter):
+    """Round `new_qty` to 0.1 units into production_quantity and report the cut."""
+    # --- Final assignment ---
+    df["new_qty"] = (df["new_qty"] / 0.1).round() * 0.1
+    df["production_quantity"] = df["new_qty"].round(3)
+    df.drop(columns=["target_cut", "new_qty"], inplace=True, errors="ignore")
+
+    total_after = df["production_quantity"].sum()
+    achieved_cut = total_prod - total_after
+    count(units_before=total_prod, units_after=total_after, target_cut=target_cut, achieved_cut=achieved_cut)
+    print(
+        f"✅ Applied cut: {achieved_cut:.2f} / Target: {target_cut:.2f} "
+        f"({achieved_cut/target_cut*100:.1f}%) for plants: {plant_filter or 'ALL'}"
+    )
+
+    return df
+
+
+def _optimized_cut(df, total_prod, target_cut, plant_filter):
+    """method="optimize": MILP allocation of the cut, then the usual rounding/report."""
+    df["new_qty"], report = optimize_cut(df, total_prod - target_cut)
+    df = _finish_cut(df, total_prod, target_cut, plant_filter)
+    print(
+        f"🧮 Solver: {report['solver']} ({report['status']}) in {report['solve_time']:.3f}s | "
+        f"gap: {report['mip_gap']:.4%} | residual: {report['residual']:.2f}"
+    )
+    df.attrs["cut_report"] = report
+    count(solve_seconds=report["solve_time"])
+    return df
+
+
+def apply_production_cut(
+    production_plan_df: pd.DataFrame,
+    cut_type: str = "%",
+    cut_value: float = 5.0,
+    horizon_days: list = None,
+    min_cut_unit: float = 0.01,
+    max_iter: int = 10,
+    plant_filter: str | list[str] | None = None,  # ✅ new argument
+    method: str = "heuristic",
+) -> pd.DataFrame:
+    """
+    Apply a production cut (by % or units), respecting MOQ and cycle_days.
+    Redistribute sub-MOQ runs and guarantee total cut precision.
+
+    Parameters
+    ----------
+    production_plan_df : pd.DataFrame
+        Must include ['plant_id','item_id','day','production_quantity','MOQ_units','cycle_days']
+    plant_filter : str | list[str] | None
+        If set, apply cut only to that plant or list of plants.
+        If None → applies to ALL plants (full scope).
+    method : str
+        "heuristic" (health-score weights + MOQ merge-back + rescale) or
+        "optimize" (minimum projected SS/OOS dollar loss, see
+        `src.cut_optimizer.optimize_cut`). The optimizer's solve report is
+        left in `df.attrs["cut_report"]`.
+    """
+    if method not in ("heuristic", "optimize"):
+        raise ValueError("method must be 'heuristic' or 'optimize'")
+
+    df, plant_filter, total_prod, target_cut = _cut_scope(
+        production_plan_df, cut_type, cut_value, horizon_days, plant_filter
+    )
+    if target_cut is None:
+        print("⚠️ No production quantity to cut in selected scope.")
+        return df
+    if method == "optimize":
+        return _optimized_cut(df, total_prod, target_cut, plant_filter)
+
     # --- Initial proportional cut by health_score ---
     weights = (1 - df["health_score"] + 1e-9)
     weights = weights / weights.sum()
@@ -104,16 +164,83 @@ def apply_production_cut(
             if 0 < df.at[i, "new_qty"] < moq:
                 df.at[i, "new_qty"] = moq
 
-    # --- Final assignment ---
-    df["new_qty"] = (df["new_qty"] / 0.1).round() * 0.1
-    df["production_quantity"] = df["new_qty"].round(3)
-    df.drop(columns=["target_cut", "new_qty"], inplace=True, errors="ignore")
+    return _finish_cut(df, total_prod, target_cut, plant_filter)
 
-    total_after = df["production_quantity"].sum()
-    achieved_cut = total_prod - total_after
-    print(
-        f"✅ Applied cut: {achieved_cut:.2f} / Target: {target_cut:.2f} "
-        f"({achieved_cut/target_cut*100:.1f}%) for plants: {plant_filter or 'ALL'}"
+
+def apply_production_cut_vectorized(
+    production_plan_df: pd.DataFrame,
+    cut_type: str = "%",
+    cut_value: float = 5.0,
+    horizon_days: list = None,
+    min_cut_unit: float = 0.01,
+    max_iter: int = 10,
+    plant_filter: str | list[str] | None = None,
+    method: str = "heuristic",
+) -> pd.DataFrame:
+    """
+    Array version of `apply_production_cut` with the same arguments and output.
+
+    The sub-MOQ merge-back runs over the item-sorted arrays in one pass and
+    gives the same quantities as the row loop. The rescale solves
+    sum(max(qty * scale, MOQ)) = total_prod - target_cut by bisection on the
+    scale factor, so the cut converges whatever `max_iter` is (kept for
+    compatibility, unused) and is limited only by the final 0.1-unit rounding
+    and by the MOQ floors. `method="optimize"` is handled as in
+    `apply_production_cut`.
+    """
+    if method not in ("heuristic", "optimize"):
+        raise ValueError("method must be 'heuristic' or 'optimize'")
+
+    df, plant_filter, total_prod, target_cut = _cut_scope(
+        production_plan_df, cut_type, cut_value, horizon_days, plant_filter
     )
+    if target_cut is None:
+        print("⚠️ No production quantity to cut in selected scope.")
+        return df
+    if method == "optimize":
+        return _optimized_cut(df, total_prod, target_cut, plant_filter)
+
+    # --- Initial proportional cut by health_score ---
+    weights = (1 - df["health_score"] + 1e-9)
+    weights = weights / weights.sum()
+    qty = np.array((df["production_quantity"] - weights * target_cut).clip(lower=0), dtype=float)
+    moq = df["MOQ_units"].to_numpy(dtype=float)
+    items = df["item_id"].to_numpy()
+    first = np.r_[True, items[1:] != items[:-1]]
+    last = np.r_[first[1:], True]
 
-    return df
\ No newline at end of file
+    # --- Redistribute sub-MOQ runs ---
+    # an item's first run merges forward and stays alive at MOQ ...
+    lead = first & ~last & (qty > 0) & (qty < moq)
+    qty[np.flatnonzero(lead) + 1] += qty[lead]
+    # ... every later one merges into the previous day
+    merge = ~first & (qty > 0) & (qty < moq)
+    new_qty = np.where(merge, 0.0, qty)
+    new_qty[lead] = moq[lead]
+    new_qty[np.flatnonzero(merge) - 1] += qty[merge]
+
+    # --- Rescale to the target cut with the MOQ floor ---
+    alive = new_qty > 0
+    goal = total_prod - target_cut
+
+    def floored(scale):
+        scaled = new_qty * scale
+        return np.where(alive & (scaled < moq), moq, scaled)
+
+    total_after = new_qty.sum()
+    if total_after > 0 and abs(total_prod - total_after - target_cut) > min_cut_unit:
+        # floored(s).sum() is continuous and non-decreasing in s, and reaches
+        # the goal by s = goal / total_after
+        lo, hi = 0.0, max(goal / total_after, 0.0)
+        while True:
+            scale = (lo + hi) / 2
+            if scale <= lo or scale >= hi:
+                break
+            if floored(scale).sum() < goal:
+                lo = scale
+            else:
+                hi = scale
+        new_qty = floored(hi)
+
+    df["new_qty"] = new_qty
+    return _finish_cut(df, total_prod, target_cut, plant_filter)
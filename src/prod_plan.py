@@ -1,5 +1,6 @@
 import math
-import pandas as pd
+import numpy as np
+import polars as pl
 
 def build_smarter_production_plan(group):
 
@@ -68,4 +69,99 @@ def build_smarter_production_plan(group):
     group['last_production_day'] = last_production_day
     group['plant_starting_inventory_used'] = starting_inventory
     
-    return group
\ No newline at end of file
+    return group
+
+def build_production_plan(plant_plan, buildup=1.15):
+    """Plan every plant/item group in one call; same result as
+    `build_smarter_production_plan` applied per group.
+
+    Groups are laid out as rows of a padded (group x day) matrix by their
+    offsets in the (plant_id, item_id, day) sorted plan. The planner walks the
+    day positions once and makes each decision for all groups at the same
+    time, carrying stock forward as a running sum instead of adding every run
+    to all later days.
+
+    Parameters
+    ----------
+    plant_plan : pl.DataFrame
+        Must include ['plant_id','item_id','day','total_daily_requirement',
+        'MOQ_units','cycle_days','starting_inventory_plant']
+    """
+    plan = plant_plan.sort(["plant_id", "item_id", "day"], maintain_order=True)
+    n = plan.height
+
+    # --- Group offsets ---
+    keys = plan.select(["plant_id", "item_id"])
+    new_group = np.ones(n, dtype=bool)
+    if n > 1:
+        new_group[1:] = ~(keys[1:].to_numpy() == keys[:-1].to_numpy()).all(axis=1)
+    gid = np.cumsum(new_group) - 1
+    starts = np.flatnonzero(new_group)
+    lengths = np.diff(np.r_[starts, n])
+    pos = np.arange(n) - starts[gid]
+    n_groups, width = len(starts), int(lengths.max()) if n else 0
+
+    def padded(column, fill=0):
+        out = np.full((n_groups, width), fill, dtype=np.float64)
+        out[gid, pos] = plan[column].to_numpy().astype(np.float64)
+        return out
+
+    day = padded("day")
+    requirement = padded("total_daily_requirement")
+    moq = padded("MOQ_units")
+    cycle = padded("cycle_days").astype(np.int64)
+
+    # Starting inventory comes from the day-1 row of each group (0 if missing)
+    starting_inventory = np.zeros(n_groups)
+    day_one = np.flatnonzero(plan["day"].to_numpy() == 1)
+    first_day_one = day_one[np.r_[True, gid[day_one][1:] != gid[day_one][:-1]]] if day_one.size else day_one
+    starting_inventory[gid[first_day_one]] = plan["starting_inventory_plant"].to_numpy()[first_day_one]
+
+    production_stock = np.zeros((n_groups, width))
+    production_quantity = np.zeros((n_groups, width))
+    last_production_day = np.zeros(n_groups)
+    stock = starting_inventory.copy()
+    rows = np.arange(n_groups)
+
+    for i in range(width):
+        active = i < lengths
+
+        # Carry over previous stock, subtract today's demand
+        stock = np.where(active, stock - requirement[:, i], stock)
+
+        can_produce = (last_production_day == 0) | (day[:, i] - last_production_day >= cycle[:, i])
+        produce = active & (stock < 0) & can_produce
+
+        if produce.any():
+            # Total deficit over the next cycle days
+            total_deficit = np.where(produce, np.abs(stock), 0.0)
+            lookahead_end = np.minimum(i + cycle[:, i], lengths)
+            temp_stock = np.zeros(n_groups)
+            for j in range(i + 1, min(i + int(cycle[produce, i].max()), width)):
+                in_window = produce & (j < lookahead_end)
+                temp_stock = np.where(in_window, temp_stock - requirement[:, j], temp_stock)
+                short = in_window & (temp_stock < 0)
+                total_deficit = np.where(short, total_deficit + np.abs(temp_stock), total_deficit)
+                temp_stock = np.where(short, 0.0, temp_stock)
+
+            # MOQ multiples with build-up
+            safe_moq = np.where(moq[:, i] > 0, moq[:, i], 1.0)
+            production_qty = np.where(
+                moq[:, i] > 0,
+                np.ceil(total_deficit / safe_moq) * moq[:, i] * buildup,
+                total_deficit * buildup,
+            )
+            produce &= production_qty > 0
+
+            production_quantity[produce, i] = production_qty[produce]
+            last_production_day = np.where(produce, day[:, i], last_production_day)
+            stock = np.where(produce, stock + production_qty, stock)
+
+        production_stock[rows[active], i] = stock[active]
+
+    return plan.with_columns([
+        pl.Series("production_stock", production_stock[gid, pos]),
+        pl.Series("production_quantity", production_quantity[gid, pos]),
+        pl.Series("last_production_day", last_production_day[gid].astype(np.int64)),
+        pl.Series("plant_starting_inventory_used", starting_inventory[gid]),
+    ])
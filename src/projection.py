@@ -0,0 +1,85 @@
+import polars as pl
+
+
+def risk_projection_plan(demand_outlook, deployment_outlook, lane_rules, max_day=None):
+    """Lazy plan of the store inventory projection with SS / OOS risk (notebook 03 logic).
+
+    Inputs may be DataFrames or LazyFrames (e.g. `pl.scan_ipc`), so the
+    day filter and the column selection are pushed down to the scans.
+
+    Parameters
+    ----------
+    demand_outlook : pl.DataFrame | pl.LazyFrame
+        Store-level outlook with ['store_id','item_id','plant_id','cat_id','day',
+        'date','safety_stock_static','SOG_initial','forecast_sales'], date as pl.Date
+    deployment_outlook : pl.DataFrame | pl.LazyFrame
+        Shipped quantities per ['day','plant_id','store_id','item_id','qty_sent']
+    lane_rules : pl.DataFrame | pl.LazyFrame
+        Transit times per ['plant_id','store_id','transit_time_days']
+    max_day : int | None
+        If set, project only days 1..max_day (peaks are taken over that window).
+    """
+    demand = demand_outlook.lazy()
+    date_map_df = demand.select(["day", "date"]).unique()
+
+    # --- Deliveries land on ship date + transit time ---
+    deliveries = (
+        deployment_outlook.lazy()
+        .select(["day", "plant_id", "store_id", "item_id", "qty_sent"])
+        .join(lane_rules.lazy().select(["plant_id", "store_id", "transit_time_days"]).unique(),
+              how="left", on=["plant_id", "store_id"])
+        .join(date_map_df, how="left", on="day")
+        .with_columns([
+            (pl.col("date") + pl.duration(days=pl.col("transit_time_days"))).alias("delivery_date")
+        ])
+        .group_by(["store_id", "item_id", "delivery_date"])
+        .agg(pl.col("qty_sent").sum())
+    )
+
+    if max_day is not None:
+        demand = demand.filter(pl.col("day") <= max_day)
+
+    return (
+        demand
+        .join(deliveries, how="left", left_on=["store_id", "item_id", "date"],
+              right_on=["store_id", "item_id", "delivery_date"])
+        .select(["store_id", "item_id", "plant_id", "cat_id", "day", "date",
+                 "safety_stock_static", "SOG_initial", "forecast_sales", "qty_sent"])
+        .with_columns([
+            pl.col("qty_sent").fill_null(0)
+        ])
+        .sort(["item_id", "store_id", "day"])
+
+        # --- Running inventory and risk columns ---
+        .with_columns([
+            (pl.col("SOG_initial") - pl.col("forecast_sales") + pl.col("qty_sent")).cum_sum()
+            .over(["item_id", "store_id"])
+            .alias("inv_projection")
+        ])
+        .with_columns([
+            pl.when(pl.col("inv_projection") < pl.col("safety_stock_static"))
+            .then((pl.col("safety_stock_static") - pl.col("inv_projection")) * (-1))
+            .otherwise(0)
+            .alias("SS_risk_projection"),
+
+            pl.when(pl.col("inv_projection") < 0)
+            .then(pl.col("inv_projection"))
+            .otherwise(0)
+            .alias("OOS_risk_projection"),
+        ])
+        .with_columns([
+            pl.col("SS_risk_projection").min().over(["item_id", "store_id"]).alias("SS_risk_peak"),
+            pl.col("OOS_risk_projection").min().over(["item_id", "store_id"]).alias("OOS_risk_peak"),
+        ])
+    )
+
+
+def build_risk_projection(demand_outlook, deployment_outlook, lane_rules, max_day=None, streaming=False):
+    """Collect `risk_projection_plan` in one pass.
+
+    With `streaming=True` the plan runs on Polars' streaming engine, which
+    processes the inputs in batches so the full-horizon, all-store
+    projection stays within bounded memory on large networks.
+    """
+    plan = risk_projection_plan(demand_outlook, deployment_outlook, lane_rules, max_day=max_day)
+    return plan.collect(engine="streaming") if streaming else plan.collect()
@@ -1,86 +1,165 @@
+"""Plant x item health score for the production cut.
+
+    rating_df = build_rating(rate_df)
+
+For repeated scoring keep the per-group aggregates instead:
+
+    aggregates = rating_aggregates(rate_df)
+    aggregates = update_rating_aggregates(aggregates, changed_rows)   # only these groups
+    rating_df = score_rating(aggregates, weights={"revenue": 0.15})
+
+The aggregates hold, per (plant, item), the mean and non-null count of
+every metric plus count / mean / std of 'OOS_risk_projection', so groups
+can be replaced or extended with new rows (`append_rating_rows`) without
+touching the others. Scoring re-normalizes with the min / max over all
+groups, which only reads the aggregates.
+"""
 import polars as pl
 
-def build_rating(rate_df: pl.DataFrame) -> pl.DataFrame:
-    # --- Step 1: Protect against zero SS ---
-    rate_df = rate_df.with_columns([
-        pl.when(pl.col("safety_stock_static") <= 0)
-          .then(0.001)
-          .otherwise(pl.col("safety_stock_static"))
-          .alias("safety_stock_safe")
-    ])
+GROUP_KEYS = ["plant_id", "item_id"]
 
-    # --- Step 2: Calculate daily metrics ---
-    df_metrics = rate_df.with_columns([
-        (pl.col("inv_projection") / pl.col("safety_stock_safe"))
-            .alias("coverage_ratio"),
-        (pl.col("SS_risk_peak").abs() / pl.col("safety_stock_safe"))
-            .alias("relative_risk"),
-        (pl.col("OOS_risk_projection") < 0)
-            .cast(pl.Float64)
-            .alias("stockout_flag"),
-        # NEW A: production vs forecast ratio (guard against /0)
-        (pl.col("production_quantity") / (pl.col("forecast_sales") + 1e-6))
-            .alias("prod_forecast_ratio"),
-        # NEW B: economic weight proxy
-        (pl.col("sell_price") * pl.col("forecast_sales"))
-            .alias("revenue_weight")
-    ])
+# Composite weights; 'revenue' scores 1 - revenue_norm (protect high revenue items)
+HEALTH_WEIGHTS = {
+    "coverage": 0.35,        # supply buffer
+    "risk": 0.25,            # relative risk
+    "stockout": 0.20,        # stockout frequency
+    "prod_forecast": 0.10,   # overproduction = safer
+    "revenue": 0.07,         # protect high revenue items
+    "volatility": 0.03,      # small weight for uncertainty
+}
+
+# Averaged metrics: output column -> normalized column
+MEAN_METRICS = {
+    "avg_coverage_ratio": "coverage_norm",
+    "avg_relative_risk": "risk_norm",
+    "stockout_frequency": "stockout_norm",
+    "avg_prod_forecast_ratio": "prod_forecast_norm",
+    "avg_revenue_weight": "revenue_norm",
+}
+
+RATING_COLUMNS = GROUP_KEYS + list(MEAN_METRICS) + ["risk_volatility", "health_score"]
 
-    # --- Step 3: Aggregate per plant + item ---
-    rating_df = (
-        df_metrics
-        .group_by(["plant_id", "item_id"])
-        .agg([
-            pl.col("coverage_ratio").mean().fill_nan(0).alias("avg_coverage_ratio"),
-            pl.col("relative_risk").mean().fill_nan(0).alias("avg_relative_risk"),
-            pl.col("stockout_flag").mean().fill_nan(0).alias("stockout_frequency"),
-            # NEW A aggregate
-            pl.col("prod_forecast_ratio").mean().fill_nan(0).alias("avg_prod_forecast_ratio"),
-            # NEW B aggregate
-            pl.col("revenue_weight").mean().fill_nan(0).alias("avg_revenue_weight"),
-            # NEW C: risk volatility
-            pl.col("OOS_risk_projection").std().fill_nan(0).alias("risk_volatility"),
-        ])
+
+def _daily_metrics():
+    # --- Per-row metrics, fused into the aggregation (never materialized) ---
+    safety_stock_safe = (
+        pl.when(pl.col("safety_stock_static") <= 0).then(0.001).otherwise(pl.col("safety_stock_static"))
     )
+    return {
+        "avg_coverage_ratio": pl.col("inv_projection") / safety_stock_safe,
+        "avg_relative_risk": pl.col("SS_risk_peak").abs() / safety_stock_safe,
+        "stockout_frequency": (pl.col("OOS_risk_projection") < 0).cast(pl.Float64),
+        # production vs forecast ratio (guard against /0)
+        "avg_prod_forecast_ratio": pl.col("production_quantity") / (pl.col("forecast_sales") + 1e-6),
+        # economic weight proxy
+        "avg_revenue_weight": pl.col("sell_price") * pl.col("forecast_sales"),
+    }
 
-    # --- Step 4: Handle infinities ---
-    rating_df = rating_df.with_columns([
-        pl.when(pl.col("avg_coverage_ratio").is_infinite()).then(0).otherwise(pl.col("avg_coverage_ratio")).alias("avg_coverage_ratio"),
-        
-        pl.when(pl.col("avg_relative_risk").is_infinite()).then(0).otherwise(pl.col("avg_relative_risk")).alias("avg_relative_risk")
-    ])
 
-    # --- Step 5: Normalization helper ---
-    def normalize(expr):
-        min_val = expr.min()
-        max_val = expr.max()
-        return pl.when(max_val - min_val == 0).then(0).otherwise((expr - min_val) / (max_val - min_val))
-
-    # --- Step 6: Normalize all metrics ---
-    rating_df = rating_df.with_columns([
-        normalize(pl.col("avg_coverage_ratio")).alias("coverage_norm"),
-        normalize(pl.col("avg_relative_risk")).alias("risk_norm"),
-        normalize(pl.col("stockout_frequency")).alias("stockout_norm"),
-        normalize(pl.col("avg_prod_forecast_ratio")).alias("prod_forecast_norm"),
-        normalize(pl.col("avg_revenue_weight")).alias("revenue_norm"),
-        normalize(pl.col("risk_volatility")).alias("volatility_norm"),
+def _aggregate_plan(rate_df):
+    """One group-by pass: mean and non-null count per metric, OOS count / mean / std."""
+    exprs = []
+    for name, metric in _daily_metrics().items():
+        exprs += [metric.mean().alias(name), metric.count().cast(pl.Int64).alias(f"{name}_n")]
+    oos = pl.col("OOS_risk_projection")
+    exprs += [oos.count().cast(pl.Int64).alias("oos_n"), oos.mean().alias("oos_mean"),
+              oos.std().alias("risk_volatility")]
+    return rate_df.lazy().group_by(GROUP_KEYS).agg(exprs)
+
+
+def rating_aggregates(rate_df):
+    """Per (plant, item) running aggregates of `rate_df` (see module docstring)."""
+    return _aggregate_plan(rate_df).collect()
+
+
+def update_rating_aggregates(aggregates, rate_df, groups=None):
+    """Recompute the aggregates of changed groups only.
+
+    `rate_df` must hold all rows of the changed groups; `groups` (plant_id,
+    item_id) defaults to the groups present in `rate_df`. Groups listed in
+    `groups` but without rows are dropped.
+    """
+    if groups is None:
+        groups = rate_df.lazy().select(GROUP_KEYS).unique().collect()
+    fresh = _aggregate_plan(rate_df.lazy().join(groups.lazy(), on=GROUP_KEYS, how="semi")).collect()
+    return pl.concat([aggregates.join(groups, on=GROUP_KEYS, how="anti"), fresh.select(aggregates.columns)])
+
+
+def append_rating_rows(aggregates, rate_df):
+    """Fold new rows (e.g. extra days) into the aggregates.
+
+    Means merge weighted by their counts and the OOS spread with the
+    pairwise variance update (Chan et al.), so no earlier row is re-read.
+    """
+    new = _aggregate_plan(rate_df).collect()
+    both = aggregates.join(new, on=GROUP_KEYS, how="full", coalesce=True, suffix="_new")
+
+    exprs = []
+    for name in list(MEAN_METRICS) + ["oos_mean"]:
+        count_col = "oos_n" if name == "oos_mean" else f"{name}_n"
+        n_old, n_new = pl.col(count_col).fill_null(0), pl.col(f"{count_col}_new").fill_null(0)
+        total = (pl.col(name).fill_null(0) * n_old + pl.col(f"{name}_new").fill_null(0) * n_new)
+        exprs.append(pl.when(n_old + n_new > 0).then(total / (n_old + n_new)).otherwise(None).alias(name))
+
+    n_old, n_new = pl.col("oos_n").fill_null(0), pl.col("oos_n_new").fill_null(0)
+    n = n_old + n_new
+    m2 = (
+        (pl.col("risk_volatility").fill_null(0) ** 2) * (n_old - 1).clip(lower_bound=0)
+        + (pl.col("risk_volatility_new").fill_null(0) ** 2) * (n_new - 1).clip(lower_bound=0)
+        + (pl.col("oos_mean_new").fill_null(0) - pl.col("oos_mean").fill_null(0)) ** 2 * n_old * n_new
+        / pl.when(n > 0).then(n).otherwise(1)
+    )
+    exprs.append(pl.when(n > 1).then((m2 / (n - 1)).sqrt()).otherwise(None).alias("risk_volatility"))
+    exprs += [(pl.col(f"{name}_n").fill_null(0) + pl.col(f"{name}_n_new").fill_null(0)).alias(f"{name}_n")
+              for name in MEAN_METRICS]
+    exprs.append(n.alias("oos_n"))
+    return both.with_columns(exprs).select(aggregates.columns)
+
+
+def _normalize(expr):
+    min_val = expr.min()
+    max_val = expr.max()
+    return pl.when(max_val - min_val == 0).then(0).otherwise((expr - min_val) / (max_val - min_val))
+
+
+def _score_plan(aggregates, weights=None):
+    weights = {**HEALTH_WEIGHTS, **(weights or {})}
+    unknown = set(weights) - set(HEALTH_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown rating weights {sorted(unknown)}, expected {list(HEALTH_WEIGHTS)}")
+
+    # --- Means without NaN; coverage / risk infinities count as 0 ---
+    rating = aggregates.lazy().with_columns(
+        [pl.col(name).fill_nan(0) for name in MEAN_METRICS] + [pl.col("risk_volatility").fill_nan(0)]
+    ).with_columns([
+        pl.when(pl.col(name).is_infinite()).then(0).otherwise(pl.col(name)).alias(name)
+        for name in ("avg_coverage_ratio", "avg_relative_risk")
     ])
 
-    # --- Step 7: Composite health_score ---
-    rating_df = rating_df.with_columns([
+    # --- Normalize over all groups ---
+    rating = rating.with_columns(
+        [_normalize(pl.col(name)).alias(norm) for name, norm in MEAN_METRICS.items()]
+        + [_normalize(pl.col("risk_volatility")).alias("volatility_norm")]
+    )
+
+    # --- Composite health_score ---
+    return rating.with_columns(
         (
-            0.35 * pl.col("coverage_norm") +           # supply buffer
-            0.25 * pl.col("risk_norm") +               # relative risk
-            0.20 * pl.col("stockout_norm") +           # stockout frequency
-            0.10 * pl.col("prod_forecast_norm") +      # overproduction = safer
-            0.07 * (1 - pl.col("revenue_norm"))+            # protect high revenue items
-            0.03 * pl.col("volatility_norm")           # small weight for uncertainty
+            weights["coverage"] * pl.col("coverage_norm")
+            + weights["risk"] * pl.col("risk_norm")
+            + weights["stockout"] * pl.col("stockout_norm")
+            + weights["prod_forecast"] * pl.col("prod_forecast_norm")
+            + weights["revenue"] * (1 - pl.col("revenue_norm"))
+            + weights["volatility"] * pl.col("volatility_norm")
         ).alias("health_score")
-    ])
+    ).select(RATING_COLUMNS)
+
+
+def score_rating(aggregates, weights=None):
+    """Health score from `rating_aggregates`; `weights` override HEALTH_WEIGHTS by key."""
+    return _score_plan(aggregates, weights).collect()
+
 
-    return rating_df.select([
-        "plant_id", "item_id",
-        "avg_coverage_ratio", "avg_relative_risk", "stockout_frequency",
-        "avg_prod_forecast_ratio", "avg_revenue_weight", "risk_volatility",
-        "health_score"
-    ])
\ No newline at end of file
+def build_rating(rate_df: pl.DataFrame, weights=None) -> pl.DataFrame:
+    """Health score per (plant, item) from the daily rating rows, as one lazy query."""
+    return _score_plan(_aggregate_plan(rate_df), weights).collect()
@@ -0,0 +1,291 @@
+"""Long-lived local service answering production-cut what-if queries.
+
+    python -m src.service --root . --port 8765 --workers 2
+    curl -s localhost:8765/cut -d '{"cut_value": 10, "plants": ["PLANT_CA"], "days": 30}'
+
+The inputs, the id registry and the uncut baseline (plan, deployment,
+trucks, projection, cut input) are loaded once at start-up and written as
+memory-mapped IPC files for a process pool, the same way `src.sweep` feeds
+its workers. Each query runs cut -> incremental re-simulation -> KPIs in
+the pool, so concurrent queries do not block each other or the event loop.
+
+Endpoints:
+    POST /cut       {"cut_type": "%", "cut_value": 10, "plants": null | "P" | ["P", ...],
+                     "days": 30 (1..kpi_day), "method": "heuristic"}
+                    -> day-`kpi_day` dashboard (SS / OOS risk $, CFR %, trucks)
+                       and deltas against the uncut plan
+    GET  /baseline  uncut dashboard
+    GET  /stats     request count and latency percentiles (ms) of the computed
+                    answers; answers from memory under 'cached'
+    GET  /health
+"""
+import argparse
+import asyncio
+import collections
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import polars as pl
+
+from src.ids import encode_inputs, encode_labels
+from src.pipeline import load_inputs
+from src.sweep import _init_worker, _run_one, baseline_deltas, prepare_shared, write_shared
+
+LATENCY_WINDOW = 10_000         # latencies kept for the percentiles
+ANSWER_CACHE_SIZE = 256         # identical queries are answered from memory
+MAX_BODY_BYTES = 1 << 20
+
+
+class CutService:
+    """Warm inputs, baseline and worker pool behind the HTTP handlers."""
+
+    def __init__(self, inputs, kpi_day=30, truck_capacity=34.0, workers=2, cache_dir=None):
+        start = time.perf_counter()
+        self.kpi_day = kpi_day
+        self.truck_capacity = truck_capacity
+        self.inputs, self.registry = encode_inputs(inputs)
+        self.plants = set(self.registry["plant_id"].to_list())
+        self.plant_codes = dict(zip(self.registry["plant_id"].to_list(),
+                                    encode_labels(self.registry["plant_id"].to_list(), self.registry, "plant_id")))
+        shared, self.base = prepare_shared(self.inputs, kpi_day=kpi_day, truck_capacity=truck_capacity,
+                                           cache_dir=cache_dir)
+        self.horizon = int(shared["demand_outlook"]["day"].max())
+
+        self._tmp = tempfile.TemporaryDirectory(prefix="cut_service_")
+        paths = write_shared(shared, self._tmp.name)
+        # spawn: forking a process that already runs Polars threads can deadlock
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_init_worker, initargs=(paths,))
+        self.workers = workers
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)          # computed /cut answers
+        self.cached_latencies = collections.deque(maxlen=LATENCY_WINDOW)   # answers from memory
+        self.requests = collections.Counter()
+        self.answers = collections.OrderedDict()
+        print(f"🔥 Baseline ready in {time.perf_counter() - start:.1f}s "
+              f"({len(self.plants)} plants, {self.horizon} days, {workers} workers)")
+
+    async def warm_up(self):
+        # every worker imports the engines and maps the inputs before the first real query
+        loop = asyncio.get_running_loop()
+        scenario = {"cut_type": "%", "cut_value": 1.0, "plant_filter": None, "horizon": self.kpi_day,
+                    "method": "heuristic"}
+        await asyncio.gather(*[
+            loop.run_in_executor(self.pool, _run_one, scenario, self.kpi_day, self.truck_capacity, True)
+            for _ in range(self.workers)
+        ])
+
+    def scenario(self, query):
+        """Validate a /cut body into a `src.sweep` scenario dict."""
+        unknown = set(query) - {"cut_type", "cut_value", "plants", "days", "method"}
+        if unknown:
+            raise ValueError(f"Unknown fields: {sorted(unknown)}")
+        cut_type = query.get("cut_type", "%")
+        if cut_type not in ("%", "units"):
+            raise ValueError("cut_type must be '%' or 'units'")
+        try:
+            cut_value = float(query["cut_value"])
+            days = int(query.get("days", self.kpi_day))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("cut_value (number) is required; days must be an integer") from None
+        if cut_value < 0 or (cut_type == "%" and cut_value > 100):
+            raise ValueError("cut_value out of range")
+        # the dashboard is read on kpi_day: a cut past it would not show in the answer
+        if not 1 <= days <= self.kpi_day:
+            raise ValueError(f"days must be within 1..{self.kpi_day} (kpi_day)")
+        method = query.get("method", "heuristic")
+        if method not in ("heuristic", "optimize"):
+            raise ValueError("method must be 'heuristic' or 'optimize'")
+
+        plants = query.get("plants")
+        if plants in (None, "ALL", []):
+            plants = None
+        else:
+            if isinstance(plants, str):
+                plants = [plants]
+            if not isinstance(plants, list) or not all(isinstance(plant, str) for plant in plants):
+                raise ValueError("plants must be a plant id or a list of plant ids")
+            plants = sorted(set(plants))
+            missing = [plant for plant in plants if plant not in self.plants]
+            if missing:
+                raise ValueError(f"Unknown plants: {missing}")
+        return {"cut_type": cut_type, "cut_value": cut_value, "plant_filter": plants, "horizon": days,
+                "method": method}
+
+    async def cut(self, query):
+        scenario = self.scenario(query)
+        key = json.dumps(scenario, sort_keys=True)
+        if key in self.answers:
+            self.answers.move_to_end(key)
+            return {**self.answers[key], "cached": True}
+
+        plants = scenario["plant_filter"]
+        loop = asyncio.get_running_loop()
+        # labels stay in the scenario, the worker codes them (as in `run_sweep`)
+        row = await loop.run_in_executor(self.pool, _run_one, scenario, self.kpi_day, self.truck_capacity, True,
+                                         self.plant_codes)
+        row.pop("_log")
+        seconds = row.pop("seconds")
+        row = pl.DataFrame([row]).with_columns(baseline_deltas(self.base)).drop("plant_filter").row(0, named=True)
+        answer = {"scenario": {**scenario, "plant_filter": plants or "ALL"}, "kpi_day": self.kpi_day,
+                  **{key: value for key, value in row.items() if key not in scenario},
+                  "compute_seconds": seconds}
+
+        self.answers[key] = answer
+        if len(self.answers) > ANSWER_CACHE_SIZE:
+            self.answers.popitem(last=False)
+        return {**answer, "cached": False}
+
+    def stats(self):
+        """Request counts and latency percentiles of the computed 200 /cut answers.
+
+        Answers served from memory are summarized apart under 'cached'; error
+        responses are only counted.
+        """
+        return {"requests": dict(self.requests), **_latency_stats(self.latencies),
+                "cached": _latency_stats(self.cached_latencies)}
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        self._tmp.cleanup()
+
+
+def _latency_stats(latencies):
+    latencies = np.array(latencies) * 1000
+    out = {"window": int(latencies.size)}
+    if latencies.size:
+        out.update({f"p{q}_ms": float(np.percentile(latencies, q)) for q in (50, 90, 95, 99)})
+        out.update({"mean_ms": float(latencies.mean()), "max_ms": float(latencies.max())})
+    return out
+
+
+async def _read_request(reader):
+    """(method, path, headers, body) of one HTTP/1.1 request, or None on EOF."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, path, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise ValueError("Malformed request line") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0) or 0)
+    if length > MAX_BODY_BYTES:
+        raise ValueError("Body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path.split("?", 1)[0], headers, body
+
+
+def _response(writer, status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}[status]
+    writer.write(
+        f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+    )
+
+
+async def _route(service, method, path, body):
+    if method == "POST" and path == "/cut":
+        try:
+            query = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            raise ValueError("Body must be JSON") from None
+        if not isinstance(query, dict):
+            raise ValueError("Body must be a JSON object")
+        return 200, await service.cut(query)
+    if method == "GET" and path == "/baseline":
+        return 200, {"kpi_day": service.kpi_day, **service.base}
+    if method == "GET" and path == "/stats":
+        return 200, service.stats()
+    if method == "GET" and path == "/health":
+        return 200, {"status": "ok"}
+    return 404, {"error": f"No route {method} {path}"}
+
+
+def handler(service):
+    """asyncio stream handler serving keep-alive HTTP/1.1 connections."""
+    async def handle(reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except ValueError as err:
+                    _response(writer, 400, {"error": str(err)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "keep-alive").lower() != "close"
+                start = time.perf_counter()
+                try:
+                    status, payload = await _route(service, method, path, body)
+                except ValueError as err:  # bad query, or a cut the scope cannot take
+                    status, payload = 400, {"error": str(err)}
+                except Exception as err:  # worker failures must not take the service down
+                    status, payload = 500, {"error": f"{type(err).__name__}: {err}"}
+                if path == "/cut" and status == 200:
+                    latencies = service.cached_latencies if payload["cached"] else service.latencies
+                    latencies.append(time.perf_counter() - start)
+                service.requests[f"{status}"] += 1
+                _response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def serve(service, host="127.0.0.1", port=8765, socket_path=None):
+    """Warm the workers and serve until cancelled (TCP, or a Unix socket with `socket_path`)."""
+    await service.warm_up()
+    if socket_path:
+        server = await asyncio.start_unix_server(handler(service), path=socket_path)
+        where = socket_path
+    else:
+        server = await asyncio.start_server(handler(service), host=host, port=port)
+        where = f"http://{host}:{port}"
+    print(f"✅ Cut service listening on {where}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm production-cut query service")
+    parser.add_argument("--root", default=".", help="project root holding 'Symulation data/' and 'Data/'")
+    parser.add_argument("--store", default=None, help="read the inputs from this scenario store instead of the CSVs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", default=None, help="serve on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=max(1, min(4, (os.cpu_count() or 2) - 1)))
+    parser.add_argument("--kpi-day", type=int, default=30)
+    parser.add_argument("--truck-capacity", type=float, default=34.0)
+    parser.add_argument("--cache-dir", default=None, help="memoize the baseline stages in this directory")
+    args = parser.parse_args(argv)
+
+    service = CutService(load_inputs(args.root, store_root=args.store), kpi_day=args.kpi_day,
+                         truck_capacity=args.truck_capacity, workers=args.workers, cache_dir=args.cache_dir)
+    try:
+        asyncio.run(serve(service, host=args.host, port=args.port, socket_path=args.socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"🛑 Stopped; /cut latency {service.stats()}")
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Run one scenario's heavy stages as shards on a process pool.
+
+    with ShardExecutor(workers=8) as executor:
+        deployments = sharded_deployment(plan, demand_outlook, max_days=45, executor=executor)
+        trucks = sharded_trucks(pallets, truck_capacity=34.0, executor=executor)
+        sim = simulate_plan(plan, inputs, executor=executor)     # same, inside the pipeline
+
+The stages have no state across these keys, so every shard runs the
+unchanged serial engine:
+
+    deployment        per item ('sent_to_store' is a store x item array)
+    trucks            per (plant, store) lane
+    production plan   per (plant, item) group
+
+Rows go to shards by a hash of the keys. Shards are handed to the workers
+as Arrow IPC files in shared memory (/dev/shm when available), read
+memory-mapped, and the results come back as IPC files. The merged result is
+re-sorted (stable) into the serial row order, so it equals the one-process
+output row for row. Engine counters of the shards are added to the calling
+stage (see src.instrument).
+"""
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import polars as pl
+
+from src.instrument import count, run_log, stage
+
+SHARD_KEYS = {
+    "deployment": ["item_id"],
+    "trucks": ["plant_id", "store_id"],
+    "production_plan": ["plant_id", "item_id"],
+}
+
+# IPC hand-off in RAM when the OS offers it
+SHARED_MEMORY_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def _run_shard(fn, paths, kwargs, out_path):
+    # worker side: memory-mapped inputs -> serial engine -> IPC result
+    start = time.perf_counter()
+    frames = [pl.read_ipc(path, memory_map=True) for path in paths]
+    with stage("shard") as record:
+        result = fn(*frames, **kwargs)
+    result.write_ipc(out_path)
+    run_log(reset=True)
+    return out_path, record.get("counters", {}), time.perf_counter() - start
+
+
+def _warm(_):
+    # import the engines once per worker, before the first timed shard
+    import src.deployment_kernel  # noqa: F401
+    import src.prod_plan  # noqa: F401
+    import src.transport_truck  # noqa: F401
+
+    return os.getpid()
+
+
+class ShardExecutor:
+    """Process pool reused by every sharded stage of a run."""
+
+    def __init__(self, workers=None, n_shards=None, tmp_dir=SHARED_MEMORY_DIR):
+        self.workers = workers or os.cpu_count() or 1
+        self.n_shards = n_shards or self.workers
+        self.tmp_dir = tmp_dir
+        # spawn: forking a process that already runs Polars threads can deadlock
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def __repr__(self):
+        # stable, so stage cache keys (src.cache) do not change from run to run
+        return f"ShardExecutor(workers={self.workers}, n_shards={self.n_shards})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    def warm_up(self):
+        """Start every worker and import the engines there."""
+        return sorted(set(self.pool.map(_warm, range(self.workers))))
+
+    def run(self, fn, frames, keys, n_shards=None, **kwargs):
+        """`fn(*shard_frames, **kwargs)` per shard of `frames` split on `keys`.
+
+        Returns the non-empty results in shard order; the caller restores
+        the serial row order.
+        """
+        n_shards = n_shards or self.n_shards
+        dtypes = {tuple(frame.schema[key] for key in keys) for frame in frames}
+        if len(dtypes) > 1:
+            raise ValueError(f"Shard keys {keys} must have the same dtypes in every frame, got {sorted(map(str, dtypes))}")
+
+        with tempfile.TemporaryDirectory(prefix="shards_", dir=self.tmp_dir) as folder:
+            # --- Step 1: split every frame on the same key hash (row order kept) ---
+            shard_of = (pl.struct(keys).hash(seed=0) % n_shards).alias("_shard")
+            parts = [
+                frame.with_columns(shard_of).partition_by("_shard", as_dict=True, include_key=False,
+                                                          maintain_order=True)
+                for frame in frames
+            ]
+            shards = sorted({key[0] for part in parts for key in part})
+            jobs = []
+            for shard in shards:
+                paths = []
+                for i, (frame, part) in enumerate(zip(frames, parts)):
+                    path = os.path.join(folder, f"shard-{shard:05d}-in-{i}.arrow")
+                    part.get((shard,), frame.clear()).write_ipc(path)
+                    paths.append(path)
+                out_path = os.path.join(folder, f"shard-{shard:05d}-out.arrow")
+                jobs.append(self.pool.submit(_run_shard, fn, paths, kwargs, out_path))
+
+            # --- Step 2: collect in shard order, add the engine counters here ---
+            results = []
+            for job in jobs:
+                out_path, counters, _ = job.result()
+                count(**counters)
+                result = pl.read_ipc(out_path, memory_map=False)
+                if result.width:
+                    results.append(result)
+            count(shards=len(shards))
+        return results
+
+
+def _merge(results, sort_by):
+    # keys never span shards, so a stable sort restores the serial order
+    return pl.concat(results).sort(sort_by, maintain_order=True)
+
+
+def _executor(executor):
+    return executor if executor is not None else ShardExecutor()
+
+
+def sharded_deployment(production_plan, demand_data, max_days=45, executor=None, n_shards=None):
+    """`accurate_deployment_vectorized` split by item; same rows in the same order."""
+    from src.deployment_kernel import accurate_deployment_vectorized
+
+    keys = ["plant_id", "item_id", "day"]
+    if production_plan.select(keys).is_duplicated().any():
+        # serial order interleaves repeated plan rows with other items; keep it exact
+        return accurate_deployment_vectorized(production_plan, demand_data, max_days=max_days)
+
+    own = executor is None
+    executor = _executor(executor)
+    try:
+        results = executor.run(accurate_deployment_vectorized, [production_plan, demand_data],
+                               SHARD_KEYS["deployment"], n_shards=n_shards, max_days=max_days)
+    finally:
+        if own:
+            executor.close()
+    if not results:
+        return pl.DataFrame([])
+
+    # serial order: day, then the production row (plan position), then pass / rank
+    positions = production_plan.select(keys).with_row_index("_plan_pos")
+    return (
+        pl.concat(results)
+        .join(positions, on=keys, how="left", maintain_order="left")
+        .sort(["day", "_plan_pos"], maintain_order=True)
+        .drop("_plan_pos")
+    )
+
+
+def sharded_trucks(daily_df, truck_capacity=34.0, executor=None, n_shards=None):
+    """`simulate_truck_allocation` split by (plant, store) lane; same rows in the same order."""
+    from src.transport_truck import simulate_truck_allocation
+
+    own = executor is None
+    executor = _executor(executor)
+    try:
+        results = executor.run(simulate_truck_allocation, [daily_df], SHARD_KEYS["trucks"], n_shards=n_shards,
+                               truck_capacity=truck_capacity)
+    finally:
+        if own:
+            executor.close()
+    if not results:
+        return simulate_truck_allocation(daily_df.clear(), truck_capacity=truck_capacity)
+    return _merge(results, ["day", "plant_id", "store_id", "priority", "item_id"])
+
+
+def sharded_production_plan(plant_plan, buildup=1.15, executor=None, n_shards=None):
+    """`build_production_plan` split by (plant, item); same rows in the same order."""
+    from src.prod_plan import build_production_plan
+
+    own = executor is None
+    executor = _executor(executor)
+    try:
+        results = executor.run(build_production_plan, [plant_plan], SHARD_KEYS["production_plan"],
+                               n_shards=n_shards, buildup=buildup)
+    finally:
+        if own:
+            executor.close()
+    if not results:
+        return build_production_plan(plant_plan, buildup=buildup)
+    return _merge(results, ["plant_id", "item_id", "day"])
@@ -0,0 +1,191 @@
+"""Columnar scenario store: one Arrow IPC (or Parquet) file per scenario and stage.
+
+    python -m src.store --root . --store scenario_store
+
+converts the notebook CSV artifacts once; afterwards stages are read back
+typed (ids dictionary-encoded as Categorical, dates as pl.Date) and, for
+IPC, memory-mapped instead of re-parsed.
+
+Layout: <store_root>/<scenario>/<stage>.arrow (or .parquet)
+"""
+import argparse
+import os
+
+import polars as pl
+
+ID = pl.Categorical
+
+# Typed columns per stage; columns not listed are stored as they come
+STAGE_SCHEMAS = {
+    "demand_outlook": {
+        "item_id": ID, "store_id": ID, "plant_id": ID, "cat_id": ID, "day": pl.Int64, "date": pl.Date,
+        "forecast_sales": pl.Float64, "safety_stock_static": pl.Float64, "SOG_initial": pl.Float64,
+        "avg_daily_demand": pl.Float64, "transit_time_days": pl.Int64,
+    },
+    "lane_rules": {"plant_id": ID, "cat_id": ID, "store_id": ID, "transit_time_days": pl.Int64},
+    "pal_size_df": {"cat_id": ID, "plant_id": ID, "pallet_size": pl.Int64},
+    "prod_master": {
+        "item_id": ID, "plant_id": ID, "avg_daily_demand_plant": pl.Float64,
+        "cycle_days": pl.Int64, "MOQ_units": pl.Int64,
+    },
+    "price_df": {"store_id": ID, "item_id": ID, "sell_price": pl.Float64},
+    "prod_plan": {
+        "plant_id": ID, "item_id": ID, "day": pl.Int64, "date": pl.Date,
+        "production_quantity": pl.Float64, "MOQ_units": pl.Int64, "cycle_days": pl.Int64,
+    },
+    "deployment_outlook": {
+        "day": pl.Int64, "plant_id": ID, "store_id": ID, "item_id": ID,
+        "qty_sent": pl.Float64, "pallets_sent": pl.Float64,
+    },
+    "projection": {
+        "store_id": ID, "item_id": ID, "plant_id": ID, "cat_id": ID, "day": pl.Int64, "date": pl.Date,
+        "qty_sent": pl.Float64, "inv_projection": pl.Float64,
+        "SS_risk_projection": pl.Float64, "OOS_risk_projection": pl.Float64,
+        "SS_risk_peak": pl.Float64, "OOS_risk_peak": pl.Float64,
+    },
+}
+
+# (scenario, stage) -> CSV written by the notebooks (relative to the project root)
+CSV_ARTIFACTS = {
+    ("base", "pal_size_df"): "Symulation data/pal_size_df.csv",
+    ("base", "demand_outlook"): "Symulation data/demand_outlook.csv",
+    ("base", "lane_rules"): "Symulation data/lane_rules.csv",
+    ("base", "prod_master"): "Symulation data/prod_master.csv",
+    ("base", "price_df"): "Symulation data/price.csv",
+    ("base", "prod_plan"): "Data/Prod_Plan_Before.csv",
+    ("base", "deployment_outlook"): "Data/Deployment_Before.csv",
+    ("base", "projection"): "Data/Risk_Projection_Before.csv",
+    ("cut", "prod_plan"): "Data/Prod_Plan_After.csv",
+    ("cut", "deployment_outlook"): "Data/Deployment_After.csv",
+    ("cut", "projection"): "Data/Risk_Projection_After.csv",
+}
+
+FORMATS = {"ipc": ".arrow", "parquet": ".parquet"}
+
+
+def _use_shared_categories():
+    # polars < 1.32 only joins Categoricals read from different files under the global string cache
+    if not hasattr(pl, "Categories"):
+        pl.enable_string_cache()
+
+
+def apply_schema(frame, stage):
+    """Cast a frame to the stage schema (date strings parsed, ids to Categorical)."""
+    schema = STAGE_SCHEMAS.get(stage, {})
+    casts = []
+    for col, dtype in schema.items():
+        if col not in frame.columns:
+            continue
+        if dtype == pl.Date and frame.schema[col] == pl.String:
+            # notebook CSVs hold either 2016-05-23 or 2016-05-23T00:00:00.000
+            casts.append(pl.col(col).str.slice(0, 10).str.to_date())
+        else:
+            casts.append(pl.col(col).cast(dtype))
+    return frame.with_columns(casts) if casts else frame
+
+
+def stage_path(store_root, scenario, stage, fmt="ipc"):
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {list(FORMATS)}")
+    return os.path.join(store_root, scenario, stage + FORMATS[fmt])
+
+
+def write_stage(frame, store_root, scenario, stage, fmt="ipc"):
+    """Write one stage of one scenario; returns the file path.
+
+    IPC files are written uncompressed so they can be memory-mapped.
+    """
+    _use_shared_categories()
+    path = stage_path(store_root, scenario, stage, fmt)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    frame = apply_schema(frame, stage)
+    if fmt == "ipc":
+        frame.write_ipc(path, compression="uncompressed")
+    else:
+        frame.write_parquet(path)
+    return path
+
+
+def read_stage(store_root, scenario, stage, columns=None, lazy=False):
+    """Read one stage of one scenario.
+
+    IPC files are memory-mapped (zero-copy for the numeric columns); with
+    `lazy=True` a scan is returned so filters and column selections are
+    pushed down to the file.
+    """
+    _use_shared_categories()
+    for fmt, ext in FORMATS.items():
+        path = stage_path(store_root, scenario, stage, fmt)
+        if not os.path.exists(path):
+            continue
+        if lazy:
+            frame = pl.scan_ipc(path, memory_map=True) if fmt == "ipc" else pl.scan_parquet(path)
+            return frame.select(columns) if columns else frame
+        if fmt == "ipc":
+            return pl.read_ipc(path, columns=columns, memory_map=True)
+        return pl.read_parquet(path, columns=columns)
+    raise ValueError(f"No stage '{stage}' for scenario '{scenario}' in {store_root}")
+
+
+def list_stages(store_root):
+    """(scenario, stage, format, path) for everything in the store."""
+    rows = []
+    if os.path.isdir(store_root):
+        for scenario in sorted(os.listdir(store_root)):
+            folder = os.path.join(store_root, scenario)
+            if not os.path.isdir(folder):
+                continue
+            for name in sorted(os.listdir(folder)):
+                stage, ext = os.path.splitext(name)
+                fmt = {v: k for k, v in FORMATS.items()}.get(ext)
+                if fmt:
+                    rows.append({"scenario": scenario, "stage": stage, "format": fmt,
+                                 "path": os.path.join(folder, name)})
+    return pl.DataFrame(rows, schema={"scenario": pl.String, "stage": pl.String,
+                                      "format": pl.String, "path": pl.String})
+
+
+def _find_csv(root, rel_path):
+    # the checked-in artifacts are not always cased like the notebook paths
+    path = os.path.join(root, rel_path)
+    if os.path.exists(path):
+        return path
+    folder, name = os.path.split(path)
+    if os.path.isdir(folder):
+        for candidate in os.listdir(folder):
+            if candidate.lower() == name.lower():
+                return os.path.join(folder, candidate)
+    return None
+
+
+def convert_csv_artifacts(root=".", store_root="scenario_store", fmt="ipc"):
+    """One-shot conversion of the notebook CSV artifacts into the store.
+
+    Missing CSVs are skipped. Returns the written (scenario, stage, path) rows.
+    """
+    written = []
+    for (scenario, stage), rel_path in CSV_ARTIFACTS.items():
+        csv_path = _find_csv(root, rel_path)
+        if csv_path is None:
+            print(f"⚠️ Skipped {rel_path} (not found)")
+            continue
+        frame = pl.read_csv(csv_path)
+        if frame.columns and frame.columns[0] in ("", "Unnamed: 0"):
+            frame = frame.drop(frame.columns[0])  # pandas index column
+        path = write_stage(frame, store_root, scenario, stage, fmt)
+        written.append({"scenario": scenario, "stage": stage, "path": path})
+        print(f"✅ {rel_path} -> {path} ({frame.height:,} rows)")
+    return pl.DataFrame(written, schema={"scenario": pl.String, "stage": pl.String, "path": pl.String})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert notebook CSV artifacts into the scenario store")
+    parser.add_argument("--root", default=".", help="project root holding 'Symulation data/' and 'Data/'")
+    parser.add_argument("--store", default="scenario_store")
+    parser.add_argument("--format", default="ipc", choices=list(FORMATS))
+    args = parser.parse_args(argv)
+    convert_csv_artifacts(args.root, args.store, args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""Day-by-day simulation with bounded memory for long horizons.
+
+    summary = simulate_streaming(plan, inputs, horizon=365, sink="stream_out")
+    projection = read_stream("stream_out", "projection")
+
+Each day runs production -> deployment -> truck loading -> arrival after
+transit -> store inventory update. Only state is carried between days:
+units sent per (store, item), truck carryover per lane entry, shipments in
+transit and the running inventory and risk peaks per (store, item). Every
+`batch_days` days the results are flushed as Arrow IPC parts:
+
+    <sink>/<stage>/part-<first day>.arrow     stage: deployments, trucks,
+                                              deployment_outlook, projection
+    <sink>/peaks/part-00000.arrow             SS / OOS risk peaks per series
+    <sink>/_ids/<column>.arrow                id vocabularies (src.ids)
+
+Stages are written with Int32 id codes; `read_stream` decodes them. The
+inputs may be LazyFrames (e.g. `pl.scan_ipc` over the scenario store), in
+which case only `batch_days` days of plan and outlook are read at a time.
+"""
+import glob
+import os
+import shutil
+
+import numpy as np
+import polars as pl
+
+from src.deployment_kernel import deploy_slots, store_slots
+from src.ids import build_registry, decode_ids, encode_ids
+from src.instrument import count, stage
+from src.pipeline import pallet_summary, shipped_by_lane
+from src.transport_truck import simulate_truck_allocation
+
+STREAM_STAGES = ["deployments", "trucks", "deployment_outlook", "projection"]
+
+PLAN_COLUMNS = ["plant_id", "item_id", "day", "production_quantity", "starting_inventory_plant"]
+DEMAND_COLUMNS = ["store_id", "item_id", "plant_id", "cat_id", "day", "date", "projection", "avg_daily_demand",
+                  "safety_stock_static", "transit_time_days", "SOG_initial", "forecast_sales"]
+# Rows per read when spooling a lazy input into day batches
+SPOOL_ROWS = 1_000_000
+
+TRUCK_INPUT_COLUMNS = ["day", "plant_id", "store_id", "item_id", "priority", "pallet_size", "store_pallet_total"]
+
+
+def _split_days(window, first, last):
+    # one frame per day (row order within a day kept), None for days without rows
+    parts = {key[0]: part for key, part in window.partition_by("day", as_dict=True, maintain_order=True).items()}
+    return {day: parts.get(day) for day in range(first, last + 1)}
+
+
+def _spool(frame, folder, horizon, batch_days, chunk_rows):
+    """One pass over a lazy input, written as <folder>/batch-<k>/part-<chunk>.arrow by day batch.
+
+    Reading a batch then touches only its own rows instead of re-scanning
+    the whole input once per batch.
+    """
+    frame = frame.filter(pl.col("day").is_between(1, horizon))
+    total = frame.select(pl.len()).collect().item()
+    for chunk_id, offset in enumerate(range(0, total, chunk_rows)):
+        chunk = frame.slice(offset, chunk_rows).collect()
+        batches = chunk.with_columns(((pl.col("day") - 1) // batch_days).alias("_batch"))
+        for (batch,), part in batches.partition_by("_batch", as_dict=True, include_key=False).items():
+            path = os.path.join(folder, f"batch-{batch:05d}")
+            os.makedirs(path, exist_ok=True)
+            part.write_ipc(os.path.join(path, f"part-{chunk_id:05d}.arrow"), compression="uncompressed")
+
+
+def _batch_reader(frame, folder, horizon, batch_days, chunk_rows):
+    # DataFrames are already in memory and filtered per batch; LazyFrames are spooled once
+    if isinstance(frame, pl.DataFrame):
+        return lambda first, last: _split_days(frame.filter(pl.col("day").is_between(first, last)), first, last)
+    _spool(frame, folder, horizon, batch_days, chunk_rows)
+
+    def read(first, last):
+        path = os.path.join(folder, f"batch-{(first - 1) // batch_days:05d}")
+        if not os.path.isdir(path):
+            return dict.fromkeys(range(first, last + 1))
+        return _split_days(pl.scan_ipc(os.path.join(path, "*.arrow")).collect(), first, last)
+    return read
+
+
+def _write_part(sink, name, frames, first_day):
+    frames = [frame for frame in frames if frame is not None and frame.height]
+    if not frames:
+        return 0
+    folder = os.path.join(sink, name)
+    os.makedirs(folder, exist_ok=True)
+    out = pl.concat(frames, how="vertical_relaxed")
+    out.write_ipc(os.path.join(folder, f"part-{first_day:05d}.arrow"), compression="uncompressed")
+    return out.height
+
+
+def _clear_sink(sink):
+    # only an earlier stream (it has '_ids') is overwritten, and only the folders the engine writes
+    if not os.path.isdir(sink) or not os.listdir(sink):
+        return
+    if not os.path.isdir(os.path.join(sink, "_ids")):
+        raise ValueError(f"Sink {sink!r} is a non-empty directory without a stream ('_ids' missing); "
+                         "pass a new or empty folder")
+    for name in STREAM_STAGES + ["peaks", "_ids", "_spool"]:
+        shutil.rmtree(os.path.join(sink, name), ignore_errors=True)
+
+
+def simulate_streaming(plan, inputs, horizon=None, truck_capacity=34.0, sink="stream_out", batch_days=7):
+    """Run the network one day at a time and flush results to `sink`.
+
+    Parameters
+    ----------
+    plan : pl.DataFrame | pl.LazyFrame
+        Production plan with ['plant_id','item_id','day','production_quantity',
+        'starting_inventory_plant']
+    inputs : dict
+        'demand_outlook' (DataFrame or LazyFrame), 'pal_size_df', 'lane_rules'
+    horizon : int | None
+        Last simulated day; defaults to the last outlook day.
+    batch_days : int
+        Days read and flushed together; memory grows with this, not the horizon.
+    sink : str
+        New or empty folder, or the sink of an earlier run (its stage folders
+        are replaced); any other non-empty folder raises ValueError.
+
+    Returns
+    -------
+    dict
+        sink, days and rows written per stage.
+    """
+    eager = {name: isinstance(frame, pl.DataFrame) for name, frame in (("plan", plan), ("demand", inputs["demand_outlook"]))}
+    demand = inputs["demand_outlook"].lazy()
+    plan = plan.lazy()
+    if horizon is None:
+        horizon = demand.select(pl.col("day").max()).collect().item()
+    _clear_sink(sink)
+
+    # --- Ids: one vocabulary for every frame, codes index the state arrays ---
+    registry = build_registry([plan, demand, inputs["lane_rules"], inputs["pal_size_df"]])
+    plan = encode_ids(plan.select(PLAN_COLUMNS), registry)
+    demand = encode_ids(demand.select(DEMAND_COLUMNS), registry)
+    pal_size_df = encode_ids(inputs["pal_size_df"].lazy(), registry).collect()
+    transit = encode_ids(inputs["lane_rules"].lazy(), registry).select(
+        ["plant_id", "store_id", "transit_time_days"]).unique().collect()
+    for column, labels in registry.items():
+        os.makedirs(os.path.join(sink, "_ids"), exist_ok=True)
+        labels.to_frame().write_ipc(os.path.join(sink, "_ids", f"{column}.arrow"))
+
+    # --- Day batches: in-memory inputs are filtered, lazy ones spooled once to <sink>/_spool ---
+    spool = os.path.join(sink, "_spool")
+    read_plan = _batch_reader(plan.collect() if eager["plan"] else plan, os.path.join(spool, "plan"), horizon,
+                              batch_days, SPOOL_ROWS)
+    read_demand = _batch_reader(demand.collect() if eager["demand"] else demand, os.path.join(spool, "demand"),
+                                horizon, batch_days, SPOOL_ROWS)
+
+    # --- State carried from day to day ---
+    shape = (registry["store_id"].len(), registry["item_id"].len())
+    sent = np.zeros(shape)                  # units deployed so far per (store, item)
+    inventory = np.zeros(shape)             # projected store inventory
+    ss_peak = np.zeros(shape)
+    oos_peak = np.zeros(shape)
+    seen = np.zeros(shape, dtype=bool)
+    in_transit = {}                         # arrival day -> [(stores, items, qty)]
+    carry = None                            # truck carryover rows waiting for their lane's next run
+
+    rows_written = dict.fromkeys(STREAM_STAGES, 0)
+    with stage("streaming") as record:
+        for first in range(1, horizon + 1, batch_days):
+            last = min(first + batch_days - 1, horizon)
+            plan_days, demand_days = read_plan(first, last), read_demand(first, last)
+            out = {name: [] for name in STREAM_STAGES}
+
+            for day in range(first, last + 1):
+                plan_day, demand_day = plan_days[day], demand_days[day]
+
+                # --- Deployment (units sent so far is the only state) ---
+                deployments = None
+                if plan_day is not None and demand_day is not None:
+                    slots = store_slots(plan_day, demand_day, max_days=horizon).with_columns([
+                        pl.col("store_id").cast(pl.Int64).alias("store_code"),
+                        pl.col("item_id").cast(pl.Int64).alias("item_code"),
+                    ])
+                    deployments = deploy_slots(slots, sent)
+                    out["deployments"].append(deployments)
+
+                # --- Truck loading; carryover of lanes without pallets today waits ---
+                trucks = None
+                if deployments is not None and deployments.height:
+                    pallets = pallet_summary(deployments, pal_size_df).select(TRUCK_INPUT_COLUMNS)
+                    lanes = pallets.select(["plant_id", "store_id"]).unique()
+                    if carry is not None:
+                        pallets = pl.concat([
+                            pallets,
+                            carry.join(lanes, on=["plant_id", "store_id"], how="semi")
+                            .with_columns(pl.lit(day, dtype=pl.Int64).alias("day"))
+                            .select(TRUCK_INPUT_COLUMNS),
+                        ], how="vertical_relaxed")
+                        carry = carry.join(lanes, on=["plant_id", "store_id"], how="anti")
+                    trucks = simulate_truck_allocation(pallets, truck_capacity=truck_capacity)
+                    carry = pl.concat([
+                        frame for frame in (
+                            carry,
+                            trucks.filter(pl.col("pallets_carryover") > 1e-9)
+                            .select(TRUCK_INPUT_COLUMNS[:-1] + [pl.col("pallets_carryover").alias("store_pallet_total")])
+                            .with_columns(pl.col("pallet_size").cast(pallets.schema["pallet_size"])),
+                        ) if frame is not None
+                    ], how="vertical_relaxed")
+                    out["trucks"].append(trucks)
+
+                # --- Shipments go in transit ---
+                if trucks is not None and trucks.height:
+                    shipped = shipped_by_lane(trucks)
+                    out["deployment_outlook"].append(shipped)
+                    arriving = (
+                        shipped.join(transit, on=["plant_id", "store_id"], how="left")
+                        .with_columns((pl.col("day") + pl.col("transit_time_days")).alias("arrival_day"))
+                        .filter(pl.col("arrival_day") <= horizon)
+                    )
+                    for (arrival_day,), part in arriving.partition_by("arrival_day", as_dict=True).items():
+                        in_transit.setdefault(arrival_day, []).append(
+                            (part["store_id"].to_numpy(), part["item_id"].to_numpy(), part["qty_sent"].to_numpy()))
+
+                # --- Arrivals and inventory update ---
+                if demand_day is None:
+                    in_transit.pop(day, None)
+                    continue
+                arrived = np.zeros(shape)
+                for stores, items, qty in in_transit.pop(day, []):
+                    np.add.at(arrived, (stores, items), qty)
+                s = demand_day["store_id"].to_numpy()
+                i = demand_day["item_id"].to_numpy()
+                safety = demand_day["safety_stock_static"].to_numpy().astype(np.float64)
+                qty_sent = arrived[s, i]
+                inventory[s, i] += (demand_day["SOG_initial"].to_numpy() - demand_day["forecast_sales"].to_numpy()
+                                    + qty_sent)
+                inv = inventory[s, i]
+                ss_risk = np.where(inv < safety, (safety - inv) * (-1), 0.0)
+                oos_risk = np.where(inv < 0, inv, 0.0)
+                ss_peak[s, i] = np.minimum(ss_peak[s, i], ss_risk)
+                oos_peak[s, i] = np.minimum(oos_peak[s, i], oos_risk)
+                seen[s, i] = True
+                out["projection"].append(
+                    demand_day.select(["store_id", "item_id", "plant_id", "cat_id", "day", "date",
+                                       "safety_stock_static", "SOG_initial", "forecast_sales"])
+                    .with_columns([
+                        pl.Series("qty_sent", qty_sent),
+                        pl.Series("inv_projection", inv),
+                        pl.Series("SS_risk_projection", ss_risk),
+                        pl.Series("OOS_risk_projection", oos_risk),
+                    ])
+                )
+
+            # --- Flush the batch ---
+            for name in STREAM_STAGES:
+                rows_written[name] += _write_part(sink, name, out[name], first)
+
+        stores, items = np.nonzero(seen)
+        _write_part(sink, "peaks", [pl.DataFrame({
+            "store_id": stores.astype(np.int32),
+            "item_id": items.astype(np.int32),
+            "SS_risk_peak": ss_peak[stores, items],
+            "OOS_risk_peak": oos_peak[stores, items],
+        })], 0)
+        shutil.rmtree(spool, ignore_errors=True)
+        count(days=horizon)
+        record["rows_out"] = rows_written["projection"]
+
+    print(f"✅ Streamed {horizon} days -> {sink} ({rows_written['projection']:,} projection rows)")
+    return {"sink": sink, "days": horizon, "rows": rows_written}
+
+
+def read_registry(sink):
+    """Id vocabularies stored with a streamed run."""
+    return {
+        os.path.splitext(os.path.basename(path))[0]: pl.read_ipc(path).to_series()
+        for path in sorted(glob.glob(os.path.join(sink, "_ids", "*.arrow")))
+    }
+
+
+def read_stream(sink, name, lazy=False, decode=True):
+    """Read one stage of a streamed run (all parts, day order).
+
+    'projection' gets the run's SS / OOS peaks joined back, so it has the
+    columns of `build_risk_projection`.
+    """
+    frame = pl.scan_ipc(os.path.join(sink, name, "*.arrow"))
+    if name == "projection":
+        frame = frame.join(pl.scan_ipc(os.path.join(sink, "peaks", "*.arrow")), on=["store_id", "item_id"],
+                           how="left", maintain_order="left")
+    if decode:
+        frame = decode_ids(frame, read_registry(sink))
+    return frame if lazy else frame.collect()
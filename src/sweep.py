@@ -0,0 +1,209 @@
+"""Run a grid of production-cut scenarios in a process pool.
+
+    python -m src.sweep --cut-values 5 10 15 20 --plants ALL PLANT_CA --horizons 30 --out sweep.csv
+
+Each scenario runs apply_production_cut -> deployment -> truck allocation ->
+projection -> day-`kpi_day` KPIs. The read-only inputs are written once as
+uncompressed Arrow IPC files and memory-mapped by every worker, so they are
+not pickled per task. Unless --full is given, scenarios re-simulate only the
+items their cut changed and splice them into the shared baseline run.
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import polars as pl
+
+from src.cache import cache_report
+from src.ids import encode_inputs, encode_labels
+from src.instrument import extend_run_log, run_log, write_run_log
+from src.kpi import scenario_kpis
+from src.pipeline import load_inputs, prepare_baseline, run_cut_scenario, simulate_plan
+
+# Frames every worker needs; written to IPC once per sweep
+SHARED_FRAMES = ["demand_outlook", "lane_rules", "pal_size_df", "prod_master", "price_df",
+                 "prod_plan", "cut_input", "prices",
+                 "base_deployments", "base_deployment_outlook", "base_projection"]
+BASELINE_FRAMES = ["deployments", "deployment_outlook", "projection"]
+
+_SHARED = {}
+
+
+def expand_grid(cut_types=("%",), cut_values=(10.0,), plant_filters=(None,), horizons=(30,),
+                methods=("heuristic",)):
+    """Cartesian product of the cut parameters as a list of scenario dicts."""
+    return [
+        {"cut_type": cut_type, "cut_value": float(cut_value), "plant_filter": plant_filter, "horizon": int(horizon),
+         "method": method}
+        for cut_type, cut_value, plant_filter, horizon, method
+        in itertools.product(cut_types, cut_values, plant_filters, horizons, methods)
+    ]
+
+
+def baseline_deltas(base):
+    """Scenario-vs-uncut columns (the cut-vs-loss frontier) from the baseline KPIs."""
+    return [
+        (base["production_value"] - pl.col("production_value")).alias("production_saving"),
+        (base["ss_risk_dollar"] - pl.col("ss_risk_dollar")).alias("ss_loss_dollar"),
+        (base["oos_risk_dollar"] - pl.col("oos_risk_dollar")).alias("oos_loss_dollar"),
+        (pl.col("cfr_pct") - base["cfr_pct"]).alias("cfr_delta"),
+        (pl.col("trucks_sent") - base["trucks_sent"]).alias("truck_delta"),
+    ]
+
+
+def prepare_shared(inputs, kpi_day=30, truck_capacity=34.0, cache_dir=None):
+    """Baseline run and the frames every scenario worker reads.
+
+    Returns
+    -------
+    (dict[str, pl.DataFrame], dict)
+        SHARED_FRAMES by name and the uncut day-`kpi_day` KPIs.
+    """
+    baseline = prepare_baseline(inputs, truck_capacity=truck_capacity, cache_dir=cache_dir)
+    base_sim = simulate_plan(inputs["prod_plan"], inputs, max_days=kpi_day, truck_capacity=truck_capacity,
+                             cache_dir=cache_dir)
+    shared = {**inputs, "cut_input": baseline["cut_input"], "prices": baseline["prices"],
+              **{f"base_{name}": base_sim[name] for name in BASELINE_FRAMES}}
+    base = scenario_kpis(base_sim["projection"], inputs["prod_plan"], base_sim["deployment_outlook"],
+                         baseline["prices"], kpi_day=kpi_day, truck_capacity=truck_capacity)
+    return shared, base
+
+
+def write_shared(shared, folder):
+    """Write the shared frames as uncompressed IPC (memory-mapped by `_init_worker`)."""
+    paths = {}
+    for name in SHARED_FRAMES:
+        paths[name] = os.path.join(folder, f"{name}.arrow")
+        shared[name].write_ipc(paths[name], compression="uncompressed")
+    return paths
+
+
+def _init_worker(paths):
+    # Memory-mapped, zero-copy views of the shared inputs
+    for name, path in paths.items():
+        _SHARED[name] = pl.read_ipc(path, memory_map=True)
+
+
+def _plant_list(plant_filter):
+    # None (all plants), one plant id or a list of them -> list of ids
+    if plant_filter is None:
+        return []
+    return [plant_filter] if isinstance(plant_filter, str) else list(plant_filter)
+
+
+def _run_one(scenario, kpi_day, truck_capacity, incremental, plant_codes=None):
+    start = time.perf_counter()
+    inputs = _SHARED
+    plant_filter = scenario["plant_filter"]
+    if plant_codes is not None and plant_filter is not None:
+        # one plant id or a list of them
+        plant_filter = (plant_codes[plant_filter] if isinstance(plant_filter, str)
+                        else [plant_codes[plant] for plant in plant_filter])
+    baseline = {name: inputs[f"base_{name}"] for name in BASELINE_FRAMES} if incremental else None
+    plan_after, sim = run_cut_scenario(
+        inputs["cut_input"], inputs["prod_plan"], inputs,
+        cut_type=scenario["cut_type"],
+        cut_value=scenario["cut_value"],
+        plant_filter=plant_filter,
+        horizon_days=list(range(1, scenario["horizon"] + 1)),
+        max_days=kpi_day,
+        truck_capacity=truck_capacity,
+        baseline=baseline,
+        method=scenario.get("method", "heuristic"),
+    )
+    kpis = scenario_kpis(sim["projection"], plan_after, sim["deployment_outlook"], inputs["prices"],
+                         kpi_day=kpi_day, truck_capacity=truck_capacity)
+    return {**scenario, "plant_filter": "+".join(_plant_list(scenario["plant_filter"])) or "ALL", **kpis,
+            "seconds": time.perf_counter() - start, "_log": run_log(reset=True).to_dicts()}
+
+
+def run_sweep(scenarios, inputs=None, root=".", kpi_day=30, truck_capacity=34.0, max_workers=None,
+              incremental=True, store_root=None, cache_dir=None, coded_ids=True):
+    """Simulate every scenario and return one KPI row per scenario.
+
+    Rows also carry the deltas against the uncut baseline (the cut-vs-loss
+    frontier): `production_saving`, `ss_loss_dollar`, `oos_loss_dollar`,
+    `cfr_delta` and `truck_delta`. With `cache_dir` the baseline stages are
+    memoized on disk, so repeated sweeps over the same inputs skip them.
+    Stage timings and counters of the parent and of every worker end up in
+    the run log (`src.instrument`). With `coded_ids` the id columns are
+    encoded to int32 codes once (see `src.ids`) and every stage runs on the
+    codes.
+    """
+    if inputs is None:
+        inputs = load_inputs(root, store_root=store_root)
+    plant_codes = None
+    if coded_ids:
+        inputs, registry = encode_inputs(inputs)
+        plants = sorted({plant for s in scenarios for plant in _plant_list(s["plant_filter"])})
+        unknown = sorted(set(plants) - set(registry["plant_id"].to_list()))
+        if unknown:
+            raise ValueError(f"No records found for plant(s): {unknown}, expected {registry['plant_id'].to_list()}")
+        plant_codes = dict(zip(plants, encode_labels(plants, registry, "plant_id")))
+
+    # --- Baseline once, in the parent ---
+    shared, base = prepare_shared(inputs, kpi_day=kpi_day, truck_capacity=truck_capacity, cache_dir=cache_dir)
+    with tempfile.TemporaryDirectory(prefix="cut_sweep_") as tmp:
+        paths = write_shared(shared, tmp)
+        # spawn: forking a process that already runs Polars threads can deadlock
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(paths,)) as pool:
+            futures = [pool.submit(_run_one, scenario, kpi_day, truck_capacity, incremental, plant_codes) for scenario in scenarios]
+            rows = [future.result() for future in futures]
+
+    # worker stage records join the parent's run log, tagged by scenario index
+    for i, row in enumerate(rows):
+        extend_run_log(row.pop("_log"), scenario=str(i))
+
+    return pl.DataFrame(rows).with_columns(baseline_deltas(base))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Production-cut scenario sweep")
+    parser.add_argument("--root", default=".", help="project root holding 'Symulation data/' and 'Data/'")
+    parser.add_argument("--store", default=None, help="read the inputs from this scenario store instead of the CSVs")
+    parser.add_argument("--cut-types", nargs="+", default=["%"], choices=["%", "units"])
+    parser.add_argument("--cut-values", nargs="+", type=float, default=[5.0, 10.0, 15.0])
+    parser.add_argument("--plants", nargs="+", default=["ALL"], help="plant ids, ALL = full scope")
+    parser.add_argument("--horizons", nargs="+", type=int, default=[30], help="cut days 1..N")
+    parser.add_argument("--methods", nargs="+", default=["heuristic"], choices=["heuristic", "optimize"],
+                        help="cut allocation: health-score heuristic and/or MILP optimizer")
+    parser.add_argument("--kpi-day", type=int, default=30)
+    parser.add_argument("--truck-capacity", type=float, default=34.0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--full", action="store_true", help="re-simulate the whole network per scenario")
+    parser.add_argument("--cache-dir", default=None, help="memoize the baseline stages in this directory")
+    parser.add_argument("--run-log", default=None, help="write per-stage timings and counters (.json or .csv)")
+    parser.add_argument("--string-ids", action="store_true", help="keep string ids instead of int32 codes")
+    parser.add_argument("--out", default="sweep_results.csv")
+    args = parser.parse_args(argv)
+
+    scenarios = expand_grid(
+        cut_types=args.cut_types,
+        cut_values=args.cut_values,
+        plant_filters=[None if p == "ALL" else p for p in args.plants],
+        horizons=args.horizons,
+        methods=args.methods,
+    )
+    start = time.perf_counter()
+    results = run_sweep(scenarios, root=args.root, kpi_day=args.kpi_day,
+                        truck_capacity=args.truck_capacity, max_workers=args.workers,
+                        incremental=not args.full, store_root=args.store, cache_dir=args.cache_dir,
+                        coded_ids=not args.string_ids)
+    results.write_csv(args.out)
+    if args.run_log:
+        write_run_log(args.run_log)
+        print(f"🧾 Run log -> {args.run_log}")
+    if args.cache_dir:
+        print(cache_report())
+    print(f"✅ {len(scenarios)} scenarios in {time.perf_counter() - start:.1f}s -> {args.out}")
+    print(results.select(["cut_type", "cut_value", "plant_filter", "horizon", "method", "production_saving",
+                          "ss_loss_dollar", "oos_loss_dollar", "cfr_delta", "truck_delta"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,18 @@
-import pandas as pd
-def simulate_truck_allocation_pandas(daily_df: pd.DataFrame, truck_capacity: float = 34.0) -> pd.DataFrame:
+from typing import TYPE_CHECKING
+
+import numpy as np
+import polars as pl
+
+from src.ids import PRIORITY_CODES
+from src.instrument import count, is_pandas
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def simulate_truck_allocation_pandas(daily_df: "pd.DataFrame", truck_capacity: float = 34.0) -> "pd.DataFrame":
+    import pandas as pd
+
     # Normalize expected column names (case/space tolerant)
     df = daily_df.rename(columns={c: c.strip().lower().replace(" ", "_") for c in daily_df.columns}).copy()
 
@@ -113,4 +126,152 @@ def simulate_truck_allocation_pandas(daily_df: pd.DataFrame, truck_capacity: flo
     if out.empty:
         return out
     out = out.sort_values(["day","plant_id","store_id","priority","item_id"]).reset_index(drop=True)
-    return out
\ No newline at end of file
+    return out
+
+
+PRIORITY_RANK = {
+    "critical_risk": 1,
+    "safety_stock": 2,
+    "buffer_stock": 3,
+    "leftover": 4
+}
+
+# same ranks keyed by the priority codes of src.ids
+PRIORITY_CODE_RANK = {PRIORITY_CODES[label]: rank for label, rank in PRIORITY_RANK.items()}
+
+OUTPUT_COLUMNS = ["day", "plant_id", "store_id", "item_id", "priority", "pallet_size",
+                  "pallets_available", "pallets_sent", "pallets_carryover",
+                  "qty_available", "qty_sent", "qty_carryover", "trucks_sent"]
+
+
+def simulate_truck_allocation(daily_df, truck_capacity: float = 34.0):
+    """Columnar version of `simulate_truck_allocation_pandas`.
+
+    Accepts a Polars or pandas frame and returns the same type. Rows are
+    sorted once by (lane, day, priority rank, item). Each lane keeps its
+    carryover as a state vector over its (item, priority, pallet_size) keys,
+    and the full-truck cut-off of a lane-day comes from cumulative sums over
+    the available pallets, so the output matches the pandas version.
+    """
+    as_pandas = is_pandas(daily_df)
+    df = pl.from_pandas(daily_df) if as_pandas else daily_df
+    df = df.rename({c: c.strip().lower().replace(" ", "_") for c in df.columns})
+
+    required = {"day", "plant_id", "store_id", "item_id", "priority", "pallet_size", "store_pallet_total"}
+    missing = required - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+
+    lane = ["plant_id", "store_id"]
+    entry = ["item_id", "priority", "pallet_size"]
+
+    # --- Today's pallets per lane-day entry ---
+    rows = (
+        df.drop_nulls(["item_id", "priority", "pallet_size"])
+        .group_by(lane + ["day"] + entry)
+        .agg(pl.col("store_pallet_total").cast(pl.Float64).sum().alias("pallets"))
+    )
+    if rows.height == 0:
+        empty = pl.DataFrame()
+        return empty.to_pandas() if as_pandas else empty
+
+    # --- Entry keys per lane in dispatch order (priority rank, then item) ---
+    # coded ids (src.ids) sort like their strings, so they are used as they are
+    coded = rows.schema["item_id"].is_integer()
+    rank_map = PRIORITY_CODE_RANK if rows.schema["priority"].is_integer() else PRIORITY_RANK
+    keys = (
+        rows.select(lane + entry).unique()
+        .with_columns([
+            pl.col("priority").replace_strict(rank_map, default=99, return_dtype=pl.Int64).alias("priority_rank"),
+            (pl.col("item_id") if coded else pl.col("item_id").cast(pl.String)).alias("item_key"),
+        ])
+        .sort(lane + ["priority_rank", "item_key", "priority", "pallet_size"])
+        .with_row_index("key_id")
+    )
+    rows = (
+        rows.join(keys.select(lane + entry + ["key_id"]), on=lane + entry, how="left")
+        .sort(lane + ["day", "key_id"])
+    )
+
+    key_lane = keys.select(
+        ((pl.col("plant_id") != pl.col("plant_id").shift()) | (pl.col("store_id") != pl.col("store_id").shift()))
+        .fill_null(True).cum_sum() - 1
+    ).to_series().to_numpy()
+    key_start = np.flatnonzero(np.r_[True, key_lane[1:] != key_lane[:-1]])
+    row_key = rows["key_id"].to_numpy().astype(np.int64)
+    row_day = rows["day"].to_numpy()
+    row_pallets = rows["pallets"].to_numpy()
+    row_lane = key_lane[row_key]
+    lane_bounds = np.flatnonzero(np.r_[True, row_lane[1:] != row_lane[:-1], True])
+
+    out_key, out_day, out_available, out_sent, out_trucks = [], [], [], [], []
+    lane_trucks = []  # (first key, trucks over all days) per lane
+
+    for a, b in zip(lane_bounds[:-1], lane_bounds[1:]):
+        first_key = key_start[row_lane[a]]
+        n_keys = (key_start[row_lane[a] + 1] if row_lane[a] + 1 < len(key_start) else keys.height) - first_key
+        carry = np.zeros(n_keys)
+        days = row_day[a:b]
+        day_bounds = np.flatnonzero(np.r_[True, days[1:] != days[:-1], True]) + a
+        lane_total = 0
+
+        for d0, d1 in zip(day_bounds[:-1], day_bounds[1:]):
+            today = np.zeros(n_keys)
+            present = np.zeros(n_keys, dtype=bool)
+            today[row_key[d0:d1] - first_key] = row_pallets[d0:d1]
+            present[row_key[d0:d1] - first_key] = True
+
+            active = np.flatnonzero((carry > 0) | present)
+            available = carry[active] + today[active]
+
+            # full trucks only; entries before the cut-off ship in full, the
+            # cut-off entry takes what is left of the truckloads
+            trucks = int(np.cumsum(available)[-1] // truck_capacity)
+            capacity_left = np.subtract.accumulate(np.r_[trucks * truck_capacity, available])[:-1]
+            past_cutoff = np.cumsum((available > capacity_left) | (capacity_left <= 0)) > 0
+            sent = np.where(past_cutoff, 0.0, available)
+            cutoff = np.argmax(past_cutoff) if past_cutoff.any() else None
+            if cutoff is not None and capacity_left[cutoff] > 0:
+                sent[cutoff] = capacity_left[cutoff]
+            leftover = available - sent
+
+            carry = np.zeros(n_keys)
+            carry[active] = np.where(leftover > 1e-9, leftover, 0.0)
+
+            out_key.append(active + first_key)
+            out_day.append(np.full(active.size, row_day[d0]))
+            out_available.append(available)
+            out_sent.append(sent)
+            out_trucks.append(np.full(active.size, trucks))
+            lane_total += trucks
+        lane_trucks.append((first_key, lane_total))
+
+    available = np.concatenate(out_available)
+    sent = np.concatenate(out_sent)
+    lane_keys = keys[[first for first, _ in lane_trucks]].select(lane)
+    count(
+        trucks_sent=sum(trucks for _, trucks in lane_trucks),
+        pallets_sent=float(sent.sum()),
+        trucks_by_lane={f"{plant}|{store}": trucks
+                        for (plant, store), (_, trucks) in zip(lane_keys.iter_rows(), lane_trucks)},
+    )
+    out = (
+        keys[np.concatenate(out_key)]
+        .select(lane + entry)
+        .with_columns([
+            pl.Series("day", np.concatenate(out_day)),
+            pl.col("pallet_size").cast(pl.Float64),
+            pl.Series("pallets_available", available),
+            pl.Series("pallets_sent", sent),
+            pl.Series("pallets_carryover", available - sent),
+            pl.Series("trucks_sent", np.concatenate(out_trucks)).cast(pl.Int64),
+        ])
+        .with_columns([
+            (pl.col("pallets_available") * pl.col("pallet_size")).alias("qty_available"),
+            (pl.col("pallets_sent") * pl.col("pallet_size")).alias("qty_sent"),
+            (pl.col("pallets_carryover") * pl.col("pallet_size")).alias("qty_carryover"),
+        ])
+        .select(OUTPUT_COLUMNS)
+        .sort(["day", "plant_id", "store_id", "priority", "item_id"], maintain_order=True)
+    )
+    return out.to_pandas() if as_pandas else out